@@ -0,0 +1,106 @@
+"""
+Rendu de pavages en ligne de commande, sans fenêtre.
+
+Usage : python -m batch jobs.json
+
+Le fichier jobs.json contient une liste de tâches, par exemple :
+[
+    {
+        "image": "downloads/tuile.png",
+        "tiling": "p4m",
+        "corners": [[10, 10], [110, 10], [10, 110]],
+        "scale": 40,
+        "angle": 0,
+        "size": [1920, 1080],
+        "output": "out/p4m.png"
+    }
+]
+Les options (scale, angle, shape, rotation, ...) sont facultatives et dépendent du pavage.
+Un seul contexte OpenGL est créé, et chaque shader n'est compilé qu'une fois pour toutes les tâches.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from PySide6.QtCore import QSize, QPointF
+from PySide6.QtGui import QSurfaceFormat, QGuiApplication, QImageReader, QColor
+
+from tilings.abstract.tiling import TilingState
+from tilings.catalog import find_tiling
+from utils.cpu import to_qimage
+from utils.offscreen import OffscreenRenderer
+
+DEFAULT_SIZE = (600, 600)
+
+
+def load_jobs(path):
+    with open(path, encoding='utf-8') as file:
+        jobs = json.load(file)
+    if isinstance(jobs, dict):
+        jobs = [jobs]
+    return jobs
+
+
+def job_state(job) -> TilingState:
+    """
+    Build the state of the tiling described by a job
+    """
+    img_size = QImageReader(job["image"]).size()
+    if not img_size.isValid():
+        raise Exception(f"Unable to read the picture {job['image']}")
+
+    tiling_cls = find_tiling(job["tiling"])
+    corners = [QPointF(x, y) for x, y in job["corners"]]
+    if len(corners) != tiling_cls.CORNER_NB:
+        raise Exception(f"{tiling_cls.CODE} requires {tiling_cls.CORNER_NB} corners, {len(corners)} given")
+
+    options = {key: value for key, value in job.items() if key not in ("image", "tiling", "corners", "size", "output")}
+    for key, value in options.items():
+        # colors are given by their name, e.g. "#ffffff" or "white"
+        if isinstance(tiling_cls.DRAWING_CLASS.DEFAULTS.get(key), QColor):
+            options[key] = QColor(value)
+    resolution = QSize(*job.get("size", DEFAULT_SIZE))
+    return TilingState(tiling_cls.DRAWING_CLASS, img_size, corners, resolution, **options)
+
+
+def run(jobs, renderer: OffscreenRenderer):
+    for i, job in enumerate(jobs):
+        start = time.perf_counter()
+        state = job_state(job)
+        drawing_cls = find_tiling(job["tiling"]).DRAWING_CLASS
+        pixels = renderer.render(drawing_cls, job["image"], state)
+
+        output = job["output"]
+        if os.path.dirname(output):
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+        if not to_qimage(pixels).save(output):
+            raise Exception(f"Unable to save the picture {output}")
+        print(f"[{i + 1}/{len(jobs)}] {output} ({1000 * (time.perf_counter() - start):.0f} ms)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m batch", description="Rendu de pavages sans fenêtre")
+    parser.add_argument("jobs", help="fichier JSON contenant la liste des pavages à dessiner")
+    args = parser.parse_args(argv)
+
+    # No window is ever shown: the offscreen platform also works without display (e.g. Mesa llvmpipe)
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    qs_format = QSurfaceFormat()
+    qs_format.setVersion(4, 1)
+    qs_format.setProfile(QSurfaceFormat.CoreProfile)
+    QSurfaceFormat.setDefaultFormat(qs_format)
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    renderer = OffscreenRenderer()
+    try:
+        run(load_jobs(args.jobs), renderer)
+    finally:
+        renderer.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,6 +13,9 @@ from tilings.abstract.tiling import Tiling as AbstractTiling
 
 from tilings.spherical.s34.tiling import Tiling as SphTiling34
 from tilings.spherical.s43.tiling import Tiling as SphTiling43
+from tilings.spherical.s33.tiling import Tiling as SphTiling33
+from tilings.spherical.s35.tiling import Tiling as SphTiling35
+from tilings.spherical.s53.tiling import Tiling as SphTiling53
 
 from tilings.euclidean.cm.tiling import Tiling as EucTilingCM
 from tilings.euclidean.cmm.tiling import Tiling as EucTilingCMM
@@ -189,6 +192,15 @@ class MainWindow(QMainWindow):
         sph_43_action = QAction(SphTiling43.CODE, self)
         sph_43_action.triggered.connect(lambda checked: self.main_widget.load_tiling(checked, SphTiling43))
 
+        sph_33_action = QAction(SphTiling33.CODE, self)
+        sph_33_action.triggered.connect(lambda checked: self.main_widget.load_tiling(checked, SphTiling33))
+
+        sph_35_action = QAction(SphTiling35.CODE, self)
+        sph_35_action.triggered.connect(lambda checked: self.main_widget.load_tiling(checked, SphTiling35))
+
+        sph_53_action = QAction(SphTiling53.CODE, self)
+        sph_53_action.triggered.connect(lambda checked: self.main_widget.load_tiling(checked, SphTiling53))
+
         # Euclidean tilings
         euc_cm_action = QAction(EucTilingCM.CODE, self)
         euc_cm_action.triggered.connect(lambda checked: self.main_widget.load_tiling(checked, EucTilingCM))
@@ -248,6 +260,9 @@ class MainWindow(QMainWindow):
         spherical_menu = menu.addMenu("Pavages sphériques")
         spherical_menu.addAction(sph_34_action)
         spherical_menu.addAction(sph_43_action)
+        spherical_menu.addAction(sph_33_action)
+        spherical_menu.addAction(sph_35_action)
+        spherical_menu.addAction(sph_53_action)
 
         euclidean_menu = menu.addMenu("Pavages euclidiens")
         euclidean_menu.addAction(euc_p1_action)
@@ -380,6 +395,9 @@ if __name__ == '__main__':
     qs_format.setSamples(4)  # Enable antialiasing
     QSurfaceFormat.setDefaultFormat(qs_format)
 
+    # Share the OpenGL resources (programs, textures of the tiles) between the contexts of all the tiling windows
+    QApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+
     # Create the application
     app = QApplication([])
     
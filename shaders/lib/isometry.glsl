@@ -0,0 +1,8 @@
+/*
+ * Isometry applied to a point of the model, the rounding errors being corrected by reduceError
+ * (defined by the including shader: normalization on the sphere or on the hyperboloid)
+ */
+vec3 applyIsometry(mat3 isom, vec3 p) {
+    vec3 res = isom * p;
+    return reduceError(res);
+}
@@ -0,0 +1,35 @@
+/*
+ * Coordinates in the texture of the point p of the fundamental face:
+ * the face is split in triangles (center, vertex i, vertex i + 1), each one being mapped to the corresponding
+ * triangle of the tile, after the central projection of p on the plane of the face
+ * (the uniforms faceNormals, cornerCount, faceVertices and tileCorners are declared by the including shader)
+ */
+vec2 tileCoords(vec3 p) {
+    vec3 normal = faceNormals[0];
+    vec3 center = vec3(0);
+    vec2 tileCenter = vec2(0);
+    for (int i = 0; i < cornerCount; i++) {
+        center += faceVertices[i];
+        tileCenter += tileCorners[i];
+    }
+    center /= float(cornerCount);
+    tileCenter /= float(cornerCount);
+    vec3 x = p * dot(center, normal) / dot(p, normal);
+
+    // barycentric coordinates in the triangle containing x, i.e. the one whose smallest coordinate is the largest
+    vec3 best = vec3(-1.);
+    int bestIndex = 0;
+    for (int i = 0; i < cornerCount; i++) {
+        vec3 a = faceVertices[i];
+        vec3 b = faceVertices[(i + 1) % cornerCount];
+        float area = dot(normal, cross(b - a, center - a));
+        float la = dot(normal, cross(b - x, center - x)) / area;
+        float lb = dot(normal, cross(center - x, a - x)) / area;
+        vec3 lambda = vec3(la, lb, 1. - la - lb);
+        if (min(lambda.x, min(lambda.y, lambda.z)) > min(best.x, min(best.y, best.z))) {
+            best = lambda;
+            bestIndex = i;
+        }
+    }
+    return best.x * tileCorners[bestIndex] + best.y * tileCorners[(bestIndex + 1) % cornerCount] + best.z * tileCenter;
+}
@@ -0,0 +1,18 @@
+#include "quadrilateral.glsl"
+
+// the quadrilateral of the tile was resampled into the square texture tileTexture (cf. shaders/warp.glsl)
+uniform int warped;
+
+/*
+ * Coordinates in the texture of the point (x, y) of the unit square, for a quadrilateral tile
+ */
+vec2 tileCoords(float x, float y) {
+    if (warped != 0) {
+        return vec2(x, y);
+    }
+    return quadrilateralCoords(x, y);
+}
+
+vec2 tileCoords(vec2 p) {
+    return tileCoords(p.x, p.y);
+}
@@ -0,0 +1,14 @@
+/*
+ * Point of the quadrilateral tileCorner0..3 of the picture corresponding to the point (x, y) of the unit square
+ * (the uniforms tileCorner0..3 are declared by the including shader)
+ */
+vec2 quadrilateralCoords(float x, float y) {
+    vec2 a0 = (1. - x) * (tileCorner3 - tileCorner0) + x * (tileCorner2 - tileCorner1);
+    vec2 a1 = (1. - y) * (tileCorner1 - tileCorner0) + y * (tileCorner2 - tileCorner3);
+    vec2 b = ((1. - y) * tileCorner0 + y * tileCorner3) - ((1. - x) * tileCorner0 + x * tileCorner1);
+    mat2 a = mat2(a0, -a1);
+
+    vec2 sol = inverse(a) * b;
+    float theta = sol.x;
+    return (1. - theta) * ((1. - x) * tileCorner0 + x * tileCorner1) + theta * ((1 - x) * tileCorner3 + x * tileCorner2);
+}
@@ -0,0 +1,8 @@
+/*
+ * Points of the unit sphere
+ */
+vec3 reduceError(vec3 p) {
+    return normalize(p);
+}
+
+#include "isometry.glsl"
@@ -0,0 +1,7 @@
+/*
+ * Coordinates in the texture of the point p of the unit triangle, for a triangular tile
+ * (the uniforms tileCorner0..2 are declared by the including shader)
+ */
+vec2 tileCoords(vec2 p) {
+    return tileCorner0 + p.x * (tileCorner1 - tileCorner0) + p.y * (tileCorner2 - tileCorner0);
+}
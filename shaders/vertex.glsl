@@ -1,11 +1,13 @@
 #version 410 core
 layout(location = 0) in vec2 in_vert;
 
+// Part of the picture covered by the viewport (the whole picture when viewOffset = 0 and viewScale = 1)
+uniform vec2 viewOffset;
+uniform vec2 viewScale;
+
 out vec2 v_text;
 
 void main() {
     gl_Position = vec4(in_vert, 0.0, 1.0);
-    v_text = in_vert;
+    v_text = viewOffset + viewScale * in_vert;
 }
-
-
@@ -0,0 +1,22 @@
+#version 410 core
+
+in vec2 v_text;
+out vec4 f_color;
+
+uniform sampler2D tileTexture;
+uniform vec2 tileCorner0;
+uniform vec2 tileCorner1;
+uniform vec2 tileCorner2;
+uniform vec2 tileCorner3;
+
+/*
+ * Resampling of the quadrilateral tileCorner0..3 of the picture into the unit square,
+ * drawn once per set of corners: the fragment shaders of the tilings then sample the result
+ * at the coordinates (x, y) of the unit square (cf. uniform warped) instead of solving for each pixel
+ */
+#include "quadrilateral.glsl"
+
+void main() {
+    vec2 s = 0.5 * v_text + vec2(0.5);
+    f_color = texture(tileTexture, quadrilateralCoords(s.x, s.y));
+}
@@ -0,0 +1,46 @@
+"""
+The constants of the Euclidean groups used by the NumPy renderer must be those of their fragment shaders
+"""
+import importlib
+import os
+import re
+from math import sqrt
+
+import pytest
+from numpy import array, ndarray, allclose
+
+from utils.cpu import mat3
+from utils.path_helper import get_resource_path
+
+GROUPS = ['p1', 'p2', 'pm', 'pg', 'cm', 'pmm', 'pmg', 'pgg', 'cmm', 'p4', 'p4m', 'p4g',
+          'p3', 'p3m1', 'p31m', 'p6', 'p6m']
+# Global declarations of the shaders, e.g. "const mat3 ROT = mat3(...);" or "vec3 TEST = vec3(...);"
+DECLARATION = re.compile(r'^(?:const\s+)?(float|vec3|mat3)\s+(\w+)\s*=\s*([^;]*);', re.MULTILINE)
+# Constants of the shaders that the NumPy renderer does not need
+IGNORED = {'ORIGIN'}
+
+
+def shader_constants(path: str) -> dict:
+    with open(path, encoding='utf-8') as file:
+        source = file.read()
+    constants = {}
+    namespace = {'mat3': mat3, 'vec3': lambda *values: array(values, dtype=float), 'sqrt': sqrt}
+    for _, name, expression in DECLARATION.findall(source):
+        constants[name] = eval(expression, namespace, dict(constants))
+    return constants
+
+
+@pytest.mark.parametrize('group', GROUPS)
+def test_constants(group):
+    module = importlib.import_module(f'tilings.euclidean.{group}.tiling')
+    constants = shader_constants(get_resource_path(os.path.join('tilings', 'euclidean', group, 'fragment.glsl')))
+    for name, value in constants.items():
+        if name in IGNORED:
+            continue
+        assert hasattr(module, name.upper()), f"{group}: {name} is missing"
+        assert allclose(getattr(module, name.upper()), value), f"{group}: {name} differs from the shader"
+
+    numpy_constants = [name for name, value in vars(module).items()
+                       if name.isupper() and isinstance(value, ndarray)]
+    for name in numpy_constants:
+        assert name in constants or name.lower() in constants, f"{group}: {name} is not in the shader"
@@ -0,0 +1,62 @@
+"""
+The coordinates in the texture interpolated on the mesh of the unit cell must match the exact fold
+(tilings/euclidean/cpu.py) for every group
+"""
+import importlib
+
+import pytest
+from PySide6.QtCore import QSize, QPointF
+from numpy import array, abs as absolute, isclose
+
+from tilings.abstract.tiling import TilingState
+from tilings.euclidean.cpu import domain_coords
+from tilings.euclidean.mesh import cell_mesh, cell_pieces, area
+from utils.cpu import uniforms_to_numpy, tile_coords, homogeneous
+
+GROUPS = ['p1', 'p2', 'pm', 'pg', 'cm', 'pmm', 'pmg', 'pgg', 'cmm', 'p4', 'p4m', 'p4g',
+          'p3', 'p3m1', 'p31m', 'p6', 'p6m']
+# Corners of a tile far from a parallelogram, in a picture of 200 x 200 pixels
+CORNERS = [QPointF(20, 30), QPointF(170, 10), QPointF(190, 180), QPointF(10, 160)]
+# Barycentric coordinates of the points checked in each triangle of the mesh
+WEIGHTS = array([[1 / 3, 1 / 3, 1 / 3], [0.6, 0.2, 0.2], [0.2, 0.6, 0.2], [0.2, 0.2, 0.6],
+                 [0.45, 0.45, 0.1], [0.1, 0.45, 0.45], [0.45, 0.1, 0.45]])
+# Largest error in the texture (in [0, 1] units) at MESH_SUBDIVISIONS for quadrilateral tiles,
+# i.e. about 0.2 texel for a tile of 200 pixels (the coordinates are exact for triangular tiles)
+QUAD_TOLERANCE = 1e-3
+
+
+def group_uniforms(group):
+    tiling_cls = importlib.import_module(f'tilings.euclidean.{group}.tiling').Tiling
+    drawing_cls = tiling_cls.DRAWING_CLASS
+    state = TilingState(drawing_cls, QSize(200, 200), CORNERS[:tiling_cls.CORNER_NB], QSize(400, 300))
+    return tiling_cls, drawing_cls, uniforms_to_numpy(drawing_cls.uniforms(state))
+
+
+@pytest.mark.parametrize('group', GROUPS)
+def test_pieces_cover_the_cell(group):
+    _, drawing_cls, uniforms = group_uniforms(group)
+    pieces = cell_pieces(drawing_cls.fold_steps(uniforms))
+    assert isclose(sum(area(polygon) for polygon, _ in pieces), 1.)
+
+
+@pytest.mark.parametrize('group', GROUPS)
+def test_mesh_matches_fold(group):
+    tiling_cls, drawing_cls, uniforms = group_uniforms(group)
+    vertices, triangles = cell_mesh(uniforms, drawing_cls.fold_steps(uniforms))
+    corners = vertices.astype(float)[triangles]
+    points = (WEIGHTS[None, :, :, None] * corners[:, None, :, :]).sum(axis=2).reshape(-1, 4)
+    exact = tile_coords(domain_coords(drawing_cls, uniforms, homogeneous(points[:, 0:2])), uniforms)
+    error = absolute(exact - points[:, 2:4]).max()
+    assert error < (QUAD_TOLERANCE if tiling_cls.CORNER_NB == 4 else 1e-6)
+
+
+@pytest.mark.parametrize('group', GROUPS)
+def test_cell_pixels_follow_the_scale(group):
+    tiling_cls = importlib.import_module(f'tilings.euclidean.{group}.tiling').Tiling
+    drawing_cls = tiling_cls.DRAWING_CLASS
+    sizes = []
+    for scale in (20, 40):
+        state = TilingState(drawing_cls, QSize(200, 200), CORNERS[:tiling_cls.CORNER_NB], QSize(400, 300),
+                            scale=scale)
+        sizes.append(drawing_cls.cell_pixels(uniforms_to_numpy(drawing_cls.uniforms(state))))
+    assert isclose(sizes[0], 2 * sizes[1])
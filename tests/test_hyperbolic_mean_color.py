@@ -0,0 +1,46 @@
+"""
+Without any window, the mean colour of the {4,6} tile is computed as by the widget, for the shaders and the CPU
+"""
+from PySide6.QtCore import QSize, QPointF
+from PySide6.QtGui import QImage, QColor, QVector3D
+from numpy import allclose
+
+from tilings.abstract.tiling import TilingState
+from tilings.hyperbolic.cpu import tile_mean_color
+from tilings.hyperbolic.s46.tiling import TilingDrawing
+from utils.cpu import load_texture, uniforms_to_numpy
+
+CORNERS = [QPointF(4, 4), QPointF(60, 8), QPointF(56, 60), QPointF(6, 52)]
+
+
+def tile_image() -> QImage:
+    image = QImage(64, 64, QImage.Format.Format_RGBA8888)
+    for y in range(64):
+        for x in range(64):
+            image.setPixelColor(x, y, QColor(4 * x, 4 * y, 128, 255))
+    return image
+
+
+def test_mean_color_computed_from_image():
+    image = tile_image()
+    state = TilingState(TilingDrawing, QSize(64, 64), CORNERS, QSize(200, 100), lod=True)
+    assert state.tile_mean_color is None
+
+    uniforms = uniforms_to_numpy(TilingDrawing.uniforms(TilingDrawing.image_state(state, image)))
+    corners = [uniforms[f"tileCorner{i}"] for i in range(4)]
+    assert uniforms["lod"] == 1
+    assert allclose(uniforms["tileMeanColor"], tile_mean_color(load_texture(image), corners), atol=1e-6)
+    # the state given by the caller is left unchanged
+    assert state.tile_mean_color is None
+
+
+def test_given_mean_color_or_no_lod():
+    image = tile_image()
+    color = QVector3D(0.25, 0.5, 0.75)
+    state = TilingState(TilingDrawing, QSize(64, 64), CORNERS, QSize(200, 100), lod=True, tile_mean_color=color)
+    assert TilingDrawing.image_state(state, image) is state
+
+    # lod is off by default: the pixels near the boundary are sampled as before
+    state = TilingState(TilingDrawing, QSize(64, 64), CORNERS, QSize(200, 100))
+    uniforms = TilingDrawing.uniforms(TilingDrawing.image_state(state, image))
+    assert uniforms["lod"] == 0
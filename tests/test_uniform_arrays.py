@@ -0,0 +1,68 @@
+"""
+The arrays of vertices of the triangular faces of {3,3} and {3,5} are uploaded as arrays of vec3, not as mat3,
+and hold the vertices used by the NumPy renderer
+"""
+import re
+
+import pytest
+from OpenGL import GL
+from PySide6.QtCore import QSize, QPointF
+from numpy import allclose, array
+
+from tilings.abstract import tiling as abstract_tiling
+from tilings.abstract.tiling import TilingState
+from tilings.spherical.s33.tiling import Tiling as Tiling33
+from tilings.spherical.s35.tiling import Tiling as Tiling35
+from tilings.spherical.s53.tiling import Tiling as Tiling53
+from utils.cpu import uniforms_to_numpy
+from utils.path_helper import get_resource_path
+from utils.shader_cache import preprocess
+
+
+def uniform_arrays(path: str) -> set:
+    """ Names of the uniforms declared as arrays in the shader """
+    source = preprocess(path).decode('utf-8')
+    return set(re.findall(r'^\s*uniform\s+\w+\s+(\w+)\s*\[', source, re.MULTILINE))
+
+
+class Program:
+    """ Program whose uniform arrays are those of tilings/spherical/polyhedron.glsl """
+    ARRAYS = uniform_arrays(get_resource_path("tilings/spherical/polyhedron.glsl"))
+
+    def __init__(self):
+        self.values = {}
+
+    def uniformLocation(self, name):
+        if name.endswith("[0]"):
+            return 1 if name[:-3] in self.ARRAYS else -1
+        return 0
+
+    def setUniformValue(self, name, value):
+        self.values[name] = value
+
+
+@pytest.mark.parametrize('tiling_cls', [Tiling33, Tiling35, Tiling53])
+def test_face_vertices(tiling_cls, monkeypatch):
+    uploaded = {}
+    monkeypatch.setattr(GL, "glUniform3fv", lambda location, count, data: uploaded.setdefault("vec3", []).append(
+        array(data).reshape(count, 3)))
+    monkeypatch.setattr(GL, "glUniformMatrix3fv", lambda *args: uploaded.setdefault("mat3", []).append(args))
+    monkeypatch.setattr(GL, "glUniform2fv", lambda *args: None)
+
+    drawing_cls = tiling_cls.DRAWING_CLASS
+    corners = [QPointF(10 * i, 5 * i * i) for i in range(tiling_cls.CORNER_NB)]
+    state = TilingState(drawing_cls, QSize(100, 100), corners, QSize(64, 64))
+    uniforms = drawing_cls.uniforms(state)
+    program = Program()
+    uploaded.clear()
+    abstract_tiling.set_uniform(program, "faceVertices", uniforms["faceVertices"])
+    assert "mat3" not in uploaded and "faceVertices" not in program.values
+
+    cpu = uniforms_to_numpy(uniforms)
+    count = int(cpu["cornerCount"])
+    assert uploaded["vec3"][0].shape == (count, 3)
+    assert allclose(uploaded["vec3"][0], cpu["faceVertices"][:count])
+
+    # a plain matrix is still uploaded as a mat3
+    abstract_tiling.set_uniform(program, "isometry", uniforms["isometry"])
+    assert "isometry" in program.values
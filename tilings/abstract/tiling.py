@@ -1,17 +1,139 @@
 from abc import abstractmethod
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import tkinter as tk
 from tkinter import filedialog
 
-from typing import List
+from typing import List, Optional, Callable, Iterable, Iterator, Tuple
+from weakref import WeakValueDictionary
+
 from OpenGL import GL
-from PySide6.QtCore import QSize, QPointF
-from PySide6.QtGui import QImage
-from PySide6.QtOpenGL import QOpenGLShaderProgram, QOpenGLShader, QOpenGLTexture
+from PySide6.QtCore import QSize, QPointF, QRect
+from PySide6.QtGui import QImage, QMatrix3x3, QVector2D, QColor
+from PySide6.QtOpenGL import QOpenGLShaderProgram, QOpenGLFramebufferObject, QOpenGLFramebufferObjectFormat
 from PySide6.QtOpenGLWidgets import QOpenGLWidget
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QFileDialog
-from numpy import array, float32
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QFileDialog, QDialog, QFormLayout, QSpinBox, \
+    QDialogButtonBox, QComboBox
+from numpy import array, float32, ndarray, empty, uint8, concatenate, ascontiguousarray
+from utils.cpu import to_qimage, uniforms_to_numpy
+from utils.deepzoom import DEEPZOOM_TILE_SIZE, level_count, level_size, tile_rects, intersects_disc, tile_path, \
+    write_manifest
+from utils.framebuffer import create_framebuffer, read_pixels, PixelBufferReader
+from utils.image_writer import open_image_writer, ApngWriter, encode_rows, write_png
 from utils.path_helper import get_resource_path
+from utils.shader_cache import shader_program
+from utils.texture_pool import tile_image, acquire_texture, release_texture
+
+# Taille maximale (en pixels) proposée pour l'export
+EXPORT_SIZE_MAX = 65536
+# Côté (en pixels) des morceaux dessinés lors d'un export
+EXPORT_TILE_SIZE = 512
+# Taille maximale (en octets) d'une bande de morceaux gardée en mémoire lors d'un export
+EXPORT_BAND_BYTES = 16 * 2 ** 20
+# Images par seconde des animations exportées
+ANIMATION_FPS = 40
+# Nombre d'images par défaut et nombre maximal d'images d'une animation exportée
+ANIMATION_FRAMES_DEFAULT = 200
+ANIMATION_FRAMES_MAX = 10000
+# Nombre maximal d'images en cours d'encodage par thread (limite la mémoire utilisée par l'export)
+ANIMATION_QUEUE_FACTOR = 2
+
+
+def rescale_corners(corners: List[QPointF], img_size: QSize) -> List[QPointF]:
+    """ Ramène les sommets de la tuile dans le repère [0, 1] x [0, 1] de la texture. """
+    return [QPointF(p.x() / img_size.width(), p.y() / img_size.height()) for p in corners]
+
+
+def set_uniform(program: QOpenGLShaderProgram, name: str, value):
+    """
+    Transmet un uniforme au programme (qui doit être lié), les matrices NumPy étant converties en QMatrix3x3.
+    Les tableaux NumPy de forme (n, 3, 3), (n, 3) ou (n, 2) sont transmis comme tableaux de mat3, vec3 ou vec2.
+    Un tableau de forme (3, 3) est une matrice, sauf si l'uniforme est déclaré comme un tableau dans le shader
+    (par exemple les trois sommets d'une face triangulaire, uniform vec3 faceVertices[MAX_CORNERS]).
+    """
+    if isinstance(value, ndarray) and (value.shape != (3, 3) or program.uniformLocation(f"{name}[0]") != -1):
+        location = program.uniformLocation(name)
+        data = ascontiguousarray(value, dtype=float32)
+        if value.ndim == 3:
+            # les matrices NumPy sont données ligne par ligne
+            GL.glUniformMatrix3fv(location, len(value), GL.GL_TRUE, data)
+        elif value.shape[1] == 3:
+            GL.glUniform3fv(location, len(value), data)
+        else:
+            GL.glUniform2fv(location, len(value), data)
+        return
+    if isinstance(value, ndarray):
+        value = QMatrix3x3(value.flatten())
+    program.setUniformValue(name, value)
+
+
+def same_uniform(a, b) -> bool:
+    """ Indique si deux valeurs d'un uniforme sont égales, tableaux NumPy compris. """
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, ndarray):
+        return a.shape == b.shape and bool((a == b).all())
+    return a == b
+
+
+def state_key(value):
+    """ Valeur hashable représentant une valeur de l'état du pavage (sommets, résolution, options). """
+    if isinstance(value, ndarray):
+        return value.tobytes()
+    if isinstance(value, (list, tuple)):
+        return tuple(state_key(item) for item in value)
+    if isinstance(value, QColor):
+        return value.getRgbF()
+    if hasattr(value, 'toTuple'):
+        return value.toTuple()
+    return value
+
+
+class UniformCache:
+    """
+    Valeurs des uniformes transmises en dernier à chaque programme, pour ne transmettre que celles qui ont changé.
+    Les programmes étant partagés entre les fenêtres (cf. utils.shader_cache), les valeurs connues d'un programme
+    sont oubliées dès qu'un autre cache lui a transmis les siennes.
+    """
+    # Dernier cache ayant transmis des uniformes à chaque programme (indexé par id du programme)
+    _owners = WeakValueDictionary()
+
+    def __init__(self):
+        self.values = {}
+
+    def upload(self, program: QOpenGLShaderProgram, uniforms: dict):
+        """ Transmet au programme (qui doit être lié) les uniformes dont la valeur a changé. """
+        key = id(program)
+        if UniformCache._owners.get(key) is not self:
+            UniformCache._owners[key] = self
+            self.values[key] = {}
+        values = self.values[key]
+        for name, value in uniforms.items():
+            if name in values and same_uniform(values[name], value):
+                continue
+            set_uniform(program, name, value)
+            values[name] = value
+
+    def clear(self):
+        """ Oublie les valeurs transmises (programmes recréés avec un nouveau contexte). """
+        self.values.clear()
+
+
+def view_uniforms(resolution: QSize, rect: Optional[QRect] = None) -> dict:
+    """
+    Uniformes du vertex shader sélectionnant la partie rect de l'image (l'image entière par défaut).
+    """
+    if rect is None:
+        return {"viewOffset": QVector2D(0, 0), "viewScale": QVector2D(1, 1)}
+    w, h = resolution.width(), resolution.height()
+    return {
+        "viewOffset": QVector2D(-1 + (2 * rect.x() + rect.width()) / w, 1 - (2 * rect.y() + rect.height()) / h),
+        "viewScale": QVector2D(rect.width() / w, rect.height() / h)
+    }
 
 
 class TilingOptions(QWidget):
@@ -32,21 +154,52 @@ class TilingDrawing(QOpenGLWidget):
 
     VERTEX_SHADER = get_resource_path("")
     FRAGMENT_SHADER = get_resource_path("")
+    WARP_SHADER = get_resource_path("shaders/warp.glsl")
+    # La tuile est un quadrilatère rééchantillonné dans une texture carrée (cf. uniforme warped des shaders)
+    WARPED_TILE = False
+    # Valeurs initiales des options du pavage (échelle, forme, etc.)
+    DEFAULTS = {}
+    # Rayon du disque dessiné, en unités de v_text * (resolution / resolution.y) (None : tout le plan)
+    DISC_RADIUS = None
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super().__init__(parent)
 
         self.setMinimumSize(parent.resolution)
-        self.img = QImage(path)
+        # image et texture partagées par les fenêtres dessinant la même tuile (cf. utils.texture_pool)
+        self.path = path
+        self.img = tile_image(path)
         self.img_size = img_size
         self.corners = corners
 
-        self.rescaled_corners = [QPointF(p.x() / img_size.width(), p.y() / img_size.height()) for p in self.corners]
+        self.rescaled_corners = rescale_corners(self.corners, img_size)
 
         self.vao = None
         self.program = None
         self.vertex_buffer = None
         self.texture = None
+        # Macros de la variante compilée de self.program (cf. shader_defines)
+        self._program_defines = None
+
+        # Uniformes calculés pour l'état courant (sommets, résolution, options) et valeurs transmises aux programmes
+        self._uniforms = None
+        self._numpy_uniforms = None
+        self._uniforms_key = None
+        self.uniform_cache = UniformCache()
+
+        # Dernière image dessinée dans la fenêtre, recopiée tant que frame_key ne change pas
+        self.frame_buffer = None
+        self._frame_key = None
+
+        # Texture carrée de la tuile redressée, recalculée quand les sommets changent
+        self.warp_program = None
+        self.warped_tile = None
+        self.warped_tile_size = 0
+        self._warped_key = None
+
+        # Résolution et partie de l'image dessinée pendant un export (None : la fenêtre entière)
+        self.export_resolution = None
+        self.view_rect = None
 
     @classmethod
     def init(cls, parent, path, img_size, corners):
@@ -58,10 +211,7 @@ class TilingDrawing(QOpenGLWidget):
 
         self.cleanupGL()
 
-        self.program = QOpenGLShaderProgram()
-        self.program.addShaderFromSourceFile(QOpenGLShader.Vertex, self.VERTEX_SHADER)
-        self.program.addShaderFromSourceFile(QOpenGLShader.Fragment, self.FRAGMENT_SHADER)
-        self.program.link()
+        self.update_program()
 
         vertices = array([
             -1, -1,
@@ -81,37 +231,221 @@ class TilingDrawing(QOpenGLWidget):
 
         GL.glClearColor(0.2, 0.2, 0.2, 1.0)
 
-        self.texture = QOpenGLTexture(QOpenGLTexture.Target2D)
-        self.texture.create()
-        self.texture.bind()
-
-        self.texture.setData(self.img)
-        self.texture.setMinMagFilters(QOpenGLTexture.Linear, QOpenGLTexture.Linear)
-        self.texture.setWrapMode(QOpenGLTexture.DirectionS, QOpenGLTexture.Repeat)
-        self.texture.setWrapMode(QOpenGLTexture.DirectionT, QOpenGLTexture.Repeat)
+        self.texture = acquire_texture(self.path, self.img)
+
+        if self.WARPED_TILE:
+            self.warp_program = shader_program(self.VERTEX_SHADER, self.WARP_SHADER)
+
+            # autant de pixels que l'image de départ, sans dépasser la taille maximale d'une texture
+            self.warped_tile_size = min(max(self.img.width(), self.img.height(), 1),
+                                        GL.glGetIntegerv(GL.GL_MAX_TEXTURE_SIZE))
+            self.warped_tile = GL.glGenTextures(1)
+            GL.glBindTexture(GL.GL_TEXTURE_2D, self.warped_tile)
+            GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, self.warped_tile_size, self.warped_tile_size, 0,
+                            GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, None)
+            GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+            GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+            GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_CLAMP_TO_EDGE)
+            GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_CLAMP_TO_EDGE)
+            GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+            self._warped_key = None
 
     def cleanupGL(self):
         """ Libère proprement les ressources OpenGL pour éviter les crashs après fermeture. """
+        self.uniform_cache.clear()
+        self.frame_buffer = None
+        self._frame_key = None
         if self.vertex_buffer:
             GL.glDeleteBuffers(1, [self.vertex_buffer])
             self.vertex_buffer = None
         if self.texture:
-            self.texture.destroy()
+            release_texture(self.texture)
             self.texture = None
         if self.program:
             self.program.release()
             self.program = None
+            self._program_defines = None
         if self.vao:
             GL.glDeleteVertexArrays(1, [self.vao])
             self.vao = None
+        if self.warped_tile:
+            GL.glDeleteTextures(1, [self.warped_tile])
+            self.warped_tile = None
+        if self.warp_program:
+            self.warp_program.release()
+            self.warp_program = None
+
+    @property
+    def resolution(self):
+        if self.export_resolution is not None:
+            return self.export_resolution
+        return self.parent().resolution
 
+    @classmethod
     @abstractmethod
-    def setup_uniforms(self):
+    def uniforms(cls, state) -> dict:
+        """
+        Calcule les uniformes du shader à partir de l'état du pavage.
+        :param state: le widget lui-même ou un TilingState (rendu sans fenêtre)
+        :return: un dictionnaire nom de l'uniforme -> valeur
+        """
         raise Exception("This method must be implemented by subclasses")
 
+    @classmethod
+    def shader_defines(cls, state) -> dict:
+        """
+        Macros du préprocesseur du fragment shader (cf. utils.shader_cache.preprocess) :
+        les options qui ne changent que par l'interface sont compilées dans des variantes du programme
+        plutôt que transmises comme uniformes testés à chaque pixel.
+        :param state: le widget lui-même ou un TilingState (rendu sans fenêtre)
+        :return: un dictionnaire nom de la macro -> valeur entière
+        """
+        return {}
+
+    @classmethod
+    def image_state(cls, state, image):
+        """
+        Complète un TilingState par les options calculées à partir de l'image de la tuile,
+        comme le fait le widget à partir de self.img (rendus sans fenêtre, sur le processeur ou hors écran).
+        :param image: chemin ou QImage de la tuile
+        :return: l'état lui-même par défaut, sinon une copie complétée
+        """
+        return state
+
+    def update_program(self):
+        """ Sélectionne la variante du programme correspondant aux options, compilée à la première utilisation. """
+        defines = self.shader_defines(self)
+        if self.program is None or defines != self._program_defines:
+            self.program = shader_program(self.VERTEX_SHADER, self.FRAGMENT_SHADER, defines)
+            self._program_defines = defines
+
+    def uniforms_key(self):
+        """ Clé de l'état dont dépendent les uniformes : sommets, résolution et options (cf. DEFAULTS). """
+        return state_key((self.corners, self.rescaled_corners, self.resolution,
+                          [getattr(self, name) for name in self.DEFAULTS]))
+
+    def current_uniforms(self, numpy: bool = False) -> dict:
+        """
+        Uniformes de l'état courant, recalculés seulement quand les sommets, la résolution ou une option
+        (cf. DEFAULTS) ont changé. Le dictionnaire renvoyé est partagé : il ne doit pas être modifié.
+        :param numpy: valeurs converties par utils.cpu.uniforms_to_numpy
+        """
+        key = self.uniforms_key()
+        if key != self._uniforms_key:
+            self._uniforms = self.uniforms(self)
+            self._numpy_uniforms = None
+            self._uniforms_key = key
+        if not numpy:
+            return self._uniforms
+        if self._numpy_uniforms is None:
+            self._numpy_uniforms = uniforms_to_numpy(self._uniforms)
+        return self._numpy_uniforms
+
+    def setup_uniforms(self):
+        self.uniform_cache.upload(self.program, self.current_uniforms())
+        self.uniform_cache.upload(self.program, view_uniforms(self.resolution, self.view_rect))
+
+    def warp_tile(self):
+        """
+        Rééchantillonne le quadrilatère de la tuile dans la texture carrée warped_tile (cf. shaders/warp.glsl),
+        seulement si les sommets ont changé. L'état OpenGL (programme, VAO, framebuffer, vue) est rétabli ensuite.
+        """
+        key = tuple((p.x(), p.y()) for p in self.rescaled_corners)
+        if key == self._warped_key:
+            return
+        program = GL.glGetIntegerv(GL.GL_CURRENT_PROGRAM)
+        vao = GL.glGetIntegerv(GL.GL_VERTEX_ARRAY_BINDING)
+        framebuffer = GL.glGetIntegerv(GL.GL_FRAMEBUFFER_BINDING)
+        viewport = GL.glGetIntegerv(GL.GL_VIEWPORT)
+        blend = GL.glIsEnabled(GL.GL_BLEND)
+
+        fbo = GL.glGenFramebuffers(1)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, fbo)
+        GL.glFramebufferTexture2D(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0, GL.GL_TEXTURE_2D, self.warped_tile, 0)
+        GL.glViewport(0, 0, self.warped_tile_size, self.warped_tile_size)
+        GL.glDisable(GL.GL_BLEND)
+
+        GL.glBindVertexArray(self.vao)
+        self.warp_program.bind()
+        position_attr = self.warp_program.attributeLocation("in_vert")
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        self.warp_program.enableAttributeArray(position_attr)
+        self.warp_program.setAttributeBuffer(position_attr, GL.GL_FLOAT, 0, 2, 0)
+        for i, corner in enumerate(self.rescaled_corners[0:4]):
+            set_uniform(self.warp_program, f"tileCorner{i}", corner)
+        for name, value in view_uniforms(QSize(self.warped_tile_size, self.warped_tile_size)).items():
+            set_uniform(self.warp_program, name, value)
+        self.warp_program.setUniformValue('tileTexture', 0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glDrawArrays(GL.GL_TRIANGLES, 0, 6)
+        GL.glDisableVertexAttribArray(position_attr)
+
+        GL.glUseProgram(program)
+        GL.glBindVertexArray(vao)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, framebuffer)
+        GL.glDeleteFramebuffers(1, [fbo])
+        GL.glViewport(*viewport)
+        if blend:
+            GL.glEnable(GL.GL_BLEND)
+        self._warped_key = key
+
+    def bind_tile_texture(self, program: QOpenGLShaderProgram):
+        """
+        Lie la texture de la tuile à l'unité 0 pour le programme (qui doit être lié) :
+        la tuile redressée si WARPED_TILE, sinon l'image de départ.
+        Les exports échantillonnent toujours l'image de départ, sans passer par le rééchantillonnage de warped_tile.
+        """
+        program.setUniformValue('tileTexture', 0)
+        if not self.WARPED_TILE or self.export_resolution is not None:
+            if self.WARPED_TILE:
+                program.setUniformValue('warped', 0)
+            GL.glActiveTexture(GL.GL_TEXTURE0)
+            GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+            return
+        self.warp_tile()
+        program.setUniformValue('warped', 1)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.warped_tile)
+
+    def frame_key(self):
+        """
+        Clé de l'image dessinée par paint_tiling dans la fenêtre : état des uniformes et variante du programme.
+        Les classes dérivées y ajoutent ce qui change l'image sans changer les uniformes (rendu par maillage, etc.).
+        """
+        return self.uniforms_key(), state_key(sorted(self.shader_defines(self).items()))
+
     def paintGL(self):
-        """ Effectue le rendu OpenGL du pavage. """
+        """
+        Dessine le pavage dans frame_buffer, puis le recopie dans le framebuffer du widget.
+        Tant que frame_key et la taille du widget ne changent pas (fenêtre déplacée ou découverte, dialogue
+        par-dessus, redimensionnement à la même taille), l'image précédente est recopiée sans rien recalculer.
+        """
+        ratio = self.devicePixelRatioF()
+        w, h = round(self.width() * ratio), round(self.height() * ratio)
+        if self.frame_buffer is None or self.frame_buffer.size() != QSize(w, h):
+            # même format que le framebuffer du widget (échantillons compris), pour pouvoir le recopier
+            frame_format = QOpenGLFramebufferObjectFormat()
+            frame_format.setSamples(max(self.format().samples(), 0))
+            frame_format.setInternalTextureFormat(self.textureFormat() or GL.GL_RGBA8)
+            self.frame_buffer = QOpenGLFramebufferObject(QSize(w, h), frame_format)
+            self._frame_key = None
+
+        key = self.frame_key()
+        if key != self._frame_key:
+            self.frame_buffer.bind()
+            GL.glViewport(0, 0, w, h)
+            self.paint_tiling()
+            self._frame_key = key
+
+        GL.glBindFramebuffer(GL.GL_READ_FRAMEBUFFER, self.frame_buffer.handle())
+        GL.glBindFramebuffer(GL.GL_DRAW_FRAMEBUFFER, self.defaultFramebufferObject())
+        GL.glBlitFramebuffer(0, 0, w, h, 0, 0, w, h, GL.GL_COLOR_BUFFER_BIT, GL.GL_NEAREST)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, self.defaultFramebufferObject())
+
+    def paint_tiling(self):
+        """ Effectue le rendu OpenGL du pavage dans le framebuffer lié. """
         GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        self.update_program()
         self.program.bind()
         position_attr = self.program.attributeLocation("in_vert")
         GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
@@ -120,12 +454,245 @@ class TilingDrawing(QOpenGLWidget):
 
         self.setup_uniforms()
 
-        self.program.setUniformValue('tileTexture', 0)
-        self.texture.bind()
+        self.bind_tile_texture(self.program)
         GL.glDrawArrays(GL.GL_TRIANGLES, 0, 6)
         GL.glDisableVertexAttribArray(position_attr)
         self.program.release()
 
+    def render_rects(self, size: QSize, rects: Iterable[QRect], tile_size: QSize) -> Iterator[Tuple[QRect, ndarray]]:
+        """
+        Dessine hors écran les parties rects (d'au plus tile_size pixels) de l'image de taille size,
+        en renvoyant au fur et à mesure les pixels RGBA de chacune d'elles, de haut en bas.
+        """
+        self.makeCurrent()
+        fbo = create_framebuffer(tile_size)
+
+        # Sans mélange, la transparence calculée par le shader est conservée dans l'image
+        blend = GL.glIsEnabled(GL.GL_BLEND)
+        GL.glDisable(GL.GL_BLEND)
+        self.export_resolution = size
+        fbo.bind()
+        try:
+            for rect in rects:
+                self.view_rect = rect
+                GL.glViewport(0, 0, rect.width(), rect.height())
+                self.paint_tiling()
+                yield rect, read_pixels(rect.size())
+        finally:
+            self.export_resolution = None
+            self.view_rect = None
+            if blend:
+                GL.glEnable(GL.GL_BLEND)
+            fbo.release()
+            self.doneCurrent()
+
+    def render_tiles(self, size: QSize, write: Callable[[ndarray], None]):
+        """
+        Dessine le pavage hors écran à la taille donnée, morceau par morceau,
+        ce qui permet de dépasser la taille maximale d'une texture.
+        Chaque bande de morceaux (toute la largeur de l'image) est transmise à write
+        sous la forme d'un tableau de pixels RGBA, de haut en bas. La hauteur des bandes est réduite
+        pour les images très larges, de sorte qu'une bande ne dépasse pas EXPORT_BAND_BYTES octets
+        (64 lignes pour une image de 65536 pixels de large), quelle que soit la largeur de l'image.
+        """
+        w, h = size.width(), size.height()
+        band_h = max(1, min(EXPORT_TILE_SIZE, EXPORT_BAND_BYTES // (4 * w)))
+        tile_w, tile_h = min(EXPORT_TILE_SIZE, w), min(band_h, h)
+        rects = (QRect(x, y, min(tile_w, w - x), min(tile_h, h - y))
+                 for y in range(0, h, tile_h) for x in range(0, w, tile_w))
+
+        band = None
+        for rect, pixels in self.render_rects(size, rects, QSize(tile_w, tile_h)):
+            if rect.x() == 0:
+                band = empty((rect.height(), w, 4), dtype=uint8)
+            band[:, rect.x():rect.x() + rect.width()] = pixels
+            if rect.x() + rect.width() == w:
+                write(band)
+
+    def export_pyramid(self, size: QSize, file_path: str):
+        """
+        Enregistre le pavage sous la forme d'une pyramide DeepZoom (manifeste .dzi et tuiles PNG).
+        Chaque niveau est dessiné directement à sa propre taille,
+        et seules les tuiles rencontrant la partie dessinée (DISC_RADIUS) sont générées.
+        """
+        write_manifest(file_path, size)
+        tile = QSize(DEEPZOOM_TILE_SIZE, DEEPZOOM_TILE_SIZE)
+        for level in range(level_count(size)):
+            current_size = level_size(size, level)
+            rects = (rect for rect in tile_rects(current_size)
+                     if intersects_disc(rect, current_size, self.DISC_RADIUS))
+            for rect, pixels in self.render_rects(current_size, rects, tile):
+                path = tile_path(file_path, level, rect)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if not to_qimage(pixels).save(path):
+                    raise Exception(f"Unable to save the picture {path}")
+
+    def render_image(self, size: QSize) -> QImage:
+        """
+        Dessine le pavage hors écran à la taille donnée,
+        indépendamment de la taille du widget et des fenêtres qui le recouvrent.
+        """
+        bands = []
+        self.render_tiles(size, bands.append)
+        return to_qimage(concatenate(bands))
+
+    def export(self, size: QSize, file_path: str):
+        """
+        Enregistre le pavage dessiné à la taille donnée (image ou pyramide DeepZoom selon l'extension).
+        Les images PNG et TIFF sont écrites au fur et à mesure, bande par bande (cf. render_tiles),
+        sans jamais être entièrement en mémoire.
+        """
+        if file_path.lower().endswith('.dzi'):
+            self.export_pyramid(size, file_path)
+        elif file_path.lower().endswith(('.png', '.tif', '.tiff')):
+            with open_image_writer(file_path, size.width(), size.height()) as writer:
+                self.render_tiles(size, writer.write)
+        elif not self.render_image(size).save(file_path):
+            raise Exception(f"Unable to save the picture {file_path}")
+
+    def render_animation(self, size: QSize, frames: Iterator[None], write: Callable[[ndarray], None]):
+        """
+        Dessine hors écran une image de taille size à chaque étape de frames,
+        un générateur qui modifie l'état du pavage avant chaque image (et le rétablit à la fin).
+        Les pixels sont relus de façon asynchrone (deux pixel buffer objects) :
+        l'image i est relue pendant que l'image i + 1 est dessinée.
+        Chaque image est transmise à write sous la forme d'un tableau de pixels RGBA, de haut en bas.
+        """
+        self.makeCurrent()
+        fbo = create_framebuffer(size)
+        reader = PixelBufferReader(size)
+
+        # Sans mélange, la transparence calculée par le shader est conservée dans l'image
+        blend = GL.glIsEnabled(GL.GL_BLEND)
+        GL.glDisable(GL.GL_BLEND)
+        self.export_resolution = size
+        fbo.bind()
+        try:
+            GL.glViewport(0, 0, size.width(), size.height())
+            for _ in frames:
+                self.paint_tiling()
+                pixels = reader.read()
+                if pixels is not None:
+                    write(pixels)
+            pixels = reader.flush()
+            if pixels is not None:
+                write(pixels)
+        finally:
+            frames.close()
+            reader.close()
+            self.export_resolution = None
+            if blend:
+                GL.glEnable(GL.GL_BLEND)
+            fbo.release()
+            self.doneCurrent()
+
+    def export_animation(self, size: QSize, frames: Iterator[None], frame_count: int, file_path: str,
+                         animated: bool = True):
+        """
+        Enregistre l'animation décrite par frames (cf. render_animation), de frame_count images,
+        sous la forme d'un PNG animé (APNG) ou d'une suite d'images PNG (nom_0000.png, nom_0001.png...).
+        Les images sont encodées par un ensemble de threads pendant que les suivantes sont dessinées.
+        """
+        workers = os.cpu_count() or 1
+        pending = deque()
+        base, _ = os.path.splitext(file_path)
+
+        with ThreadPoolExecutor(workers) as pool:
+            if animated:
+                with ApngWriter(file_path, size.width(), size.height(), frame_count, ANIMATION_FPS) as writer:
+                    def write(pixels: ndarray):
+                        pending.append(pool.submit(encode_rows, pixels))
+                        # les images sont écrites dans l'ordre, dès que leur encodage est terminé
+                        while pending and (pending[0].done() or len(pending) > ANIMATION_QUEUE_FACTOR * workers):
+                            writer.write_frame(pending.popleft().result())
+
+                    self.render_animation(size, frames, write)
+                    while pending:
+                        writer.write_frame(pending.popleft().result())
+            else:
+                def write(pixels: ndarray):
+                    pending.append(pool.submit(write_png, f"{base}_{write.index:04d}.png", pixels))
+                    write.index += 1
+                    while pending and (pending[0].done() or len(pending) > ANIMATION_QUEUE_FACTOR * workers):
+                        pending.popleft().result()
+
+                write.index = 0
+                self.render_animation(size, frames, write)
+                while pending:
+                    pending.popleft().result()
+
+
+class TilingState:
+    """
+    État d'un pavage indépendant de tout widget.
+    Il expose les mêmes attributs que TilingDrawing (sommets, résolution, options),
+    ce qui permet d'appeler TilingDrawing.uniforms sans créer de fenêtre.
+    """
+
+    def __init__(self, drawing_cls, img_size: QSize, corners: List[QPointF], resolution: QSize, **options):
+        unknown = set(options) - set(drawing_cls.DEFAULTS)
+        if unknown:
+            raise Exception(f"Unknown options for this tiling: {', '.join(sorted(unknown))}")
+
+        self.img_size = img_size
+        self.corners = corners
+        self.rescaled_corners = rescale_corners(corners, img_size)
+        self.resolution = resolution
+        for key, value in drawing_cls.DEFAULTS.items():
+            setattr(self, key, options.get(key, value))
+
+
+class ExportDialog(QDialog):
+    """ Fenêtre de choix de la taille de l'image exportée. """
+
+    def __init__(self, parent: 'Tiling'):
+        super(ExportDialog, self).__init__(parent)
+        self.setWindowTitle("Exporter l'image")
+
+        self.layout = QFormLayout()
+        self.setLayout(self.layout)
+
+        self.width_box = QSpinBox()
+        self.width_box.setRange(1, EXPORT_SIZE_MAX)
+        self.width_box.setValue(parent.resolution.width())
+        self.layout.addRow("Largeur (pixels)", self.width_box)
+
+        self.height_box = QSpinBox()
+        self.height_box.setRange(1, EXPORT_SIZE_MAX)
+        self.height_box.setValue(parent.resolution.height())
+        self.layout.addRow("Hauteur (pixels)", self.height_box)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        self.layout.addRow(buttons)
+
+    def export_size(self) -> QSize:
+        return QSize(self.width_box.value(), self.height_box.value())
+
+
+class AnimationExportDialog(ExportDialog):
+    """ Fenêtre de choix de la taille, du nombre d'images et du format de l'animation exportée. """
+
+    def __init__(self, parent: 'Tiling'):
+        super(AnimationExportDialog, self).__init__(parent)
+        self.setWindowTitle("Exporter l'animation")
+
+        self.frames_box = QSpinBox()
+        self.frames_box.setRange(1, ANIMATION_FRAMES_MAX)
+        self.frames_box.setValue(ANIMATION_FRAMES_DEFAULT)
+        self.layout.insertRow(2, "Nombre d'images", self.frames_box)
+
+        self.format_box = QComboBox()
+        self.format_box.addItems(["PNG animé", "Séquence d'images PNG"])
+        self.layout.insertRow(3, "Format", self.format_box)
+
+    def frame_count(self) -> int:
+        return self.frames_box.value()
+
+    def animated(self) -> bool:
+        return self.format_box.currentIndex() == 0
+
 
 class Tiling(QWidget):
     """
@@ -138,6 +705,8 @@ class Tiling(QWidget):
     KIND = 'Abstract Tiling Class'
     DRAWING_CLASS = TilingDrawing
     OPTIONS_CLASS = TilingOptions
+    # Fenêtre de choix des paramètres de l'animation exportée (None : pas d'export d'animation)
+    ANIMATION_DIALOG_CLASS = None
 
     def __init__(self, path, img_size: QSize, corners: List[QPointF], resolution=None):
         super().__init__()
@@ -156,25 +725,67 @@ class Tiling(QWidget):
         self.layout.addWidget(self.drawing)
         self.layout.addWidget(self.options)
         self.layout.addWidget(self.export_button)
+
+        if self.ANIMATION_DIALOG_CLASS is not None:
+            self.export_animation_button = QPushButton("Exporter l'animation", self)
+            self.export_animation_button.clicked.connect(self.export_animation)
+            self.layout.addWidget(self.export_animation_button)
         
     def export_image(self):
         """
-        Capture l'image du pavage et l'enregistre sous forme d'image.
-        """ 
+        Dessine le pavage hors écran à la taille choisie et l'enregistre sous forme d'image.
+        """
+        dialog = ExportDialog(self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+        size = dialog.export_size()
+
         root = tk.Tk()
         root.withdraw()  # Masquer la fenêtre principale Tkinter
         file_path = filedialog.asksaveasfilename(
             defaultextension=".png",
-            filetypes=[("Images PNG", "*.png"), ("Images JPG", "*.jpg")],
+            filetypes=[("Images PNG", "*.png"), ("Images TIFF", "*.tif"), ("Images JPG", "*.jpg"),
+                       ("Pyramide DeepZoom", "*.dzi")],
             title="Exporter l'image")
 
         if not file_path:  # Si l'utilisateur annule
             return
-        
-        screen = self.drawing.window().screen()
-        pixmap = screen.grabWindow(self.drawing.winId())
 
-        pixmap.save(file_path)
+        try:
+            self.drawing.export(size, file_path)
+        except Exception as error:
+            print(f"⚠️ Impossible d'enregistrer l'image {file_path} : {error}")
+
+    def animation_frames(self, dialog: AnimationExportDialog) -> Iterator[None]:
+        """
+        Générateur modifiant l'état du pavage avant chaque image de l'animation choisie dans dialog
+        (cf. TilingDrawing.render_animation).
+        """
+        raise Exception("This method must be implemented by subclasses")
+
+    def export_animation(self):
+        """
+        Dessine hors écran l'animation avec le nombre d'images choisi et l'enregistre.
+        """
+        dialog = self.ANIMATION_DIALOG_CLASS(self)
+        if dialog.exec() != QDialog.Accepted:
+            return
+
+        root = tk.Tk()
+        root.withdraw()  # Masquer la fenêtre principale Tkinter
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".png",
+            filetypes=[("Images PNG", "*.png")],
+            title="Exporter l'animation")
+
+        if not file_path:  # Si l'utilisateur annule
+            return
+
+        try:
+            self.drawing.export_animation(dialog.export_size(), self.animation_frames(dialog), dialog.frame_count(),
+                                          file_path, dialog.animated())
+        except Exception as error:
+            print(f"⚠️ Impossible d'enregistrer l'animation {file_path} : {error}")
 
     def reset_tiling(self, new_corners):
         """
@@ -195,10 +806,7 @@ class Tiling(QWidget):
             self.drawing.doneCurrent()
 
         self.drawing.corners = new_corners
-        self.drawing.rescaled_corners = [
-            QPointF(p.x() / self.drawing.img_size.width(), p.y() / self.drawing.img_size.height())
-            for p in new_corners
-        ]
+        self.drawing.rescaled_corners = rescale_corners(new_corners, self.drawing.img_size)
         self.drawing.update()
 
     def closeEvent(self, event):
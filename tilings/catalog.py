@@ -0,0 +1,67 @@
+from typing import Type
+
+from tilings.abstract.tiling import Tiling as AbstractTiling
+
+from tilings.spherical.s34.tiling import Tiling as SphTiling34
+from tilings.spherical.s43.tiling import Tiling as SphTiling43
+from tilings.spherical.s33.tiling import Tiling as SphTiling33
+from tilings.spherical.s35.tiling import Tiling as SphTiling35
+from tilings.spherical.s53.tiling import Tiling as SphTiling53
+
+from tilings.euclidean.cm.tiling import Tiling as EucTilingCM
+from tilings.euclidean.cmm.tiling import Tiling as EucTilingCMM
+from tilings.euclidean.p1.tiling import Tiling as EucTilingP1
+from tilings.euclidean.p2.tiling import Tiling as EucTilingP2
+from tilings.euclidean.p3.tiling import Tiling as EucTilingP3
+from tilings.euclidean.p3m1.tiling import Tiling as EucTilingP3M1
+from tilings.euclidean.p4.tiling import Tiling as EucTilingP4
+from tilings.euclidean.p4g.tiling import Tiling as EucTilingP4G
+from tilings.euclidean.p4m.tiling import Tiling as EucTilingP4M
+from tilings.euclidean.p6.tiling import Tiling as EucTilingP6
+from tilings.euclidean.p6m.tiling import Tiling as EucTilingP6M
+from tilings.euclidean.p31m.tiling import Tiling as EucTilingP31M
+from tilings.euclidean.pg.tiling import Tiling as EucTilingPG
+from tilings.euclidean.pgg.tiling import Tiling as EucTilingPGG
+from tilings.euclidean.pm.tiling import Tiling as EucTilingPM
+from tilings.euclidean.pmg.tiling import Tiling as EucTilingPMG
+from tilings.euclidean.pmm.tiling import Tiling as EucTilingPMM
+
+from tilings.hyperbolic.s46.tiling import Tiling as HypTiling46
+
+# Tous les pavages disponibles, dans l'ordre des menus de l'application
+TILINGS = [
+    SphTiling34,
+    SphTiling43,
+    SphTiling33,
+    SphTiling35,
+    SphTiling53,
+    EucTilingP1,
+    EucTilingP2,
+    EucTilingPM,
+    EucTilingPG,
+    EucTilingCM,
+    EucTilingPMM,
+    EucTilingPMG,
+    EucTilingPGG,
+    EucTilingCMM,
+    EucTilingP4,
+    EucTilingP4M,
+    EucTilingP4G,
+    EucTilingP3,
+    EucTilingP3M1,
+    EucTilingP31M,
+    EucTilingP6,
+    EucTilingP6M,
+    HypTiling46,
+]
+
+
+def find_tiling(code: str) -> Type[AbstractTiling]:
+    """
+    Retrouve la classe d'un pavage à partir de son code,
+    complet ('p4m (*442)') ou abrégé ('p4m', '{4,6}').
+    """
+    for tiling_cls in TILINGS:
+        if code in (tiling_cls.CODE, tiling_cls.CODE.split(' ')[0]):
+            return tiling_cls
+    raise Exception(f"Unknown tiling: {code}")
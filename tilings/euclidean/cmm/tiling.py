@@ -1,4 +1,4 @@
-from PySide6.QtGui import QMatrix3x3, QVector2D
+from PySide6.QtGui import QVector2D
 from numpy import array
 from numpy.linalg import inv
 
@@ -6,22 +6,45 @@ from tilings.euclidean.tiling import SHAPE_KEY_PARALLELOGRAM
 from tilings.euclidean.tiling import Tiling as AbstractTiling
 from tilings.euclidean.tiling import TilingDrawing as AbstractTilingDrawing
 from tilings.euclidean.tiling import TilingOptions as AbstractTilingOptions
+from tilings.euclidean.tiling import similarity
+from utils.cpu import mat3
 from utils.quandrangles import reflect
 from utils.triangles import apex_permutation_angle
 from utils.path_helper import get_resource_path
 
+TEST_S1 = array([1, 1, -1])
+SYM1 = mat3(
+    0, -1, 0,
+    -1, 0, 0,
+    1, 1, 1
+)
+
+TEST_S2 = array([-1, 1, 0])
+SYM2 = mat3(
+    0, 1, 0,
+    1, 0, 0,
+    0, 0, 1
+)
+
+TEX = mat3(
+    -1, 1, 0,
+    -1, -1, 0,
+    1, 0, 1
+)
+
+
 class TilingDrawing(AbstractTilingDrawing):
     FRAGMENT_SHADER = get_resource_path("tilings/euclidean/cmm/fragment.glsl")
+    DEFAULTS = dict(AbstractTilingDrawing.DEFAULTS, shape=SHAPE_KEY_PARALLELOGRAM)
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super(TilingDrawing, self).__init__(parent, path, img_size, corners)
 
-        self._shape = SHAPE_KEY_PARALLELOGRAM
-
-    def setup_uniforms(self):
-        sigma = apex_permutation_angle(tuple(self.corners))
-        v1 = QVector2D(self.corners[sigma[1]] - self.corners[sigma[0]])
-        v2 = QVector2D(self.corners[sigma[2]] - self.corners[sigma[0]])
+    @classmethod
+    def uniforms(cls, state):
+        sigma = apex_permutation_angle(tuple(state.corners))
+        v1 = QVector2D(state.corners[sigma[1]] - state.corners[sigma[0]])
+        v2 = QVector2D(state.corners[sigma[2]] - state.corners[sigma[0]])
 
         v1 = reflect(v1)
         v2 = reflect(v2)
@@ -31,7 +54,6 @@ class TilingDrawing(AbstractTilingDrawing):
         u1 = u1 / u1.length()
         u2 = u2 / u2.length()
 
-        self.program.setUniformValue("resolution", self.parent().resolution)
         morph = array([
             [u1.x(), u2.x(), 0],
             [u1.y(), u2.y(), 0],
@@ -40,12 +62,22 @@ class TilingDrawing(AbstractTilingDrawing):
 
         morph_inv = inv(morph)
 
-        self.program.setUniformValue("morphInv", QMatrix3x3(morph_inv.flatten()))
-        self.program.setUniformValue("similarity", QMatrix3x3(self.similarity().flatten()))
-
-        self.program.setUniformValue("tileCorner0", self.rescaled_corners[sigma[0]])
-        self.program.setUniformValue("tileCorner1", self.rescaled_corners[sigma[1]])
-        self.program.setUniformValue("tileCorner2", self.rescaled_corners[sigma[2]])
+        return {
+            "resolution": state.resolution,
+            "morphInv": morph_inv,
+            "similarity": similarity(state.scale, state.angle, state.offset),
+            "tileCorner0": state.rescaled_corners[sigma[0]],
+            "tileCorner1": state.rescaled_corners[sigma[1]],
+            "tileCorner2": state.rescaled_corners[sigma[2]]
+        }
+
+    @classmethod
+    def fold_steps(cls, uniforms):
+        return [
+            (((TEST_S1, 1),), SYM1),
+            (((TEST_S2, 1),), SYM2),
+            ((), TEX)
+        ]
 
 
 class TilingOptions(AbstractTilingOptions):
@@ -0,0 +1,80 @@
+"""
+Rendu des pavages euclidiens avec NumPy, sans contexte OpenGL.
+Chaque groupe fournit le pendant NumPy de sa fonction domainCoords (TilingDrawing.fold_steps),
+les uniformes étant calculés par TilingDrawing.uniforms, comme pour le rendu OpenGL.
+"""
+from typing import Optional
+
+from numpy import ndarray, ones, where, mod, arange, meshgrid, stack, float32
+
+from tilings.abstract.tiling import TilingState
+from utils.cpu import uniforms_to_numpy, load_texture, sample, tile_coords, screen_coords, homogeneous, to_pixels, \
+    render_bands
+
+
+def fold(p: ndarray, steps: list) -> ndarray:
+    """
+    Apply the steps returned by TilingDrawing.fold_steps to the points p (array of shape (n, 3))
+    """
+    for conditions, matrix in steps:
+        mask = ones(p.shape[0], dtype=bool)
+        for test, sign in conditions:
+            mask &= sign * (p @ test) > 0.
+        p = where(mask[:, None], p @ matrix.transpose(), p)
+    return p
+
+
+def cell_coords(drawing_cls, uniforms: dict, v: ndarray) -> ndarray:
+    """
+    Coordinates in the unit cell of the lattice of the points v of the screen (cf. main of the fragment shaders)
+    """
+    resolution = uniforms["resolution"]
+    q = homogeneous(v * (resolution / resolution[1])) @ uniforms["similarity"].transpose()
+    p = q @ drawing_cls.lattice(uniforms).transpose()
+    p[:, 0:2] = mod(p[:, 0:2], 1.)
+    p[:, 2] = 1.
+    return p
+
+
+def domain_coords(drawing_cls, uniforms: dict, p: ndarray) -> ndarray:
+    """
+    Coordinates in the tile of the points p of the unit cell
+    """
+    return fold(p, drawing_cls.fold_steps(uniforms))[:, 0:2]
+
+
+def fold_table(drawing_cls, uniforms: dict, size: int) -> ndarray:
+    """
+    Coordinates in the texture of the centers of a grid of size x size cells covering the unit cell,
+    i.e. the whole work of the fragment shader after the reduction modulo the lattice
+    :return: array of shape (size, size, 2), the row j being at the height (j + 0.5) / size of the unit cell
+    """
+    s = (arange(size) + 0.5) / size
+    x, y = meshgrid(s, s)
+    p = homogeneous(stack([x.ravel(), y.ravel()], axis=1))
+    coords = tile_coords(domain_coords(drawing_cls, uniforms, p), uniforms)
+    return coords.reshape(size, size, 2).astype(float32)
+
+
+def render_band(context, start: int, stop: int) -> ndarray:
+    drawing_cls, uniforms, texture = context
+    v = screen_coords(uniforms["resolution"], start, stop)
+    p = cell_coords(drawing_cls, uniforms, v)
+    coords = tile_coords(domain_coords(drawing_cls, uniforms, p), uniforms)
+    colors = sample(texture, coords)[:, 0:3]
+    return to_pixels(colors, int(uniforms["resolution"][0]))
+
+
+def render(tiling_cls, image, state: TilingState, processes: Optional[int] = None) -> ndarray:
+    """
+    Rendu d'un pavage euclidien sur le processeur.
+    :param tiling_cls: la classe du pavage (par exemple tilings.euclidean.p1.tiling.Tiling)
+    :param image: chemin ou QImage de la tuile
+    :param state: état du pavage (sommets, résolution, options)
+    :param processes: nombre de processus utilisés (tous les cœurs par défaut)
+    :return: tableau de pixels RGBA de forme (hauteur, largeur, 4)
+    """
+    drawing_cls = tiling_cls.DRAWING_CLASS
+    uniforms = uniforms_to_numpy(drawing_cls.uniforms(state))
+    texture = load_texture(image)
+    return render_bands(render_band, (drawing_cls, uniforms, texture), state.resolution, processes)
@@ -0,0 +1,24 @@
+#version 410 core
+
+in vec2 v_text;
+out vec4 f_color;
+
+uniform vec2 resolution;
+
+uniform mat3 similarity;
+// matrix sending the plane to the coordinates in the lattice (morphInv, or the constant of the fragment shader)
+uniform mat3 cellLattice;
+
+uniform sampler2D tileTexture;
+// coordinates in the tile texture of the points of the unit cell, baked by tilings/euclidean/cpu.py
+uniform sampler2D foldTable;
+
+
+void main() {
+    vec3 q = vec3(v_text * (resolution / resolution.y), 1);
+    q = similarity * q;
+    vec2 p = mod((cellLattice * q).xy, 1.0);
+    vec2 coords = texture(foldTable, p).xy;
+    vec3 color = texture(tileTexture, coords).rgb;
+    f_color = vec4(color, 1);
+}
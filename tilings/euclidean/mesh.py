@@ -0,0 +1,137 @@
+"""
+Géométrie des pavages euclidiens dessinés sous forme de maillages :
+la maille du réseau est découpée en polygones convexes sur lesquels domainCoords est affine
+(un polygone par combinaison des branches de TilingDrawing.fold_steps),
+puis chaque maille visible est dessinée comme une instance de ce maillage.
+"""
+from math import floor, ceil
+
+from numpy import ndarray, array, identity, concatenate, roll, float32, uint32, linalg
+
+from utils.cpu import tile_coords
+
+# Number of subdivisions of each side of the triangles of the cell
+# (the coordinates in the texture of quadrilateral tiles are interpolated between the vertices)
+# The error of this interpolation decreases as the square of the subdivisions: with 8 subdivisions, it is about
+# 6e-4 in the texture for a tile far from a parallelogram, i.e. 0.13 texel for a tile of 200 pixels
+# (no error for triangular tiles, whose coordinates are affine)
+MESH_SUBDIVISIONS = 8
+# Area under which a piece of the cell is ignored
+MIN_AREA = 1e-9
+
+
+def clip(polygon: ndarray, h: ndarray) -> ndarray:
+    """
+    Part of the convex polygon where dot(p, h) > 0 (Sutherland-Hodgman)
+    :param polygon: array of shape (n, 3), vertices in homogeneous coordinates
+    :return: array of shape (m, 3), possibly empty
+    """
+    values = polygon @ h
+    points = []
+    for i in range(len(polygon)):
+        a, b = polygon[i], polygon[(i + 1) % len(polygon)]
+        va, vb = values[i], values[(i + 1) % len(polygon)]
+        if va > 0:
+            points.append(a)
+        if (va > 0) != (vb > 0):
+            points.append(a + va / (va - vb) * (b - a))
+    return array(points).reshape(-1, 3)
+
+
+def area(polygon: ndarray) -> float:
+    """
+    Area of a polygon of the cell (shoelace formula)
+    """
+    x, y = polygon[:, 0], polygon[:, 1]
+    return 0.5 * abs((x * roll(y, -1) - roll(x, -1) * y).sum())
+
+
+def cell_pieces(steps: list) -> list:
+    """
+    Split the unit cell according to the branches taken by the steps of TilingDrawing.fold_steps
+    :return: list of pairs (polygon, matrix), the polygon being an array of shape (n, 3) in cell coordinates
+        and the matrix sending its points to the coordinates in the tile
+    """
+    square = array([[0., 0., 1.], [1., 0., 1.], [1., 1., 1.], [0., 1., 1.]])
+    pieces = [(square, identity(3))]
+    for conditions, matrix in steps:
+        split = []
+        for polygon, fold in pieces:
+            # conditions on the point already folded, i.e. on the point of the cell
+            tests = [sign * (fold.transpose() @ test) for test, sign in conditions]
+            taken = polygon
+            for h in tests:
+                taken = clip(taken, h)
+            if len(taken) >= 3 and area(taken) > MIN_AREA:
+                split.append((taken, matrix @ fold))
+            # complement of a conjunction: not h0, or h0 and not h1, etc.
+            rest = polygon
+            for h in tests:
+                outside = clip(rest, -h)
+                if len(outside) >= 3 and area(outside) > MIN_AREA:
+                    split.append((outside, fold))
+                rest = clip(rest, h)
+                if len(rest) < 3:
+                    break
+        pieces = split
+    return pieces
+
+
+def cell_mesh(uniforms: dict, steps: list, subdivisions: int = MESH_SUBDIVISIONS):
+    """
+    Subdivided mesh of the unit cell, the coordinates in the texture being computed at each vertex
+    :return: the vertices, array of shape (n, 4) (point of the cell, coordinates in the texture),
+        and the indices of the triangles, array of shape (m, 3)
+    """
+    n = subdivisions + 1
+    points = []
+    folds = []
+    triangles = []
+    for polygon, fold in cell_pieces(steps):
+        # fan of triangles (vertex 0, vertex i, vertex i + 1), each one having rows of decreasing length
+        for k in range(1, len(polygon) - 1):
+            c0, c1, c2 = polygon[0], polygon[k], polygon[k + 1]
+            if area(array([c0, c1, c2])) <= MIN_AREA:
+                continue
+            starts = []
+            for j in range(n):
+                starts.append(len(points))
+                for i in range(n - j):
+                    a, b = i / subdivisions, j / subdivisions
+                    points.append((1. - a - b) * c0 + a * c1 + b * c2)
+                    folds.append(fold)
+            for j in range(subdivisions):
+                for i in range(subdivisions - j):
+                    index, above = starts[j] + i, starts[j + 1] + i
+                    triangles.append([index, index + 1, above])
+                    if i < subdivisions - j - 1:
+                        triangles.append([index + 1, above + 1, above])
+
+    points = array(points)
+    domain = (array(folds) @ points[:, :, None])[:, 0:2, 0]
+    vertices = concatenate([points[:, 0:2], tile_coords(domain, uniforms)], axis=1)
+    return vertices.astype(float32), array(triangles, dtype=uint32)
+
+
+def cell_copies(uniforms: dict, lattice: ndarray, view: dict) -> ndarray:
+    """
+    Matrices sending the unit cell to each cell of the lattice meeting the viewport
+    :param lattice: matrix sending the plane to the coordinates in the lattice (cf. TilingDrawing.lattice)
+    :param view: viewOffset and viewScale of the viewport (cf. view_uniforms)
+    :return: array of shape (n, 3, 3), sending the points of the cell to v_text * (resolution / resolution.y)
+    """
+    resolution = uniforms["resolution"]
+    offset, scale = view["viewOffset"], view["viewScale"]
+    corners = array([[offset[0] + sx * scale[0], offset[1] + sy * scale[1], 1.]
+                     for sx in (-1, 1) for sy in (-1, 1)])
+    corners[:, 0:2] *= resolution / resolution[1]
+    to_cell = lattice @ uniforms["similarity"]
+    cells = corners @ to_cell.transpose()
+
+    to_screen = linalg.inv(to_cell)
+    copies = []
+    for i in range(floor(cells[:, 0].min()), ceil(cells[:, 0].max())):
+        for j in range(floor(cells[:, 1].min()), ceil(cells[:, 1].max())):
+            translation = array([[1., 0., i], [0., 1., j], [0., 0., 1.]])
+            copies.append(to_screen @ translation)
+    return array(copies).reshape(-1, 3, 3)
@@ -0,0 +1,10 @@
+#version 410 core
+
+in vec2 v_coords;
+out vec4 f_color;
+
+uniform sampler2D tileTexture;
+
+void main() {
+    f_color = vec4(texture(tileTexture, v_coords).rgb, 1);
+}
@@ -0,0 +1,22 @@
+#version 410 core
+// point of the unit cell of the lattice
+layout(location = 0) in vec2 in_cell;
+// coordinates of the point in the texture (cf. tilings/euclidean/mesh.py)
+layout(location = 1) in vec2 in_coords;
+// matrix sending the unit cell to the drawn cell of the lattice (one per instance)
+layout(location = 2) in mat3 in_copy;
+
+uniform vec2 resolution;
+// Part of the picture covered by the viewport (cf. shaders/vertex.glsl)
+uniform vec2 viewOffset;
+uniform vec2 viewScale;
+
+out vec2 v_coords;
+
+void main() {
+    vec3 q = in_copy * vec3(in_cell, 1.);
+    // inverse of the main of the fragment shaders
+    vec2 v = q.xy * (resolution.y / resolution);
+    gl_Position = vec4((v - viewOffset) / viewScale, 0.0, 1.0);
+    v_coords = in_coords;
+}
@@ -1,4 +1,3 @@
-from PySide6.QtGui import QMatrix3x3, QVector2D
 from numpy import array
 from numpy.linalg import inv
 
@@ -6,24 +5,20 @@ from tilings.euclidean.tiling import SHAPE_KEY_PARALLELOGRAM, SHAPE_KEY_RECTANGL
 from tilings.euclidean.tiling import Tiling as AbstractTiling
 from tilings.euclidean.tiling import TilingDrawing as AbstractTilingDrawing
 from tilings.euclidean.tiling import TilingOptions as AbstractTilingOptions
+from tilings.euclidean.tiling import similarity, translations, sides
 from utils.path_helper import get_resource_path
 
+
 class TilingDrawing(AbstractTilingDrawing):
     FRAGMENT_SHADER = get_resource_path("tilings/euclidean/p1/fragment.glsl")
+    DEFAULTS = dict(AbstractTilingDrawing.DEFAULTS, shape=SHAPE_KEY_PARALLELOGRAM)
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super(TilingDrawing, self).__init__(parent, path, img_size, corners)
 
-        self._shape = SHAPE_KEY_PARALLELOGRAM
-
-        self.v1 = QVector2D(self.corners[1] - self.corners[0])
-        self.v2 = QVector2D(self.corners[3] - self.corners[0])
-        self.v3 = QVector2D(self.corners[2] - self.corners[0])
-
-    def setup_uniforms(self):
-        u1, u2 = self.translations(self.v1, self.v2, self.v3)
-
-        self.program.setUniformValue("resolution", self.parent().resolution)
+    @classmethod
+    def uniforms(cls, state):
+        u1, u2 = translations(state.shape, *sides(state.corners))
 
         morph = array([
             [u1.x(), u2.x(), 0],
@@ -33,13 +28,19 @@ class TilingDrawing(AbstractTilingDrawing):
 
         morph_inv = inv(morph)
 
-        self.program.setUniformValue("morphInv", QMatrix3x3(morph_inv.flatten()))
-        self.program.setUniformValue("similarity", QMatrix3x3(self.similarity().flatten()))
-
-        self.program.setUniformValue("tileCorner0", self.rescaled_corners[0])
-        self.program.setUniformValue("tileCorner1", self.rescaled_corners[1])
-        self.program.setUniformValue("tileCorner2", self.rescaled_corners[2])
-        self.program.setUniformValue("tileCorner3", self.rescaled_corners[3])
+        return {
+            "resolution": state.resolution,
+            "morphInv": morph_inv,
+            "similarity": similarity(state.scale, state.angle, state.offset),
+            "tileCorner0": state.rescaled_corners[0],
+            "tileCorner1": state.rescaled_corners[1],
+            "tileCorner2": state.rescaled_corners[2],
+            "tileCorner3": state.rescaled_corners[3]
+        }
+
+    @classmethod
+    def fold_steps(cls, uniforms):
+        return []
 
 
 class TilingOptions(AbstractTilingOptions):
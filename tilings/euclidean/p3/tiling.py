@@ -1,25 +1,87 @@
-from PySide6.QtGui import QMatrix3x3
+from numpy import array, sqrt
 
 from tilings.euclidean.tiling import Tiling as AbstractTiling
 from tilings.euclidean.tiling import TilingDrawing as AbstractTilingDrawing
 from tilings.euclidean.tiling import TilingOptions as AbstractTilingOptions
+from tilings.euclidean.tiling import similarity
+from utils.cpu import mat3
 from utils.path_helper import get_resource_path
 
+TEST0 = array([1, 1, -1])
+
+TEST1P = array([-2, 1, 0])
+TEST1N = array([-1, 2, -1])
+TEST2P = array([2, -1, -1])
+TEST2N = array([1, -2, 0])
+
+A = sqrt(3.) / 3.
+MORPH_INV = mat3(
+    1, 1, 0,
+    -A, A, 0,
+    0, 0, 1
+)
+
+R1P = mat3(
+    0, 1, 0,
+    -1, -1, 0,
+    1, 1, 1
+)
+
+R1N = mat3(
+    -1, -1, 0,
+    1, 0, 0,
+    0, 1, 1
+)
+
+R2P = mat3(
+    0, 1, 0,
+    -1, -1, 0,
+    1, 0, 1
+)
+
+R2N = mat3(
+    -1, -1, 0,
+    1, 0, 0,
+    1, 1, 1
+)
+
+TEX = mat3(
+    2, -1, 0,
+    -1, 2, 0,
+    0, 0, 1
+)
+
+
 class TilingDrawing(AbstractTilingDrawing):
     FRAGMENT_SHADER = get_resource_path("tilings/euclidean/p3/fragment.glsl")
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super(TilingDrawing, self).__init__(parent, path, img_size, corners)
 
-    def setup_uniforms(self):
-        self.program.setUniformValue("resolution", self.parent().resolution)
+    @classmethod
+    def uniforms(cls, state):
+        return {
+            "resolution": state.resolution,
+            "similarity": similarity(state.scale, state.angle, state.offset),
+            "tileCorner0": state.rescaled_corners[0],
+            "tileCorner1": state.rescaled_corners[1],
+            "tileCorner2": state.rescaled_corners[2],
+            "tileCorner3": state.rescaled_corners[3]
+        }
 
-        self.program.setUniformValue("similarity", QMatrix3x3(self.similarity().flatten()))
+    @classmethod
+    def lattice(cls, uniforms):
+        return MORPH_INV
 
-        self.program.setUniformValue("tileCorner0", self.rescaled_corners[0])
-        self.program.setUniformValue("tileCorner1", self.rescaled_corners[1])
-        self.program.setUniformValue("tileCorner2", self.rescaled_corners[2])
-        self.program.setUniformValue("tileCorner3", self.rescaled_corners[3])
+    @classmethod
+    def fold_steps(cls, uniforms):
+        return [
+            (((TEST0, -1), (TEST1P, 1)), R1P),
+            (((TEST0, 1), (TEST1N, 1)), R1N),
+            (((TEST0, 1), (TEST2P, 1)), R2P),
+            (((TEST0, -1), (TEST2N, 1)), R2N),
+            ((), TEX)
+        ]
 
 
 class TilingOptions(AbstractTilingOptions):
@@ -52,9 +52,7 @@ vec2 domainCoords(vec3 p) {
     return p.xy;
 }
 
-vec2 tileCoords(vec2 p) {
-    return tileCorner0 + p.x * (tileCorner1 - tileCorner0) + p.y * (tileCorner2 - tileCorner0);
-}
+#include "triangle_tile.glsl"
 
 
 void main() {
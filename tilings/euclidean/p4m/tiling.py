@@ -1,26 +1,71 @@
-from PySide6.QtGui import QMatrix3x3
+from numpy import array, identity
 
 from tilings.euclidean.tiling import Tiling as AbstractTiling
 from tilings.euclidean.tiling import TilingDrawing as AbstractTilingDrawing
 from tilings.euclidean.tiling import TilingOptions as AbstractTilingOptions
+from tilings.euclidean.tiling import similarity
+from utils.cpu import mat3
 from utils.triangles import apex_permutation_angle
 from utils.path_helper import get_resource_path
 
+TEST_SX = array([2, 0, -1])
+TEST_SY = array([0, 2, -1])
+SX = mat3(
+    -1, 0, 0,
+    0, 1, 0,
+    1, 0, 1
+)
+
+SY = mat3(
+    1, 0, 0,
+    0, -1, 0,
+    0, 1, 1
+)
+
+TEST_SD = array([-1, 1, 0])
+SD = mat3(
+    0, 1, 0,
+    1, 0, 0,
+    0, 0, 1
+)
+
+TEX = mat3(
+    0, -2, 0,
+    2, 0, 0,
+    0, 1, 1
+)
+
+
 class TilingDrawing(AbstractTilingDrawing):
     FRAGMENT_SHADER = get_resource_path("tilings/euclidean/p4m/fragment.glsl")
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super(TilingDrawing, self).__init__(parent, path, img_size, corners)
 
-    def setup_uniforms(self):
-        sigma = apex_permutation_angle(tuple(self.corners))
+    @classmethod
+    def uniforms(cls, state):
+        sigma = apex_permutation_angle(tuple(state.corners))
+
+        return {
+            "resolution": state.resolution,
+            "similarity": similarity(state.scale, state.angle, state.offset),
+            "tileCorner0": state.rescaled_corners[sigma[0]],
+            "tileCorner1": state.rescaled_corners[sigma[1]],
+            "tileCorner2": state.rescaled_corners[sigma[2]]
+        }
 
-        self.program.setUniformValue("resolution", self.parent().resolution)
-        self.program.setUniformValue("similarity", QMatrix3x3(self.similarity().flatten()))
+    @classmethod
+    def lattice(cls, uniforms):
+        return identity(3)
 
-        self.program.setUniformValue("tileCorner0", self.rescaled_corners[sigma[0]])
-        self.program.setUniformValue("tileCorner1", self.rescaled_corners[sigma[1]])
-        self.program.setUniformValue("tileCorner2", self.rescaled_corners[sigma[2]])
+    @classmethod
+    def fold_steps(cls, uniforms):
+        return [
+            (((TEST_SX, 1),), SX),
+            (((TEST_SY, 1),), SY),
+            (((TEST_SD, 1),), SD),
+            ((), TEX)
+        ]
 
 
 class TilingOptions(AbstractTilingOptions):
@@ -1,26 +1,79 @@
-from PySide6.QtGui import QMatrix3x3
+from numpy import array, sqrt
 
 from tilings.euclidean.tiling import Tiling as AbstractTiling
 from tilings.euclidean.tiling import TilingDrawing as AbstractTilingDrawing
 from tilings.euclidean.tiling import TilingOptions as AbstractTilingOptions
+from tilings.euclidean.tiling import similarity
+from utils.cpu import mat3
 from utils.triangles import apex_permutation_angle
 from utils.path_helper import get_resource_path
 
+A = sqrt(3.) / 3.
+MORPH_INV = mat3(
+    1, 0, 0,
+    -A, 2 * A, 0,
+    0, 0, 1
+)
+
+TEST_C = array([1, 1, -1])
+ROT_C = mat3(
+    -1, 0, 0,
+    0, -1, 0,
+    1, 1, 1
+)
+
+TEST_S1 = array([1, 0.5, -0.5])
+SYM_1 = mat3(
+    -1, 0, 0,
+    -1, 1, 0,
+    1, 0, 1
+)
+
+TEST_S2 = array([-1, 1, 0])
+SYM_2 = mat3(
+    0, 1, 0,
+    1, 0, 0,
+    0, 0, 1
+)
+
+TEX = mat3(
+    0, -2, 0,
+    3, -1, 0,
+    0, 1, 1
+)
+
+
 class TilingDrawing(AbstractTilingDrawing):
     FRAGMENT_SHADER = get_resource_path("tilings/euclidean/p6m/fragment.glsl")
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super(TilingDrawing, self).__init__(parent, path, img_size, corners)
 
-    def setup_uniforms(self):
-        sigma = apex_permutation_angle(tuple(self.corners))
+    @classmethod
+    def uniforms(cls, state):
+        sigma = apex_permutation_angle(tuple(state.corners))
+
+        return {
+            "resolution": state.resolution,
+            "similarity": similarity(state.scale, state.angle, state.offset),
+            "tileCorner0": state.rescaled_corners[sigma[0]],
+            "tileCorner1": state.rescaled_corners[sigma[1]],
+            "tileCorner2": state.rescaled_corners[sigma[2]]
+        }
 
-        self.program.setUniformValue("resolution", self.parent().resolution)
-        self.program.setUniformValue("similarity", QMatrix3x3(self.similarity().flatten()))
+    @classmethod
+    def lattice(cls, uniforms):
+        return MORPH_INV
 
-        self.program.setUniformValue("tileCorner0", self.rescaled_corners[sigma[0]])
-        self.program.setUniformValue("tileCorner1", self.rescaled_corners[sigma[1]])
-        self.program.setUniformValue("tileCorner2", self.rescaled_corners[sigma[2]])
+    @classmethod
+    def fold_steps(cls, uniforms):
+        return [
+            (((TEST_C, 1),), ROT_C),
+            (((TEST_S1, 1),), SYM_1),
+            (((TEST_S2, 1),), SYM_2),
+            (((TEST_S1, 1),), SYM_1),
+            ((), TEX)
+        ]
 
 
 class TilingOptions(AbstractTilingOptions):
@@ -17,6 +17,8 @@ uniform vec2 tileCorner2;
 uniform vec2 tileCorner3;
 
 
+#include "quad_tile.glsl"
+
 vec2 tileCoords(vec3 p) {
     float x = 2 * mod(p.x, 0.5);
     float y = 2 * mod(p.y, 0.5);
@@ -26,15 +28,7 @@ vec2 tileCoords(vec3 p) {
     if (p.y > 0.5) {
         x = 1. - x;
     }
-
-    vec2 a0 = (1. - x) * (tileCorner3 - tileCorner0) + x * (tileCorner2 - tileCorner1);
-    vec2 a1 = (1. - y) * (tileCorner1 - tileCorner0) + y * (tileCorner2 - tileCorner3);
-    vec2 b = ((1. - y) * tileCorner0 + y * tileCorner3) - ((1. - x) * tileCorner0 + x * tileCorner1);
-    mat2 a = mat2(a0, -a1);
-
-    vec2 sol = inverse(a) * b;
-    float theta = sol.x;
-    return (1. - theta) * ((1. - x) * tileCorner0 + x * tileCorner1) + theta * ((1 - x) * tileCorner3 + x * tileCorner2);
+    return tileCoords(x, y);
 }
 
 vec3 TEST_X = vec3(2, 0, -1);
@@ -81,22 +75,6 @@ vec2 domainCoords(vec3 p) {
 }
 
 
-vec2 tileCoords(vec2 p) {
-    float x = p.x;
-    float y = p.y;
-
-    vec2 a0 = (1. - x) * (tileCorner3 - tileCorner0) + x * (tileCorner2 - tileCorner1);
-    vec2 a1 = (1. - y) * (tileCorner1 - tileCorner0) + y * (tileCorner2 - tileCorner3);
-    vec2 b = ((1. - y) * tileCorner0 + y * tileCorner3) - ((1. - x) * tileCorner0 + x * tileCorner1);
-    mat2 a = mat2(a0, -a1);
-
-    vec2 sol = inverse(a) * b;
-    float theta = sol.x;
-    return (1. - theta) * ((1. - x) * tileCorner0 + x * tileCorner1) + theta * ((1 - x) * tileCorner3 + x * tileCorner2);
-}
-
-
-
 void main() {
     vec3 q = vec3(v_text * (resolution / resolution.y), 1);
     q = similarity * q;
@@ -10,7 +10,10 @@ uniform vec2 resolution;
 uniform mat3 morphInv;
 uniform mat3 similarity;
 
-uniform int reflection;
+// variant of the shader compiled for the option reflection (cf. TilingDrawing.shader_defines)
+#ifndef REFLECTION
+#define REFLECTION 0
+#endif
 
 uniform sampler2D tileTexture;
 uniform vec2 tileCorner0;
@@ -39,32 +42,20 @@ mat3 TEX = mat3(
 );
 
 vec2 domainCoords(vec3 p) {
-    if (reflection == 1) {
-        p = PRE * p;
-    }
+#if REFLECTION == 1
+    p = PRE * p;
+#endif
     if (dot(p, TEST) > 0.) {
         p = SYM * p;
     }
     p = TEX * p;
-    if (reflection == 1) {
-        p = PRE * p;
-    }
+#if REFLECTION == 1
+    p = PRE * p;
+#endif
     return p.xy;
 }
 
-vec2 tileCoords(vec2 p) {
-    float x = p.x;
-    float y = p.y;
-
-    vec2 a0 = (1. - x) * (tileCorner3 - tileCorner0) + x * (tileCorner2 - tileCorner1);
-    vec2 a1 = (1. - y) * (tileCorner1 - tileCorner0) + y * (tileCorner2 - tileCorner3);
-    vec2 b = ((1. - y) * tileCorner0 + y * tileCorner3) - ((1. - x) * tileCorner0 + x * tileCorner1);
-    mat2 a = mat2(a0, -a1);
-
-    vec2 sol = inverse(a) * b;
-    float theta = sol.x;
-    return (1. - theta) * ((1. - x) * tileCorner0 + x * tileCorner1) + theta * ((1 - x) * tileCorner3 + x * tileCorner2);
-}
+#include "quad_tile.glsl"
 
 
 void main() {
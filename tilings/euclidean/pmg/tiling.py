@@ -1,4 +1,3 @@
-from PySide6.QtGui import QMatrix3x3, QVector2D
 from PySide6.QtWidgets import QComboBox
 from numpy import array
 from numpy.linalg import inv
@@ -7,24 +6,48 @@ from tilings.euclidean.tiling import SHAPE_KEY_RECTANGLE, SHAPE_KEY_SQUARE
 from tilings.euclidean.tiling import Tiling as AbstractTiling
 from tilings.euclidean.tiling import TilingDrawing as AbstractTilingDrawing
 from tilings.euclidean.tiling import TilingOptions as AbstractTilingOptions
+from tilings.euclidean.tiling import similarity, translations, sides
+from utils.cpu import mat3
 from utils.path_helper import get_resource_path
 
 REFLECTION_X = 0
 REFLECTION_Y = 1
 
+PRE = mat3(
+    0, 1, 0,
+    1, 0, 0,
+    0, 0, 1
+)
+
+TEST_X = array([2, 0, -1])
+TEST_Y = array([0, 2, -1])
+GT = mat3(
+    1, 0, 0,
+    0, -1, 0,
+    -0.5, 0.5, 1
+)
+
+SYM = mat3(
+    1, 0, 0,
+    0, -1, 0,
+    0, 1, 1
+)
+
+TEX = mat3(
+    2, 0, 0,
+    0, 2, 0,
+    0, 0, 1
+)
+
 
 class TilingDrawing(AbstractTilingDrawing):
     FRAGMENT_SHADER = get_resource_path("tilings/euclidean/pmg/fragment.glsl")
+    DEFAULTS = dict(AbstractTilingDrawing.DEFAULTS, shape=SHAPE_KEY_RECTANGLE, reflection=REFLECTION_X)
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super(TilingDrawing, self).__init__(parent, path, img_size, corners)
 
-        self._shape = SHAPE_KEY_RECTANGLE
-        self._reflection = REFLECTION_X
-
-        self.v1 = QVector2D(self.corners[1] - self.corners[0])
-        self.v2 = QVector2D(self.corners[3] - self.corners[0])
-        self.v3 = QVector2D(self.corners[2] - self.corners[0])
+        self._reflection = self.DEFAULTS['reflection']
 
     @property
     def reflection(self):
@@ -35,10 +58,9 @@ class TilingDrawing(AbstractTilingDrawing):
         self._reflection = value
         self.update()
 
-    def setup_uniforms(self):
-        u1, u2 = self.translations(self.v1, self.v2, self.v3)
-
-        self.program.setUniformValue("resolution", self.parent().resolution)
+    @classmethod
+    def uniforms(cls, state):
+        u1, u2 = translations(state.shape, *sides(state.corners))
 
         morph = array([
             [2 * u1.x(), 2 * u2.x(), 0],
@@ -48,14 +70,30 @@ class TilingDrawing(AbstractTilingDrawing):
 
         morph_inv = inv(morph)
 
-        self.program.setUniformValue("morphInv", QMatrix3x3(morph_inv.flatten()))
-        self.program.setUniformValue("similarity", QMatrix3x3(self.similarity().flatten()))
-        self.program.setUniformValue("reflection", self.reflection)
-
-        self.program.setUniformValue("tileCorner0", self.rescaled_corners[0])
-        self.program.setUniformValue("tileCorner1", self.rescaled_corners[1])
-        self.program.setUniformValue("tileCorner2", self.rescaled_corners[2])
-        self.program.setUniformValue("tileCorner3", self.rescaled_corners[3])
+        return {
+            "resolution": state.resolution,
+            "morphInv": morph_inv,
+            "similarity": similarity(state.scale, state.angle, state.offset),
+            # compiled in the shader (cf. shader_defines), read by fold_steps
+            "reflection": state.reflection,
+            "tileCorner0": state.rescaled_corners[0],
+            "tileCorner1": state.rescaled_corners[1],
+            "tileCorner2": state.rescaled_corners[2],
+            "tileCorner3": state.rescaled_corners[3]
+        }
+
+    @classmethod
+    def shader_defines(cls, state):
+        return {"REFLECTION": state.reflection}
+
+    @classmethod
+    def fold_steps(cls, uniforms):
+        pre = [((), PRE)] if uniforms["reflection"] == REFLECTION_Y else []
+        return pre + [
+            (((TEST_Y, 1),), SYM),
+            (((TEST_X, 1),), GT),
+            ((), TEX)
+        ] + pre
 
 
 class TilingOptions(AbstractTilingOptions):
@@ -1,22 +1,40 @@
 from abc import abstractmethod
-from typing import Tuple
+from functools import lru_cache
+from ctypes import c_void_p
+from math import ceil
+from typing import List, Tuple, Iterator
 
-from PySide6.QtCore import Qt
+from OpenGL import GL
+from PySide6.QtCore import Qt, QPointF
 from PySide6.QtGui import QVector2D
-from PySide6.QtWidgets import QSlider, QFormLayout, QDial, QComboBox
-from numpy import array, cos, sin, pi, ndarray
+from PySide6.QtWidgets import QSlider, QFormLayout, QDial, QComboBox, QCheckBox
+from numpy import array, cos, sin, pi, ndarray, linalg, ascontiguousarray, float32
 
 from tilings.abstract.tiling import Tiling as AbstractTiling
 from tilings.abstract.tiling import TilingDrawing as AbstractTilingDrawing
 from tilings.abstract.tiling import TilingOptions as AbstractTilingOptions
+from tilings.abstract.tiling import AnimationExportDialog as AbstractAnimationExportDialog
+from tilings.abstract.tiling import view_uniforms
+from tilings.euclidean.cpu import fold_table
+from tilings.euclidean.mesh import cell_mesh, cell_copies
+from utils.cpu import uniforms_to_numpy
 from utils.quandrangles import parallelogram, rectangle, square, reflect
 from utils.path_helper import get_resource_path
+from utils.shader_cache import shader_program
 
 SCALE_MIN = 10
 SCALE_MAX = 80
 SCALE_DEFAULT = 40
 BASE_SCALE = 0.1
 
+# Déplacement (en pixels) du motif entre deux images d'une animation exportée
+PAN_PIXELS_PER_FRAME = 2
+
+# Côté (en cases) de la table donnant les coordonnées dans la tuile des points de la maille du réseau
+# (au-delà de FOLD_TABLE_SIZE pixels à l'écran, une case couvrirait plusieurs pixels : la maille est alors calculée
+# exactement par le fragment shader du groupe)
+FOLD_TABLE_SIZE = 1024
+
 SHAPE_KEY_PARALLELOGRAM = 0
 SHAPE_KEY_RECTANGLE = 1
 SHAPE_KEY_SQUARE = 2
@@ -28,16 +46,110 @@ SHAPES_NAME = {
 }
 
 
+def similarity(scale, angle, offset=(0., 0.)) -> ndarray:
+    """
+    Return the similarity applied to the picture before computing the tiling,
+    the offset being a translation applied after the homothety and the rotation
+    """
+    a = BASE_SCALE * scale
+    homothety = array([
+        [a, 0, 0],
+        [0, a, 0],
+        [0, 0, 1]
+    ])
+
+    alpha = pi * angle / 180
+    c = cos(alpha)
+    s = sin(alpha)
+    rotation = array([
+        [c, -s, 0],
+        [s, c, 0],
+        [0, 0, 1]
+    ])
+    translation = array([
+        [1, 0, offset[0]],
+        [0, 1, offset[1]],
+        [0, 0, 1]
+    ])
+    return translation @ homothety @ rotation
+
+
+def translations(shape, v1: QVector2D, v2: QVector2D, v3: QVector2D) -> Tuple[QVector2D, QVector2D]:
+    """
+    Return the (normalized) generators of the lattice of translations, given the sides of the tile
+    """
+    u1, u2 = lattice_generators(shape, v1.toTuple(), v2.toTuple(), v3.toTuple())
+    return QVector2D(*u1), QVector2D(*u2)
+
+
+@lru_cache(maxsize=64)
+def lattice_generators(shape, v1: Tuple[float, float], v2: Tuple[float, float],
+                       v3: Tuple[float, float]) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+    """
+    Cached computation of translations, the sides being given as tuples:
+    the projections on the shapes only run again when the corners or the shape change
+    """
+    v1, v2, v3 = QVector2D(*v1), QVector2D(*v2), QVector2D(*v3)
+    if shape == SHAPE_KEY_PARALLELOGRAM:
+        u1, u2, _ = parallelogram(v1, v2, v3)
+    elif shape == SHAPE_KEY_RECTANGLE:
+        u1, u2, _ = rectangle(v1, v2, v3)
+    elif shape == SHAPE_KEY_SQUARE:
+        u1, u2, _ = square(v1, v2, v3)
+    else:
+        raise Exception("This shape is not supported")
+
+    u1 = reflect(u1)
+    u2 = reflect(u2)
+    n = 1 / u1.length()
+    return (n * u1).toTuple(), (n * u2).toTuple()
+
+
+def sides(corners: List[QPointF]) -> Tuple[QVector2D, QVector2D, QVector2D]:
+    """
+    Return the vectors from the first corner of a quadrilateral tile to the three other ones
+    """
+    v1 = QVector2D(corners[1] - corners[0])
+    v2 = QVector2D(corners[3] - corners[0])
+    v3 = QVector2D(corners[2] - corners[0])
+    return v1, v2, v3
+
+
 class TilingDrawing(AbstractTilingDrawing):
     VERTEX_SHADER = get_resource_path("shaders/vertex.glsl")
     FRAGMENT_SHADER = get_resource_path("")
+    MESH_VERTEX_SHADER = get_resource_path("tilings/euclidean/mesh_vertex.glsl")
+    MESH_FRAGMENT_SHADER = get_resource_path("tilings/euclidean/mesh_fragment.glsl")
+    FOLD_TABLE_SHADER = get_resource_path("tilings/euclidean/fold_table.glsl")
+    DEFAULTS = {
+        'scale': SCALE_DEFAULT,
+        'angle': 0,
+        'shape': None,
+        'offset': (0., 0.)
+    }
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super(TilingDrawing, self).__init__(parent, path, img_size, corners)
 
-        self._shape = None
-        self._scale = SCALE_DEFAULT
-        self._angle = 0
+        self._shape = self.DEFAULTS['shape']
+        self._scale = self.DEFAULTS['scale']
+        self._angle = self.DEFAULTS['angle']
+        self.offset = self.DEFAULTS['offset']
+
+        # Rendu par maillage : mailles visibles du réseau dessinées comme des instances d'un même maillage
+        self._mesh = False
+        self.mesh_program = None
+        self.mesh_vao = None
+        self.mesh_buffers = None
+        self.mesh_index_count = 0
+        self.copy_count = 0
+        self._mesh_key = None
+        self._copies_key = None
+
+        # Table précalculée de la maille vers la tuile, recalculée quand les sommets ou les options changent
+        self.fold_table_program = None
+        self.fold_table_texture = None
+        self._fold_table_key = None
 
     @property
     def scale(self):
@@ -57,27 +169,6 @@ class TilingDrawing(AbstractTilingDrawing):
         self._angle = value
         self.update()
 
-    def similarity(self) -> ndarray:
-        """
-        Return the similarity applied to the picture before computing the tiling
-        """
-        a = BASE_SCALE * self.scale
-        homothety = array([
-            [a, 0, 0],
-            [0, a, 0],
-            [0, 0, 1]
-        ])
-
-        alpha = pi * self.angle / 180
-        c = cos(alpha)
-        s = sin(alpha)
-        rotation = array([
-            [c, -s, 0],
-            [s, c, 0],
-            [0, 0, 1]
-        ])
-        return homothety @ rotation
-
     @property
     def shape(self):
         return self._shape
@@ -87,23 +178,256 @@ class TilingDrawing(AbstractTilingDrawing):
         self._shape = value
         self.update()
 
-    def translations(self, v1: QVector2D, v2: QVector2D, v3: QVector2D) -> Tuple[QVector2D, QVector2D]:
-        if self.shape == SHAPE_KEY_PARALLELOGRAM:
-            u1, u2, _ = parallelogram(v1, v2, v3)
-        elif self.shape == SHAPE_KEY_RECTANGLE:
-            u1, u2, _ = rectangle(v1, v2, v3)
-        elif self.shape == SHAPE_KEY_SQUARE:
-            u1, u2, _ = square(v1, v2, v3)
-        else:
-            raise Exception("This shape is not supported")
-
-        u1 = reflect(u1)
-        u2 = reflect(u2)
-        n = 1 / u1.length()
-        return n * u1, n * u2
+    @property
+    def mesh(self):
+        return self._mesh
+
+    @mesh.setter
+    def mesh(self, value):
+        self._mesh = value
+        self.update()
 
+    def initializeGL(self):
+        super().initializeGL()
+
+        self.mesh_program = shader_program(self.MESH_VERTEX_SHADER, self.MESH_FRAGMENT_SHADER)
+
+        self.fold_table_program = shader_program(self.VERTEX_SHADER, self.FOLD_TABLE_SHADER)
+
+        # sans interpolation, qui mélangerait les coordonnées de part et d'autre des bords des copies de la tuile
+        self.fold_table_texture = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.fold_table_texture)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RG32F, FOLD_TABLE_SIZE, FOLD_TABLE_SIZE, 0, GL.GL_RG, GL.GL_FLOAT,
+                        None)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_NEAREST)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_NEAREST)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_REPEAT)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_REPEAT)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        self._fold_table_key = None
+
+        self.mesh_index_count = 0
+        self.copy_count = 0
+        self._mesh_key = None
+        self._copies_key = None
+
+        self.mesh_vao = GL.glGenVertexArrays(1)
+        GL.glBindVertexArray(self.mesh_vao)
+        self.mesh_buffers = GL.glGenBuffers(3)
+        vertex_buffer, index_buffer, copy_buffer = self.mesh_buffers
+
+        # point de la maille et coordonnées dans la texture (locations 0 et 1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vertex_buffer)
+        GL.glEnableVertexAttribArray(0)
+        GL.glVertexAttribPointer(0, 2, GL.GL_FLOAT, GL.GL_FALSE, 16, c_void_p(0))
+        GL.glEnableVertexAttribArray(1)
+        GL.glVertexAttribPointer(1, 2, GL.GL_FLOAT, GL.GL_FALSE, 16, c_void_p(8))
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+
+        # une matrice par instance, colonne par colonne (locations 2, 3 et 4)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, copy_buffer)
+        for column in range(3):
+            GL.glEnableVertexAttribArray(2 + column)
+            GL.glVertexAttribPointer(2 + column, 3, GL.GL_FLOAT, GL.GL_FALSE, 36, c_void_p(12 * column))
+            GL.glVertexAttribDivisor(2 + column, 1)
+
+        GL.glBindVertexArray(self.vao)
+
+    def cleanupGL(self):
+        super().cleanupGL()
+        if self.mesh_buffers is not None:
+            GL.glDeleteBuffers(3, self.mesh_buffers)
+            self.mesh_buffers = None
+        if self.mesh_vao:
+            GL.glDeleteVertexArrays(1, [self.mesh_vao])
+            self.mesh_vao = None
+        if self.mesh_program:
+            self.mesh_program.release()
+            self.mesh_program = None
+        if self.fold_table_texture:
+            GL.glDeleteTextures(1, [self.fold_table_texture])
+            self.fold_table_texture = None
+        if self.fold_table_program:
+            self.fold_table_program.release()
+            self.fold_table_program = None
+
+    @staticmethod
+    def cell_key(uniforms: dict) -> tuple:
+        """
+        Clé des uniformes dont dépend l'image de la maille dans la tuile (sommets, forme, options du groupe)
+        """
+        return tuple((name, array(value).tobytes()) for name, value in sorted(uniforms.items())
+                     if name not in ("resolution", "similarity"))
+
+    def update_fold_table(self, uniforms: dict):
+        """
+        Recalcule la table de la maille vers la tuile, seulement si les sommets ou les options ont changé
+        """
+        key = self.cell_key(uniforms)
+        if key == self._fold_table_key:
+            return
+        table = fold_table(type(self), uniforms, FOLD_TABLE_SIZE)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.fold_table_texture)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 1)
+        GL.glTexSubImage2D(GL.GL_TEXTURE_2D, 0, 0, 0, FOLD_TABLE_SIZE, FOLD_TABLE_SIZE, GL.GL_RG, GL.GL_FLOAT, table)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        self._fold_table_key = key
+
+    def update_mesh(self, uniforms: dict):
+        """
+        Découpe la maille selon les branches de fold_steps, seulement si les sommets ou les options ont changé
+        """
+        key = self.cell_key(uniforms)
+        if key == self._mesh_key:
+            return
+        vertices, triangles = cell_mesh(uniforms, self.fold_steps(uniforms))
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.mesh_buffers[0])
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, vertices.nbytes, vertices.tobytes(), GL.GL_STATIC_DRAW)
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, self.mesh_buffers[1])
+        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, triangles.nbytes, triangles.tobytes(), GL.GL_STATIC_DRAW)
+        self.mesh_index_count = triangles.size
+        self._mesh_key = key
+
+    def update_copies(self, uniforms: dict, view: dict):
+        """
+        Énumère les mailles visibles du réseau, seulement si la similitude, le réseau ou la vue ont changé
+        """
+        lattice = self.lattice(uniforms)
+        key = (uniforms["similarity"].tobytes(), lattice.tobytes(), uniforms["resolution"].tobytes(),
+               view["viewOffset"].tobytes(), view["viewScale"].tobytes())
+        if key == self._copies_key:
+            return
+        copies = cell_copies(uniforms, lattice, view)
+        # les matrices sont transmises colonne par colonne
+        data = ascontiguousarray(copies.transpose(0, 2, 1), dtype=float32)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.mesh_buffers[2])
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, data.nbytes, data.tobytes(), GL.GL_STATIC_DRAW)
+        self.copy_count = len(copies)
+        self._copies_key = key
+
+    @classmethod
+    def cell_pixels(cls, uniforms: dict) -> float:
+        """
+        Longueur (en pixels de l'écran) du plus long côté de la maille du réseau
+        """
+        to_screen = linalg.inv(cls.lattice(uniforms) @ uniforms["similarity"])
+        # une unité de v_text * (resolution / resolution.y) couvre la moitié de la hauteur de l'image
+        return 0.5 * uniforms["resolution"][1] * linalg.norm(to_screen[0:2, 0:2], axis=0).max()
+
+    def frame_key(self):
+        # le rendu par maillage ne change pas les uniformes
+        return super().frame_key() + (self._mesh,)
+
+    def paint_tiling(self):
+        if self.export_resolution is not None:
+            # les exports sont calculés exactement, pixel par pixel, quelle que soit leur taille
+            # (ni maillage, ni table)
+            super().paint_tiling()
+            return
+        if self._mesh:
+            self.paint_mesh()
+            return
+
+        uniforms = self.current_uniforms()
+        cell_uniforms = self.current_uniforms(numpy=True)
+        if self.cell_pixels(cell_uniforms) > FOLD_TABLE_SIZE:
+            # les cases de la table seraient visibles : calcul exact, pixel par pixel
+            super().paint_tiling()
+            return
+        self.update_fold_table(cell_uniforms)
+
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        self.fold_table_program.bind()
+        position_attr = self.fold_table_program.attributeLocation("in_vert")
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        self.fold_table_program.enableAttributeArray(position_attr)
+        self.fold_table_program.setAttributeBuffer(position_attr, GL.GL_FLOAT, 0, 2, 0)
+
+        self.uniform_cache.upload(self.fold_table_program, {
+            "resolution": uniforms["resolution"],
+            "similarity": uniforms["similarity"],
+            "cellLattice": self.lattice(cell_uniforms)
+        })
+        self.uniform_cache.upload(self.fold_table_program, view_uniforms(self.resolution, self.view_rect))
+
+        self.fold_table_program.setUniformValue('tileTexture', 0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glActiveTexture(GL.GL_TEXTURE1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.fold_table_texture)
+        self.fold_table_program.setUniformValue('foldTable', 1)
+        GL.glDrawArrays(GL.GL_TRIANGLES, 0, 6)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, 0)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glDisableVertexAttribArray(position_attr)
+        self.fold_table_program.release()
+
+    def paint_mesh(self):
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        uniforms = self.current_uniforms()
+        view = view_uniforms(self.resolution, self.view_rect)
+        GL.glBindVertexArray(self.mesh_vao)
+        self.update_mesh(self.current_uniforms(numpy=True))
+        self.update_copies(self.current_uniforms(numpy=True), uniforms_to_numpy(view))
+
+        self.mesh_program.bind()
+        self.uniform_cache.upload(self.mesh_program, {"resolution": uniforms["resolution"]})
+        self.uniform_cache.upload(self.mesh_program, view)
+        self.mesh_program.setUniformValue('tileTexture', 0)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, self.texture)
+        GL.glDrawElementsInstanced(GL.GL_TRIANGLES, self.mesh_index_count, GL.GL_UNSIGNED_INT, c_void_p(0),
+                                   self.copy_count)
+        self.mesh_program.release()
+        GL.glBindVertexArray(self.vao)
+
+    @classmethod
+    def lattice(cls, uniforms: dict) -> ndarray:
+        """
+        Return the matrix sending the plane to the coordinates in the lattice of translations,
+        i.e. the matrix used by the fragment shader before reducing modulo 1
+        """
+        return uniforms["morphInv"]
+
+    def loop_vector(self, axis: int) -> ndarray:
+        """
+        Return the generator of the lattice of translations along which the tiling is translated by an animation
+        (axis 0 or 1), i.e. the shortest translation leaving the tiling unchanged in this direction
+        """
+        return linalg.inv(self.lattice(self.current_uniforms(numpy=True)))[0:2, axis]
+
+    def loop_frame_count(self, axis: int, height: int) -> int:
+        """
+        Return the number of frames of a loop along the given axis in a picture of the given height,
+        the pattern moving by PAN_PIXELS_PER_FRAME pixels between two frames
+        """
+        # one unit of the screen is half the height of the picture, and is scaled by the similarity
+        length = linalg.norm(self.loop_vector(axis)) / (BASE_SCALE * self.scale) * 0.5 * height
+        return max(1, ceil(length / PAN_PIXELS_PER_FRAME))
+
+    def animation_frames(self, frame_count: int, axis: int) -> Iterator[None]:
+        """
+        Translate the tiling along a generator of its lattice during frame_count frames (cf. render_animation):
+        the frames are evenly spaced over exactly one period, so that the animation loops without seam
+        """
+        offset = self.offset
+        vector = self.loop_vector(axis)
+        try:
+            for i in range(frame_count):
+                self.offset = tuple(array(offset) + i / frame_count * vector)
+                yield
+        finally:
+            self.offset = offset
+
+    # Les constantes des modules des groupes (TEST, ROT, TEX, etc.) sont recopiées de leur fragment.glsl,
+    # les matrices étant construites par utils.cpu.mat3 dans l'ordre des colonnes, comme en GLSL
+    @classmethod
     @abstractmethod
-    def setup_uniforms(self):
+    def fold_steps(cls, uniforms: dict) -> list:
+        """
+        NumPy counterpart of the function domainCoords of the fragment shader.
+        Return the list of the steps (conditions, matrix) applied to a point of the unit cell,
+        where conditions is a tuple of pairs (test, sign): the matrix is applied when sign * dot(p, test) > 0
+        for every pair (logical and, as in the shader).
+        """
         raise Exception("This method must be implemented by subclasses")
 
 
@@ -127,14 +451,47 @@ class TilingOptions(AbstractTilingOptions):
         self.angle_dial.setRange(0, 360)
         self.layout.addRow("Rotation", self.angle_dial)
 
+        self.mesh_checkbox = QCheckBox("Dessiner les copies de la tuile (maillage)")
+        self.mesh_checkbox.toggled.connect(self.toggle_mesh)
+        self.layout.addRow("Rendu géométrique:", self.mesh_checkbox)
+
         self.select_shape = QComboBox()
         for key in self.parent().ALLOWED_SHAPES:
             self.select_shape.addItem(SHAPES_NAME[key], key)
 
+    def toggle_mesh(self, checked: bool):
+        self.parent().drawing.mesh = checked
+
+
+class AnimationExportDialog(AbstractAnimationExportDialog):
+    """
+    Fenêtre de choix de l'animation exportée : translation du motif d'exactement une période du réseau,
+    ce qui permet de la répéter en boucle sans raccord visible
+    """
+
+    def __init__(self, parent: 'Tiling'):
+        super(AnimationExportDialog, self).__init__(parent)
+        self.drawing = parent.drawing
+
+        self.axis_box = QComboBox()
+        self.axis_box.addItems(["Premier vecteur du réseau", "Second vecteur du réseau"])
+        self.axis_box.currentIndexChanged.connect(self.update_frame_count)
+        self.layout.insertRow(2, "Direction", self.axis_box)
+        self.height_box.valueChanged.connect(self.update_frame_count)
+        self.update_frame_count()
+
+    def axis(self) -> int:
+        return self.axis_box.currentIndex()
+
+    def update_frame_count(self):
+        """ Propose le nombre d'images d'une période, à la hauteur choisie. """
+        self.frames_box.setValue(self.drawing.loop_frame_count(self.axis(), self.height_box.value()))
+
 
 class Tiling(AbstractTiling):
     KIND = 'Pavage euclidien'
     ALLOWED_SHAPES = []
+    ANIMATION_DIALOG_CLASS = AnimationExportDialog
 
     def __init__(self, path, img_size, corners, resolution=None):
         super(Tiling, self).__init__(path, img_size, corners, resolution)
@@ -154,3 +511,6 @@ class Tiling(AbstractTiling):
 
     def update_shape(self, value):
         self.drawing.shape = self.options.select_shape.itemData(value)
+
+    def animation_frames(self, dialog: AnimationExportDialog) -> Iterator[None]:
+        return self.drawing.animation_frames(dialog.frame_count(), dialog.axis())
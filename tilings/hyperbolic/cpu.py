@@ -0,0 +1,171 @@
+"""
+Rendu des pavages hyperboliques avec NumPy, sans contexte OpenGL.
+Les calculs reprennent ceux du fragment shader (disc2hyp, réduction gloutonne, tileCoordsSidesIsom)
+en double précision, ce qui fournit aussi une référence à laquelle comparer le rendu OpenGL.
+"""
+from typing import Optional
+
+from numpy import ndarray, sqrt, log, clip, concatenate, empty, arange, linalg, stack, arccosh, minimum, maximum, \
+    meshgrid
+
+from tilings.abstract.tiling import TilingState
+from utils.cpu import uniforms_to_numpy, load_texture, sample, quad_tile_coords, screen_coords, to_pixels, \
+    render_bands
+
+# Zoom applied to the screen coordinates before the disc model (cf. main of fragment.glsl)
+DISC_ZOOM = 1.2
+# Same constants as in fragment.glsl
+EXTRA_STEPS = 10
+RENORMALIZE_PERIOD = 8
+LOD_START = 0.5
+LOD_END = 1.
+# Number of samples per side of the grid used to average the colour of the tile
+MEAN_SAMPLES = 64
+
+
+def hyp_dot(p: ndarray, q: ndarray) -> ndarray:
+    """
+    Minkowski product of the points p and q (arrays of shape (n, 3)) of the hyperboloid model
+    """
+    return p[:, 0] * q[:, 0] + p[:, 1] * q[:, 1] - p[:, 2] * q[:, 2]
+
+
+def reduce_error(p: ndarray) -> ndarray:
+    """
+    Project back the points p on the hyperboloid
+    """
+    return p / sqrt(-hyp_dot(p, p))[:, None]
+
+
+def disc2hyp(q: ndarray) -> ndarray:
+    """
+    Conversion from the disc model to the hyperboloid model
+    """
+    aux = (q * q).sum(axis=1)[:, None]
+    return concatenate([2. * q, 1. + aux], axis=1) / (1. - aux)
+
+
+def reduce(p: ndarray, uniforms: dict) -> ndarray:
+    """
+    Move the points p to the fundamental tile, as the function reduceToTile of the fragment shader does:
+    at each step the first shift (in the order XP, XN, YP, YN) bringing the point closer to the origin is applied.
+    Only the points which still move are kept for the next steps.
+    """
+    p = p.copy()
+    shifts = [uniforms[name] for name in ("shiftXP", "shiftXN", "shiftYP", "shiftYN")]
+    # the z coordinates of the images of p by the shifts, i.e. -hypDot(ORIGIN, shift * p)
+    last_rows = stack([shift[2] for shift in shifts], axis=1)
+    # empirical bound on the number of steps, as in the fragment shader (cf. the comment of reduceToTile)
+    step_length = arccosh(shifts[0][0, 0])
+    bound = minimum(uniforms["iterations"], (arccosh(maximum(p[:, 2], 1.)) / step_length).astype(int) + EXTRA_STEPS)
+    active = arange(p.shape[0])
+
+    for i in range(uniforms["iterations"]):
+        active = active[bound[active] > i]
+        if active.size == 0:
+            break
+        q = p[active]
+        z = q @ last_rows
+        closer = z < q[:, 2:3]
+        moved = closer.any(axis=1)
+        # index of the first shift bringing the point closer to the origin
+        chosen = closer.argmax(axis=1)
+        for k, shift in enumerate(shifts):
+            selected = moved & (chosen == k)
+            q[selected] = q[selected] @ shift.transpose()
+        if i % RENORMALIZE_PERIOD == RENORMALIZE_PERIOD - 1:
+            q = reduce_error(q)
+        p[active] = q
+        active = active[moved]
+    return p
+
+
+def aux_dist_klein(x: ndarray, th_rho: float) -> ndarray:
+    a = sqrt(1. - 0.5 * th_rho * th_rho)
+    return 0.5 * log((a + x) / (a - x))
+
+
+def tile_coords_sides_isom(p: ndarray, uniforms: dict) -> ndarray:
+    """
+    Coordinates in the texture of the points p of the fundamental tile (cf. tileCoordsSidesIsom)
+    """
+    ch_rho, sh_rho = uniforms["tileData"]
+    th_rho = sh_rho / ch_rho
+    size_klein = aux_dist_klein(0.5 * sqrt(2.) * th_rho, th_rho)
+    klein_coords = p[:, 0:2] / p[:, 2:3]
+    s = aux_dist_klein(klein_coords, th_rho) / size_klein
+    aux = clip(0.5 * s + 0.5, 0., 1.)
+    return quad_tile_coords(aux, *(uniforms[f"tileCorner{i}"] for i in range(4)))
+
+
+def tile_mean_color(texture: ndarray, corners) -> ndarray:
+    """
+    Mean colour (RGB, values in [0, 1]) of the quad of the texture bounded by the given corners,
+    used by the shader for the pixels covering many tiles
+    """
+    s = (arange(MEAN_SAMPLES) + 0.5) / MEAN_SAMPLES
+    x, y = meshgrid(s, s)
+    coords = quad_tile_coords(stack([x.ravel(), y.ravel()], axis=1), *corners)
+    return sample(texture, coords)[:, 0:3].mean(axis=0)
+
+
+def lod_factor(q: ndarray, uniforms: dict) -> ndarray:
+    """
+    Weight of the mean colour of the tile for the points q of the disc (cf. lodFactor in fragment.glsl)
+    """
+    pixel_size = 2. * (2. * DISC_ZOOM / uniforms["resolution"][1]) / (1. - (q * q).sum(axis=1))
+    t = clip((pixel_size / (2. * arccosh(uniforms["tileData"][0])) - LOD_START) / (LOD_END - LOD_START), 0., 1.)
+    return t * t * (3. - 2. * t)
+
+
+def colors(uniforms: dict, texture: ndarray, v: ndarray) -> ndarray:
+    """
+    Colors (array of shape (n, 4), values in [0, 1]) of the points v of the screen
+    """
+    resolution = uniforms["resolution"]
+    q = DISC_ZOOM * v * (resolution / resolution[1])
+    inside = linalg.norm(q, axis=1) <= 1.
+
+    result = empty((v.shape[0], 4))
+    result[~inside] = uniforms["backgroundColor"]
+    result[inside, 3] = 1.
+
+    q = q[inside]
+    mean = uniforms["tileMeanColor"]
+    factor = lod_factor(q, uniforms) if uniforms["lod"] else empty(0)
+    if factor.size:
+        # the pixels covering many tiles are not reduced
+        indices = inside.nonzero()[0]
+        result[indices[factor >= 1.], 0:3] = mean
+        inside[indices[factor >= 1.]] = False
+        q = q[factor < 1.]
+        factor = factor[factor < 1., None]
+
+    p = disc2hyp(q) @ uniforms["isometry"].transpose()
+    p = reduce(p, uniforms)
+    coords = tile_coords_sides_isom(p, uniforms)
+    color = sample(texture, coords)[:, 0:3]
+    result[inside, 0:3] = (1. - factor) * color + factor * mean if factor.size else color
+    return result
+
+
+def render_band(context, start: int, stop: int) -> ndarray:
+    uniforms, texture = context
+    v = screen_coords(uniforms["resolution"], start, stop)
+    return to_pixels(colors(uniforms, texture, v), int(uniforms["resolution"][0]))
+
+
+def render(tiling_cls, image, state: TilingState, processes: Optional[int] = None) -> ndarray:
+    """
+    Rendu d'un pavage hyperbolique sur le processeur.
+    :param tiling_cls: la classe du pavage (par exemple tilings.hyperbolic.s46.tiling.Tiling)
+    :param image: chemin ou QImage de la tuile
+    :param state: état du pavage (sommets, résolution, couleur de fond)
+    :param processes: nombre de processus utilisés (tous les cœurs par défaut)
+    :return: tableau de pixels RGBA de forme (hauteur, largeur, 4)
+    """
+    drawing_cls = tiling_cls.DRAWING_CLASS
+    texture = load_texture(image)
+    # the options computed from the picture (mean colour of the tile) are the same as for the shaders
+    uniforms = uniforms_to_numpy(drawing_cls.uniforms(drawing_cls.image_state(state, image)))
+    return render_bands(render_band, (uniforms, texture), state.resolution, processes)
@@ -0,0 +1,107 @@
+"""
+Géométrie des pavages hyperboliques dessinés sous forme de maillages :
+la tuile fondamentale est subdivisée en triangles, et chacune de ses copies visibles
+est donnée par un élément du groupe engendré par les translations shiftXP, shiftXN, shiftYP, shiftYN.
+"""
+from collections import deque
+
+from numpy import ndarray, array, sqrt, tanh, log, arccosh, linspace, meshgrid, stack, ones, identity, linalg, \
+    rint, float32, uint32
+
+# Maximal number of copies of the tile (the enumeration also stops at the size of a pixel)
+MESH_MAX_COPIES = 200000
+# Number of subdivisions of each side of the tile
+MESH_SUBDIVISIONS = 16
+# Zoom applied to the screen coordinates before the disc model (cf. main of fragment.glsl)
+DISC_ZOOM = 1.2
+# Precision of the positions used to identify the tiles
+KEY_PRECISION = 1e9
+
+
+def tile_mesh(uniforms: dict, subdivisions: int = MESH_SUBDIVISIONS):
+    """
+    Subdivided mesh of the fundamental tile, inverse of the parametrization of tileCoordsSidesIsom
+    :return: the vertices, array of shape (n, 5) (point of the hyperboloid, coordinates in the unit square)
+        and the indices of the triangles, array of shape (m, 3)
+    """
+    ch_rho, sh_rho = uniforms["tileData"]
+    th_rho = sh_rho / ch_rho
+    a = sqrt(1. - 0.5 * th_rho * th_rho)
+    size_klein = 0.5 * log((a + 0.5 * sqrt(2.) * th_rho) / (a - 0.5 * sqrt(2.) * th_rho))
+
+    s = linspace(0., 1., subdivisions + 1)
+    x, y = meshgrid(s, s)
+    coords = stack([x.ravel(), y.ravel()], axis=1)
+    # Klein coordinates k such that auxDistKlein(k) = (2 * coords - 1) * sizeKlein
+    klein = a * tanh((2. * coords - 1.) * size_klein)
+    points = stack([klein[:, 0], klein[:, 1], ones(klein.shape[0])], axis=1)
+    points /= sqrt(1. - (klein * klein).sum(axis=1))[:, None]
+
+    n = subdivisions + 1
+    triangles = []
+    for j in range(subdivisions):
+        for i in range(subdivisions):
+            k = j * n + i
+            triangles.append([k, k + 1, k + n + 1])
+            triangles.append([k, k + n + 1, k + n])
+    vertices = stack([points[:, 0], points[:, 1], points[:, 2], coords[:, 0], coords[:, 1]], axis=1)
+    return vertices.astype(float32), array(triangles, dtype=uint32)
+
+
+def reduction(p: ndarray, shifts: list, iterations: int) -> ndarray:
+    """
+    Product of the shifts applied to the point p by the reduction of the fragment shader
+    (at each step, the first shift bringing p closer to the origin)
+    """
+    word = identity(3)
+    for _ in range(iterations):
+        for shift in shifts:
+            q = shift @ p
+            if q[2] < p[2]:
+                p = q
+                word = shift @ word
+                break
+        else:
+            break
+    return word
+
+
+def tile_copies(uniforms: dict, iterations: int = None) -> ndarray:
+    """
+    Elements of the group whose image of the fundamental tile is visible, found by a breadth-first search
+    over the words in the shifts. Each tile is identified by the position of its center (matrices of a same tile
+    being merged), and is given the element the reduction of the fragment shader would use for its center,
+    so that the mesh and the fragment shader draw the same picture.
+    The search stops at the tiles smaller than a pixel of the disc.
+    :return: array of shape (n, 3, 3)
+    """
+    shifts = [uniforms[name] for name in ("shiftXP", "shiftXN", "shiftYP", "shiftYN")]
+    iterations = iterations if iterations is not None else uniforms["iterations"]
+    inverse_isometry = linalg.inv(uniforms["isometry"])
+    # diameter of the tile and size of a pixel in the disc model
+    diameter = 2. * arccosh(uniforms["tileData"][0])
+    pixel_size = 2. * DISC_ZOOM / uniforms["resolution"][1]
+
+    def key(p: ndarray) -> tuple:
+        q = p[0:2] / (1. + p[2])
+        return tuple(rint(q * KEY_PRECISION).astype(int))
+
+    origin = array([0., 0., 1.])
+    copies = []
+    seen = {key(origin)}
+    queue = deque([identity(3)])
+    while queue and len(copies) < MESH_MAX_COPIES:
+        element = queue.popleft()
+        # size of the copy on the screen, the metric of the disc model being 2 |dq| / (1 - |q|^2)
+        center = inverse_isometry @ element @ origin
+        q = center[0:2] / (1. + center[2])
+        if 0.5 * diameter * (1. - q @ q) < pixel_size:
+            continue
+        copies.append(element)
+
+        for shift in shifts:
+            p = element @ shift @ origin
+            if key(p) not in seen:
+                seen.add(key(p))
+                queue.append(linalg.inv(reduction(p, shifts, iterations)))
+    return array(copies)
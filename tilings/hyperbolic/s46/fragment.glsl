@@ -2,6 +2,22 @@
 
 const vec3 ORIGIN = vec3(0, 0, 1);
 const float sqrt2 = sqrt(2.);
+// steps allowed beyond the distance to the origin divided by the translation length of a shift (empirical margin)
+const int EXTRA_STEPS = 10;
+// the points are projected back on the hyperboloid only every RENORMALIZE_PERIOD steps
+const int RENORMALIZE_PERIOD = 8;
+
+// a pixel whose hyperbolic size exceeds LOD_START times the diameter of the tile
+// starts to be blended with the mean colour of the tile (fully from LOD_END times the diameter)
+const float LOD_START = 0.5;
+const float LOD_END = 1.;
+
+// values of debugMode
+const int DEBUG_NONE = 0;
+// false colour map of the number of reduction steps
+const int DEBUG_HEATMAP = 1;
+// number of reduction steps written in the red channel (for the histogram read back by TilingDrawing)
+const int DEBUG_STEPS = 2;
 
 in vec2 v_text;
 out vec4 f_color;
@@ -23,6 +39,11 @@ uniform mat3 shiftXN;
 uniform mat3 shiftYP;
 uniform mat3 shiftYN;
 uniform vec4 backgroundColor;
+uniform int debugMode;
+uniform int lod;
+uniform vec3 tileMeanColor;
+// only the background and the mean colour of the tile are drawn (under the copies of the tile drawn as meshes)
+uniform int meanOnly;
 
 /*
  * Hyperboloid model H of the hyperbolic plane H2.
@@ -47,10 +68,7 @@ vec3 reduceError(vec3 p) {
     return p / hypLength(p);
 }
 
-vec3 applyIsometry(mat3 isom, vec3 p) {
-    vec3 res = isom * p;
-    return reduceError(res);
-}
+#include "isometry.glsl"
 
 /*
  * Conversion from the disc model to the hyperboloid model
@@ -73,6 +91,59 @@ float auxDistKlein(float x) {
 
 
 
+/*
+ * Move p to the fundamental tile: at each step, the first shift (in the order XP, XN, YP, YN)
+ * bringing p closer to the origin is applied.
+ * Since -hypDot(ORIGIN, M * p) is the dot product of p with the last row of M,
+ * the four candidates are compared with a single product, and only the chosen shift is applied.
+ * The comparisons do not depend on the scale of p, hence the lazy renormalization.
+ */
+vec3 reduceToTile(vec3 p, out int steps) {
+    mat4x3 lastRows = mat4x3(
+        transpose(shiftXP)[2],
+        transpose(shiftXN)[2],
+        transpose(shiftYP)[2],
+        transpose(shiftYN)[2]
+    );
+    // A step brings p closer to the origin by at most the translation length of a shift, so the distance divided
+    // by this length is a lower bound of the number of steps, not an upper one. Adding EXTRA_STEPS is an empirical
+    // heuristic (at most 5 steps beyond the estimate on 200k random points of the disc); the iterations uniform
+    // remains the actual ceiling.
+    float stepLength = acosh(shiftXP[0][0]);
+    int bound = min(iterations, int(acosh(max(p.z, 1.)) / stepLength) + EXTRA_STEPS);
+
+    steps = 0;
+    for (int i = 0; i < bound; i++) {
+        vec4 z = p * lastRows;
+        if (z.x < p.z) {
+            p = shiftXP * p;
+        } else if (z.y < p.z) {
+            p = shiftXN * p;
+        } else if (z.z < p.z) {
+            p = shiftYP * p;
+        } else if (z.w < p.z) {
+            p = shiftYN * p;
+        } else {
+            break;
+        }
+        steps++;
+        if (i % RENORMALIZE_PERIOD == RENORMALIZE_PERIOD - 1) {
+            p = reduceError(p);
+        }
+    }
+    return p;
+}
+
+/*
+ * False colour map (blue -> cyan -> green -> yellow -> red) of t in [0, 1]
+ */
+vec3 heat(float t) {
+    return clamp(vec3(1.5) - abs(4. * t - vec3(3., 2., 1.)), 0., 1.);
+}
+
+
+#include "quad_tile.glsl"
+
 vec2 tileCoordsAxesIsom(vec3 p) {
     // coordinates of p in the projective model
     float sizeKlein = arctanh(0.5 * sqrt2 * tileData.y / tileData.x);
@@ -92,17 +163,7 @@ vec2 tileCoordsSidesIsom(vec3 p) {
     vec2 s = vec2(sX, sY);
 
     vec2 aux = clamp(0.5 * s + vec2(0.5), vec2(0, 0), vec2(1, 1));
-    float x = aux.x;
-    float y = aux.y;
-
-    vec2 a0 = (1. - x) * (tileCorner3 - tileCorner0) + x * (tileCorner2 - tileCorner1);
-    vec2 a1 = (1. - y) * (tileCorner1 - tileCorner0) + y * (tileCorner2 - tileCorner3);
-    vec2 b = ((1. - y) * tileCorner0 + y * tileCorner3) - ((1. - x) * tileCorner0 + x * tileCorner1);
-    mat2 a = mat2(a0, -a1);
-
-    vec2 sol = inverse(a) * b;
-    float theta = sol.x;
-    return (1. - theta) * ((1. - x) * tileCorner0 + x * tileCorner1) + theta * ((1 - x) * tileCorner3 + x * tileCorner2);
+    return tileCoords(aux.x, aux.y);
 }
 
 
@@ -117,53 +178,44 @@ vec2 tileCoordsNaive(vec3 p) {
 void main() {
     vec2 q = 1.2 * v_text * (resolution / resolution.y);
     if (length(q) > 1.) {
-        f_color = backgroundColor;
+        f_color = debugMode == DEBUG_STEPS ? vec4(0) : backgroundColor;
+        return;
+    }
+
+
+    if (meanOnly != 0) {
+        f_color = vec4(tileMeanColor, 1);
         return;
     }
 
+    // hyperbolic size of the pixel, the metric of the disc model being 2 |dq| / (1 - |q|^2)
+    float pixelSize = 2. * (2.4 / resolution.y) / (1. - dot(q, q));
+    float lodFactor = 0.;
+    if (lod != 0 && debugMode == DEBUG_NONE) {
+        lodFactor = smoothstep(LOD_START, LOD_END, pixelSize / (2. * acosh(tileData.x)));
+        if (lodFactor >= 1.) {
+            // the pixel covers many tiles: no need to reduce it
+            f_color = vec4(tileMeanColor, 1);
+            return;
+        }
+    }
 
-    vec3 p, r;
-    float preDistP, preDistR;
-    p = disc2hyp(q);
+    vec3 p = disc2hyp(q);
     // moving the point p by the given isometry
     p = isometry * p;
-    preDistP = hypDot(ORIGIN, p);
-
-    for (int i = 0; i < iterations; i++) {
-        r = applyIsometry(shiftXP, p);
-        preDistR = hypDot(ORIGIN, r);
-        // no need to compare the exact distances,
-        // we only compute -cosh(dist(p1,p2)) = hypDot(p1,p2)
-        if (preDistR > preDistP) {
-            p = r;
-            preDistP = preDistR;
-            continue;
-        }
-        r = applyIsometry(shiftXN, p);
-        preDistR = hypDot(ORIGIN, r);
-        if (preDistR > preDistP) {
-            p = r;
-            preDistP = preDistR;
-            continue;
-        }
-        r = applyIsometry(shiftYP, p);
-        preDistR = hypDot(ORIGIN, r);
-        if (preDistR > preDistP) {
-            p = r;
-            preDistP = preDistR;
-            continue;
-        }
-        r = applyIsometry(shiftYN, p);
-        preDistR = hypDot(ORIGIN, r);
-        if (preDistR > preDistP) {
-            p = r;
-            preDistP = preDistR;
-            continue;
-        }
-        break;
+    int steps;
+    p = reduceToTile(p, steps);
+
+    if (debugMode == DEBUG_HEATMAP) {
+        f_color = vec4(heat(float(steps) / float(max(iterations, 1))), 1);
+        return;
+    }
+    if (debugMode == DEBUG_STEPS) {
+        f_color = vec4(float(min(steps, 255)) / 255., 0, 0, 1);
+        return;
     }
 
     vec2 coords = tileCoordsSidesIsom(p);
     vec3 color = texture(tileTexture, coords).rgb;
-    f_color = vec4(color, 1);
+    f_color = vec4(mix(color, tileMeanColor, lodFactor), 1);
 }
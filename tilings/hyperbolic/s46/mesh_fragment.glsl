@@ -0,0 +1,17 @@
+#version 410 core
+
+in vec2 v_coords;
+out vec4 f_color;
+
+uniform sampler2D tileTexture;
+uniform vec2 tileCorner0;
+uniform vec2 tileCorner1;
+uniform vec2 tileCorner2;
+uniform vec2 tileCorner3;
+
+#include "quad_tile.glsl"
+
+void main() {
+    vec2 aux = clamp(v_coords, vec2(0, 0), vec2(1, 1));
+    f_color = vec4(texture(tileTexture, tileCoords(aux.x, aux.y)).rgb, 1);
+}
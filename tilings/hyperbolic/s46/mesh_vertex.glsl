@@ -0,0 +1,24 @@
+#version 410 core
+// point of the fundamental tile in the hyperboloid model
+layout(location = 0) in vec3 in_point;
+// coordinates of the point in the unit square (cf. tileCoordsSidesIsom in fragment.glsl)
+layout(location = 1) in vec2 in_coords;
+// element of the group moving the fundamental tile to the drawn copy (one per instance)
+layout(location = 2) in mat3 in_copy;
+
+uniform vec2 resolution;
+uniform mat3 inverseIsometry;
+// Part of the picture covered by the viewport (cf. shaders/vertex.glsl)
+uniform vec2 viewOffset;
+uniform vec2 viewScale;
+
+out vec2 v_coords;
+
+void main() {
+    vec3 p = inverseIsometry * (in_copy * in_point);
+    // conversion from the hyperboloid model to the disc model, then to the screen (inverse of the main of fragment.glsl)
+    vec2 q = p.xy / (1. + p.z);
+    vec2 v = q / 1.2 * (resolution.y / resolution);
+    gl_Position = vec4((v - viewOffset) / viewScale, 0.0, 1.0);
+    v_coords = in_coords;
+}
@@ -1,13 +1,22 @@
-from PySide6.QtGui import QColor, QMatrix3x3, QVector2D, QVector4D
-from PySide6.QtWidgets import QFormLayout, QLabel, QColorDialog, QPushButton
-from numpy import array, pi
+from copy import copy
+from ctypes import c_void_p
+
+from PySide6.QtCore import QSize, QRect
+from PySide6.QtGui import QColor, QVector2D, QVector3D, QVector4D
+from PySide6.QtWidgets import QFormLayout, QLabel, QColorDialog, QPushButton, QCheckBox
+from numpy import array, pi, ndarray, zeros, bincount, linalg, ascontiguousarray, float32
 import OpenGL.GL as GL
 
 from tilings.abstract.tiling import Tiling as AbstractTiling
 from tilings.abstract.tiling import TilingDrawing as AbstractTilingDrawing
 from tilings.abstract.tiling import TilingOptions as AbstractTilingOptions
+from tilings.abstract.tiling import EXPORT_TILE_SIZE, view_uniforms
+from tilings.hyperbolic.mesh import tile_mesh, tile_copies
+from tilings.hyperbolic.cpu import tile_mean_color
+from utils.cpu import load_texture, to_numpy
 from utils.polygon import Polygon
 from utils.path_helper import get_resource_path
+from utils.shader_cache import shader_program
 
 SCALE_MIN = 10
 SCALE_MAX = 80
@@ -15,69 +24,297 @@ SCALE_DEFAULT = 40
 
 BASE_SCALE = 0.02
 
+ITERATIONS = 100
+
+# Modes de rendu (debugMode dans fragment.glsl)
+DEBUG_NONE = 0
+DEBUG_HEATMAP = 1
+DEBUG_STEPS = 2
+
+
+def square_uniforms() -> dict:
+    """
+    Uniformes ne dépendant ni des sommets ni des options : taille du carré du pavage {4,6},
+    translations le long de ses axes et isométrie de départ
+    """
+    square = Polygon(4, pi / 3)
+    ch_rho, sh_rho, ch_h, sh_h, ch_ell, sh_ell = square.lengths
+    ch2 = ch_h * ch_h + sh_h * sh_h
+    sh2 = 2 * sh_h * ch_h
+
+    shiftXP = array([
+        [ch2, 0, sh2],
+        [0, 1, 0],
+        [sh2, 0, ch2]
+    ])
+    shiftXN = array([
+        [ch2, 0, -sh2],
+        [0, 1, 0],
+        [-sh2, 0, ch2]
+    ])
+    shiftYP = array([
+        [1, 0, 0],
+        [0, ch2, sh2],
+        [0, sh2, ch2]
+    ])
+    shiftYN = array([
+        [1, 0, 0],
+        [0, ch2, -sh2],
+        [0, -sh2, ch2]
+    ])
+    isometry = array([
+        [ch_ell, sh_ell * sh_h, -sh_ell * ch_h],
+        [0, ch_h, -sh_h],
+        [-sh_ell, -ch_ell * sh_h, ch_ell * ch_h]
+    ]).transpose()
+
+    return {
+        "tileData": QVector2D(ch_rho, sh_rho),
+        "shiftXP": shiftXP,
+        "shiftXN": shiftXN,
+        "shiftYP": shiftYP,
+        "shiftYN": shiftYN,
+        "isometry": isometry
+    }
+
+
+def image_mean_color(image, rescaled_corners) -> QVector3D:
+    """
+    Couleur moyenne de la tuile, utilisée par le shader pour les pixels recouvrant de nombreuses tuiles (lod)
+    :param image: chemin ou QImage de la tuile
+    """
+    r, g, b = tile_mean_color(load_texture(image), [to_numpy(corner) for corner in rescaled_corners])
+    return QVector3D(r, g, b)
+
+
+# Calculés une seule fois, au chargement du module
+SQUARE_UNIFORMS = square_uniforms()
+INVERSE_ISOMETRY = linalg.inv(SQUARE_UNIFORMS["isometry"])
+
 
 class TilingDrawing(AbstractTilingDrawing):
     VERTEX_SHADER = get_resource_path("shaders/vertex.glsl")
     FRAGMENT_SHADER = get_resource_path("tilings/hyperbolic/s46/fragment.glsl")
+    WARPED_TILE = True
+    MESH_VERTEX_SHADER = get_resource_path("tilings/hyperbolic/s46/mesh_vertex.glsl")
+    MESH_FRAGMENT_SHADER = get_resource_path("tilings/hyperbolic/s46/mesh_fragment.glsl")
+    # tile_mean_color : couleur moyenne de la tuile, calculée à partir de l'image si elle n'est pas donnée
+    DEFAULTS = {'background_color': QColor(255, 255, 255, 255), 'debug_mode': DEBUG_NONE, 'lod': False,
+                'tile_mean_color': None}
+    # Le disque est dessiné pour |1.2 * v_text * (resolution / resolution.y)| <= 1
+    DISC_RADIUS = 1 / 1.2
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super(TilingDrawing, self).__init__(parent, path, img_size, corners)
 
+        self._debug_mode = self.DEFAULTS['debug_mode']
+        self._lod = self.DEFAULTS['lod']
+        self._tile_mean_color = None
+        self._tile_mean_corners = None
+
+        # Rendu par maillage : copies de la tuile énumérées une fois pour toutes, puis simplement rastérisées
+        self._mesh = False
+        self.mesh_program = None
+        self.mesh_vao = None
+        self.mesh_buffers = None
+        self.mesh_index_count = 0
+        self.copy_count = 0
+        self._copies_key = None
+        self._mean_only = False
+
+    @property
+    def debug_mode(self):
+        return self._debug_mode
+
+    @debug_mode.setter
+    def debug_mode(self, value):
+        self._debug_mode = value
+        self.update()
+
+    @property
+    def lod(self):
+        return self._lod
+
+    @lod.setter
+    def lod(self, value):
+        self._lod = value
+        self.update()
+
+    @property
+    def tile_mean_color(self):
+        """
+        Couleur moyenne de la tuile, recalculée uniquement lorsque ses sommets changent
+        """
+        key = tuple(corner.toTuple() for corner in self.rescaled_corners)
+        if key != self._tile_mean_corners:
+            self._tile_mean_color = image_mean_color(self.img, self.rescaled_corners)
+            self._tile_mean_corners = key
+        return self._tile_mean_color
+
+    @property
+    def mesh(self):
+        return self._mesh
+
+    @mesh.setter
+    def mesh(self, value):
+        self._mesh = value
+        self.update()
+
     def initializeGL(self):
         super().initializeGL()
         GL.glEnable(GL.GL_BLEND)
         GL.glBlendFunc(GL.GL_SRC_ALPHA, GL.GL_ONE_MINUS_SRC_ALPHA)
 
+        self.mesh_program = shader_program(self.MESH_VERTEX_SHADER, self.MESH_FRAGMENT_SHADER)
+
+        vertices, triangles = tile_mesh(self.current_uniforms(numpy=True))
+        self.mesh_index_count = triangles.size
+        self.copy_count = 0
+        self._copies_key = None
+
+        self.mesh_vao = GL.glGenVertexArrays(1)
+        GL.glBindVertexArray(self.mesh_vao)
+        self.mesh_buffers = GL.glGenBuffers(3)
+        vertex_buffer, index_buffer, copy_buffer = self.mesh_buffers
+
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vertex_buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, vertices.nbytes, vertices.tobytes(), GL.GL_STATIC_DRAW)
+        stride = vertices.strides[0]
+        GL.glEnableVertexAttribArray(0)
+        GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, GL.GL_FALSE, stride, c_void_p(0))
+        GL.glEnableVertexAttribArray(1)
+        GL.glVertexAttribPointer(1, 2, GL.GL_FLOAT, GL.GL_FALSE, stride, c_void_p(12))
+
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, triangles.nbytes, triangles.tobytes(), GL.GL_STATIC_DRAW)
+
+        # une matrice par instance, colonne par colonne (locations 2, 3 et 4)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, copy_buffer)
+        for column in range(3):
+            GL.glEnableVertexAttribArray(2 + column)
+            GL.glVertexAttribPointer(2 + column, 3, GL.GL_FLOAT, GL.GL_FALSE, 36, c_void_p(12 * column))
+            GL.glVertexAttribDivisor(2 + column, 1)
+
+        GL.glBindVertexArray(self.vao)
+
+    def cleanupGL(self):
+        super().cleanupGL()
+        if self.mesh_buffers is not None:
+            GL.glDeleteBuffers(3, self.mesh_buffers)
+            self.mesh_buffers = None
+        if self.mesh_vao:
+            GL.glDeleteVertexArrays(1, [self.mesh_vao])
+            self.mesh_vao = None
+        if self.mesh_program:
+            self.mesh_program.release()
+            self.mesh_program = None
+
     def setup_uniforms(self):
-        self.program.setUniformValue("resolution", self.parent().resolution)
-        square = Polygon(4, pi / 3)
-        ch_rho, sh_rho, ch_h, sh_h, ch_ell, sh_ell = square.lengths
-        ch2 = ch_h * ch_h + sh_h * sh_h
-        sh2 = 2 * sh_h * ch_h
-
-        self.program.setUniformValue("iterations", 100)
-        self.program.setUniformValue("tileData", QVector2D(ch_rho, sh_rho))
-
-        shiftXP = array([
-            [ch2, 0, sh2],
-            [0, 1, 0],
-            [sh2, 0, ch2]
-        ]).flatten()
-        shiftXN = array([
-            [ch2, 0, -sh2],
-            [0, 1, 0],
-            [-sh2, 0, ch2]
-        ]).flatten()
-        shiftYP = array([
-            [1, 0, 0],
-            [0, ch2, sh2],
-            [0, sh2, ch2]
-        ]).flatten()
-        shiftYN = array([
-            [1, 0, 0],
-            [0, ch2, -sh2],
-            [0, -sh2, ch2]
-        ]).flatten()
-        isometry = array([
-            [ch_ell, sh_ell * sh_h, -sh_ell * ch_h],
-            [0, ch_h, -sh_h],
-            [-sh_ell, -ch_ell * sh_h, ch_ell * ch_h]
-        ]).transpose().flatten()
-
-        self.program.setUniformValue("shiftXP", QMatrix3x3(shiftXP))
-        self.program.setUniformValue("shiftXN", QMatrix3x3(shiftXN))
-        self.program.setUniformValue("shiftYP", QMatrix3x3(shiftYP))
-        self.program.setUniformValue("shiftYN", QMatrix3x3(shiftYN))
-        self.program.setUniformValue("isometry", QMatrix3x3(isometry))
-
-        self.program.setUniformValue("tileCorner0", self.rescaled_corners[0])
-        self.program.setUniformValue("tileCorner1", self.rescaled_corners[1])
-        self.program.setUniformValue("tileCorner2", self.rescaled_corners[2])
-        self.program.setUniformValue("tileCorner3", self.rescaled_corners[3])
-
-        bg_color = self.parent().background_color
-        self.program.setUniformValue("backgroundColor", 
-            QVector4D(bg_color.redF(), bg_color.greenF(), bg_color.blueF(), bg_color.alphaF()))
+        super().setup_uniforms()
+        if self._mean_only:
+            self.uniform_cache.upload(self.program, {"meanOnly": 1, "tileMeanColor": self.tile_mean_color})
+
+    def update_copies(self, uniforms: dict):
+        """
+        Énumère les copies visibles de la tuile, seulement si l'isométrie ou la taille des pixels a changé
+        """
+        key = (uniforms["isometry"].tobytes(), uniforms["resolution"][1])
+        if key == self._copies_key:
+            return
+        copies = tile_copies(uniforms)
+        # les matrices sont transmises colonne par colonne
+        data = ascontiguousarray(copies.transpose(0, 2, 1), dtype=float32)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.mesh_buffers[2])
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, data.nbytes, data.tobytes(), GL.GL_STATIC_DRAW)
+        self.copy_count = len(copies)
+        self._copies_key = key
+
+    def frame_key(self):
+        # le rendu par maillage ne change pas les uniformes
+        return super().frame_key() + (self._mesh,)
+
+    def paint_tiling(self):
+        if not self._mesh or self._debug_mode != DEBUG_NONE:
+            super().paint_tiling()
+            return
+
+        # fond et couleur moyenne de la tuile, visible entre les copies plus petites qu'un pixel
+        GL.glBindVertexArray(self.vao)
+        self._mean_only = True
+        try:
+            super().paint_tiling()
+        finally:
+            self._mean_only = False
+
+        uniforms = self.current_uniforms()
+        self.update_copies(self.current_uniforms(numpy=True))
+        GL.glBindVertexArray(self.mesh_vao)
+        self.mesh_program.bind()
+        mesh_uniforms = {name: uniforms[name] for name in ("resolution", "tileCorner0", "tileCorner1",
+                                                           "tileCorner2", "tileCorner3")}
+        mesh_uniforms["inverseIsometry"] = INVERSE_ISOMETRY
+        self.uniform_cache.upload(self.mesh_program, mesh_uniforms)
+        self.uniform_cache.upload(self.mesh_program, view_uniforms(self.resolution, self.view_rect))
+        self.bind_tile_texture(self.mesh_program)
+        GL.glDrawElementsInstanced(GL.GL_TRIANGLES, self.mesh_index_count, GL.GL_UNSIGNED_INT, c_void_p(0),
+                                   self.copy_count)
+        self.mesh_program.release()
+        GL.glBindVertexArray(self.vao)
+
+    @property
+    def background_color(self):
+        return self.parent().background_color
+
+    @classmethod
+    def image_state(cls, state, image):
+        if not state.lod or state.tile_mean_color is not None:
+            return state
+        # sans fenêtre, la couleur moyenne est calculée comme par le widget (cf. tile_mean_color)
+        state = copy(state)
+        state.tile_mean_color = image_mean_color(image, state.rescaled_corners)
+        return state
+
+    @classmethod
+    def uniforms(cls, state):
+        bg_color = state.background_color
+        # sans couleur moyenne, les pixels proches du bord sont calculés normalement
+        mean_color = state.tile_mean_color if state.lod else None
+        return {
+            "resolution": state.resolution,
+            "iterations": ITERATIONS,
+            **SQUARE_UNIFORMS,
+            "tileCorner0": state.rescaled_corners[0],
+            "tileCorner1": state.rescaled_corners[1],
+            "tileCorner2": state.rescaled_corners[2],
+            "tileCorner3": state.rescaled_corners[3],
+            "backgroundColor": QVector4D(bg_color.redF(), bg_color.greenF(), bg_color.blueF(), bg_color.alphaF()),
+            "debugMode": state.debug_mode,
+            "lod": int(mean_color is not None),
+            "tileMeanColor": mean_color if mean_color is not None else QVector3D(),
+            "meanOnly": 0
+        }
+
+    def iteration_histogram(self) -> ndarray:
+        """
+        Nombre de pixels du disque ayant nécessité 0, 1, 2, ... étapes de réduction,
+        pour l'image affichée (les nombres d'étapes sont relus dans le framebuffer).
+        """
+        size = self.resolution
+        tile = min(EXPORT_TILE_SIZE, size.width()), min(EXPORT_TILE_SIZE, size.height())
+        rects = (QRect(x, y, min(tile[0], size.width() - x), min(tile[1], size.height() - y))
+                 for y in range(0, size.height(), tile[1]) for x in range(0, size.width(), tile[0]))
+
+        histogram = zeros(ITERATIONS + 1, dtype=int)
+        debug_mode = self._debug_mode
+        self._debug_mode = DEBUG_STEPS
+        try:
+            for _, pixels in self.render_rects(size, rects, QSize(*tile)):
+                # the pixels outside of the disc are transparent
+                steps = pixels[..., 0][pixels[..., 3] == 255]
+                histogram += bincount(steps, minlength=ITERATIONS + 1)[:ITERATIONS + 1]
+        finally:
+            self._debug_mode = debug_mode
+        return histogram
 
 
 class TilingOptions(AbstractTilingOptions):
@@ -94,6 +331,46 @@ class TilingOptions(AbstractTilingOptions):
         self.color_dialog.setOption(QColorDialog.ShowAlphaChannel)
         self.layout.addRow("Couleur de fond:", self.background_color_button)
 
+        self.heatmap_checkbox = QCheckBox("Afficher le nombre d'étapes de réduction")
+        self.heatmap_checkbox.toggled.connect(self.toggle_heatmap)
+        self.layout.addRow("Carte de chaleur:", self.heatmap_checkbox)
+
+        self.lod_checkbox = QCheckBox("Couleur moyenne des tuiles près du bord")
+        self.lod_checkbox.setChecked(TilingDrawing.DEFAULTS['lod'])
+        self.lod_checkbox.toggled.connect(self.toggle_lod)
+        self.layout.addRow("Niveau de détail:", self.lod_checkbox)
+
+        self.mesh_checkbox = QCheckBox("Dessiner les copies de la tuile (maillage)")
+        self.mesh_checkbox.toggled.connect(self.toggle_mesh)
+        self.layout.addRow("Rendu géométrique:", self.mesh_checkbox)
+
+        self.histogram_button = QPushButton("Calculer l'histogramme")
+        self.histogram_button.clicked.connect(self.show_histogram)
+        self.histogram_label = QLabel()
+        self.layout.addRow("Étapes de réduction:", self.histogram_button)
+        self.layout.addRow(self.histogram_label)
+
+    def toggle_heatmap(self, checked: bool):
+        self.parent().drawing.debug_mode = DEBUG_HEATMAP if checked else DEBUG_NONE
+
+    def toggle_lod(self, checked: bool):
+        self.parent().drawing.lod = checked
+
+    def toggle_mesh(self, checked: bool):
+        self.parent().drawing.mesh = checked
+
+    def show_histogram(self):
+        histogram = self.parent().drawing.iteration_histogram()
+        pixels = histogram.sum()
+        if pixels == 0:
+            self.histogram_label.setText("Aucun pixel dans le disque.")
+            return
+        mean = (histogram * range(len(histogram))).sum() / pixels
+        maximum = histogram.nonzero()[0].max()
+        self.histogram_label.setText(
+            f"{pixels} pixels, {mean:.2f} étapes en moyenne, {maximum} au maximum "
+            f"({histogram[ITERATIONS]} pixels limités à {ITERATIONS})")
+
     def choose_background_color(self):
         self.color_dialog.setCurrentColor(self.parent().background_color)
         
@@ -101,7 +378,6 @@ class TilingOptions(AbstractTilingOptions):
             color = self.color_dialog.currentColor()
             print(f"Couleur sélectionnée : {color.name()}")
             self.parent().background_color = color
-            self.parent().drawing.setup_uniforms()
             self.parent().drawing.update()
         else:
             print("Aucune couleur valide sélectionnée.")
@@ -117,4 +393,4 @@ class Tiling(AbstractTiling):
 
     def __init__(self, path, img_size, corners, resolution=None):
         super(Tiling, self).__init__(path, img_size, corners, resolution)
-        self.background_color = QColor(255, 255, 255, 255)
\ No newline at end of file
+        self.background_color = QColor(TilingDrawing.DEFAULTS['background_color'])
\ No newline at end of file
@@ -0,0 +1,154 @@
+"""
+Rendu des pavages sphériques avec NumPy, sans contexte OpenGL.
+Les calculs reprennent ceux des fragment shaders (proj_inverse_sphere, choix de la face, translations),
+et toute une série d'angles de rotation est dessinée en un seul appel :
+les rayons de chaque pixel ne sont calculés qu'une fois pour toutes les images.
+"""
+from copy import copy
+from typing import Optional, Sequence, Tuple
+
+from numpy import ndarray, array, sqrt, empty, linalg, clip, pi, arange, uint8, full, zeros, cross, stack
+
+from tilings.abstract.tiling import TilingState
+from tilings.spherical.tiling import BASE_SPEED, SPEED1_DEFAULT, SPEED2_DEFAULT
+from utils.cpu import uniforms_to_numpy, load_texture, sample, tile_coords, screen_coords, to_pixels, render_bands
+
+# Zoom applied to the screen coordinates before the projection (cf. main of the fragment shaders)
+DISC_ZOOM = 1.2
+
+
+def proj_inverse_sphere(m: ndarray, sphere_data: ndarray) -> ndarray:
+    """
+    Points of the unit sphere seen through the points m (array of shape (n, 2)) of the screen
+    """
+    depth, radius = sphere_data
+    aux0 = depth * depth - radius * radius
+    fm = empty((m.shape[0], 3))
+    fm[:, 0:2] = m
+    fm[:, 2] = -sqrt(aux0) / radius
+    # fc = (0, 0, -depth)
+    aux1 = -depth * fm[:, 2]
+    aux2 = (fm * fm).sum(axis=1)
+    lam = (aux1 - sqrt(aux1 * aux1 - aux2 * aux0)) / aux2
+    p = lam[:, None] * fm
+    p[:, 2] += depth
+    return p / linalg.norm(p, axis=1)[:, None]
+
+
+def face_folds(drawing_cls, uniforms: dict) -> Tuple[ndarray, ndarray]:
+    """
+    Centers of the faces of the polyhedron and the rotations moving each face to the fundamental one
+    :return: arrays of shape (faces, 3) and (faces, 3, 3)
+    """
+    copies = drawing_cls.copies(uniforms)
+    centers = copies @ drawing_cls.FACE.mean(axis=0)
+    return centers, copies.transpose(0, 2, 1)
+
+
+def polygon_tile_coords(p: ndarray, uniforms: dict) -> ndarray:
+    """
+    Coordinates in the texture of the points p of the fundamental face of a polyhedron (cf. tileCoords
+    in tilings/spherical/polyhedron.glsl): the face is split in triangles (center, vertex i, vertex i + 1)
+    """
+    n = int(uniforms["cornerCount"])
+    vertices = uniforms["faceVertices"][:n]
+    corners = uniforms["tileCorners"][:n]
+    normal = uniforms["faceNormals"][0]
+    center = vertices.mean(axis=0)
+    tile_center = corners.mean(axis=0)
+    x = p * (center @ normal) / (p @ normal)[:, None]
+
+    best = full((p.shape[0], 3), -1.)
+    index = zeros(p.shape[0], dtype=int)
+    for i in range(n):
+        a, b = vertices[i], vertices[(i + 1) % n]
+        area = cross(b - a, center - a) @ normal
+        la = cross(b - x, center - x) @ normal / area
+        lb = cross(center - x, a - x) @ normal / area
+        barycentric = stack([la, lb, 1. - la - lb], axis=1)
+        better = barycentric.min(axis=1) > best.min(axis=1)
+        best[better] = barycentric[better]
+        index[better] = i
+    return best[:, 0:1] * corners[index] + best[:, 1:2] * corners[(index + 1) % n] + best[:, 2:3] * tile_center
+
+
+def face_tile_coords(drawing_cls, uniforms: dict, p: ndarray) -> ndarray:
+    """
+    Coordinates in the texture of the points p of the fundamental face (cf. tileCoords)
+    """
+    if "tileCorners" in uniforms:
+        return polygon_tile_coords(p, uniforms)
+    if len(drawing_cls.FACE) == 3:
+        aux = p / p.sum(axis=1)[:, None]
+        return tile_coords(aux[:, 1:3], uniforms)
+    return tile_coords(clip(0.5 * p[:, 0:2] / p[:, 2:3] + 0.5, 0., 1.), uniforms)
+
+
+def colors(drawing_cls, uniforms: dict, texture: ndarray, q: ndarray, isometry: ndarray) -> ndarray:
+    """
+    Colors (array of shape (n, 3)) of the points q of the sphere, seen after the rotation isometry
+    """
+    centers, folds = face_folds(drawing_cls, uniforms)
+    p = q @ isometry.transpose()
+    # the face of a point is the one whose center is the closest, as the tests of the fragment shaders do
+    faces = (p @ centers.transpose()).argmax(axis=1)
+    p = (folds[faces] @ p[:, :, None])[:, :, 0]
+    return sample(texture, face_tile_coords(drawing_cls, uniforms, p))[:, 0:3]
+
+
+def render_band(context, start: int, stop: int) -> ndarray:
+    drawing_cls, uniforms, isometries, texture = context
+    resolution = uniforms["resolution"]
+    width = int(resolution[0])
+    m = DISC_ZOOM * screen_coords(resolution, start, stop) * (resolution / resolution[1])
+    inside = linalg.norm(m, axis=1) <= 1.
+    # the rays are shared by all the frames
+    q = proj_inverse_sphere(m[inside], uniforms["sphereData"])
+
+    frames = empty((len(isometries), stop - start, width, 4), dtype=uint8)
+    for i, isometry in enumerate(isometries):
+        result = empty((m.shape[0], 4))
+        result[:] = 1.
+        result[inside, 0:3] = colors(drawing_cls, uniforms, texture, q, isometry)
+        frames[i] = to_pixels(result, width)
+    return frames
+
+
+def animation_angles(count: int, start: Sequence[float] = (0., 0.), speed1: int = SPEED1_DEFAULT,
+                     speed2: int = SPEED2_DEFAULT) -> ndarray:
+    """
+    Angles des count premières images de l'animation, comme les calcule TilingDrawing.update_angles
+    :return: tableau de forme (count, 2)
+    """
+    steps = arange(count)[:, None] * BASE_SPEED * array([speed1, speed2])
+    return (array(start) + steps) % (2 * pi)
+
+
+def render_frames(tiling_cls, image, state: TilingState, angles: Sequence[Sequence[float]],
+                  processes: Optional[int] = None) -> ndarray:
+    """
+    Rendu d'une série d'images d'un pavage sphérique sur le processeur, une par couple d'angles de rotation.
+    :param tiling_cls: la classe du pavage (par exemple tilings.spherical.s34.tiling.Tiling)
+    :param image: chemin ou QImage de la tuile
+    :param state: état du pavage (sommets, résolution)
+    :param angles: angles de rotation des images (cf. animation_angles)
+    :param processes: nombre de processus utilisés (tous les cœurs par défaut)
+    :return: tableau de pixels RGBA de forme (images, hauteur, largeur, 4)
+    """
+    drawing_cls = tiling_cls.DRAWING_CLASS
+    isometries = []
+    for frame_angles in angles:
+        frame_state = copy(state)
+        frame_state.angles = frame_angles
+        isometries.append(uniforms_to_numpy(drawing_cls.uniforms(frame_state))["isometry"])
+    uniforms = uniforms_to_numpy(drawing_cls.uniforms(state))
+    texture = load_texture(image)
+    return render_bands(render_band, (drawing_cls, uniforms, isometries, texture), state.resolution, processes)
+
+
+def render(tiling_cls, image, state: TilingState, processes: Optional[int] = None) -> ndarray:
+    """
+    Rendu d'un pavage sphérique sur le processeur, pour les angles de rotation de state.
+    :return: tableau de pixels RGBA de forme (hauteur, largeur, 4)
+    """
+    return render_frames(tiling_cls, image, state, [state.angles], processes)[0]
@@ -0,0 +1,40 @@
+#version 410 core
+
+in vec2 v_text;
+out vec4 f_color;
+
+uniform vec2 sphereData;
+
+uniform vec2 resolution;
+uniform mat3 isometry;
+
+// colours of the whole tiling of the sphere, baked by the fragment shader of the tiling
+uniform samplerCube tileCubeMap;
+
+
+vec3 proj_inverse_sphere(vec2 m) {
+    float depthSphere = sphereData.x;
+    float radiusSphere = sphereData.y;
+    float aux0 = depthSphere * depthSphere - radiusSphere * radiusSphere;
+    vec3 f = vec3(0, 0, sqrt(aux0) / radiusSphere);
+    vec3 fc = vec3(0, 0, -depthSphere);
+    vec3 fm = vec3(m, 0) - f;
+    float aux1 = dot(fc, fm);
+    float aux2 = dot(fm, fm);
+    float lambda = (aux1 - sqrt(aux1 * aux1 - aux2 * aux0)) / aux2;
+    return normalize(-fc + lambda * fm);
+}
+
+
+void main() {
+    vec2 m = 1.2 * v_text * (resolution / resolution.y);
+
+    if (length(m) > 1.) {
+        f_color = vec4(1, 1, 1, 1);
+        return;
+    }
+
+    // only the view ray is rotated, the tiling itself being read from the cube map
+    vec3 p = isometry * proj_inverse_sphere(m);
+    f_color = vec4(texture(tileCubeMap, p).rgb, 1);
+}
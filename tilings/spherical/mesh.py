@@ -0,0 +1,69 @@
+"""
+Géométrie des pavages sphériques dessinés sous forme de maillages :
+la face fondamentale du polyèdre est subdivisée en triangles, puis envoyée sur chacune des autres faces
+par l'inverse des isométries appliquées par le fragment shader (FACE_FOLDS).
+"""
+from numpy import ndarray, array, identity, float32, uint32
+
+# Number of subdivisions of each side of a face
+MESH_SUBDIVISIONS = 32
+
+
+def face_copies(uniforms: dict, face_folds) -> ndarray:
+    """
+    Rotations moving the fundamental face to each face of the polyhedron
+    :param face_folds: for each face, the names of the shifts applied by the fragment shader to its points
+    :return: array of shape (number of faces, 3, 3)
+    """
+    copies = []
+    for shifts in face_folds:
+        fold = identity(3)
+        for name in shifts:
+            fold = uniforms[name] @ fold
+        # the inverse of a rotation is its transpose
+        copies.append(fold.transpose())
+    return array(copies)
+
+
+def face_mesh(corners: ndarray, subdivisions: int = MESH_SUBDIVISIONS):
+    """
+    Subdivided mesh of a flat face of the polyhedron
+    :param corners: array of shape (number of vertices, 3), vertices of the face
+    :return: the vertices, array of shape (n, 3), and the indices of the triangles, array of shape (m, 3)
+    """
+    n = subdivisions + 1
+    points = []
+    triangles = []
+    if len(corners) != 4:
+        # triangles (c0, c1, c2) or, for other polygons, (center, vertex i, vertex i + 1)
+        if len(corners) == 3:
+            fan = [corners]
+        else:
+            center = corners.mean(axis=0)
+            fan = [(center, corners[i], corners[(i + 1) % len(corners)]) for i in range(len(corners))]
+        for c0, c1, c2 in fan:
+            # rows of decreasing length, the row j having n - j points
+            starts = []
+            for j in range(n):
+                starts.append(len(points))
+                for i in range(n - j):
+                    a, b = i / subdivisions, j / subdivisions
+                    points.append((1. - a - b) * c0 + a * c1 + b * c2)
+            for j in range(subdivisions):
+                for i in range(subdivisions - j):
+                    k, above = starts[j] + i, starts[j + 1] + i
+                    triangles.append([k, k + 1, above])
+                    if i < subdivisions - j - 1:
+                        triangles.append([k + 1, above + 1, above])
+    else:
+        c0, c1, c2, c3 = corners
+        for j in range(n):
+            for i in range(n):
+                x, y = i / subdivisions, j / subdivisions
+                points.append((1. - y) * ((1. - x) * c0 + x * c1) + y * ((1. - x) * c3 + x * c2))
+        for j in range(subdivisions):
+            for i in range(subdivisions):
+                k = j * n + i
+                triangles.append([k, k + 1, k + n + 1])
+                triangles.append([k, k + n + 1, k + n])
+    return array(points, dtype=float32), array(triangles, dtype=uint32)
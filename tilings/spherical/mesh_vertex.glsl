@@ -0,0 +1,32 @@
+#version 410 core
+// point of the fundamental face of the polyhedron
+layout(location = 0) in vec3 in_point;
+// rotation moving the fundamental face to the drawn face (one per instance)
+layout(location = 2) in mat3 in_copy;
+
+uniform vec2 sphereData;
+uniform vec2 resolution;
+uniform mat3 isometry;
+// Part of the picture covered by the viewport (cf. shaders/vertex.glsl)
+uniform vec2 viewOffset;
+uniform vec2 viewScale;
+
+out vec3 v_point;
+out float gl_ClipDistance[1];
+
+void main() {
+    float depthSphere = sphereData.x;
+    float radiusSphere = sphereData.y;
+    // point of the sphere before the rotation, the fragment shaders computing p = isometry * q
+    vec3 n = transpose(isometry) * normalize(in_copy * in_point);
+
+    // inverse of proj_inverse_sphere
+    float focal = sqrt(depthSphere * depthSphere - radiusSphere * radiusSphere) / radiusSphere;
+    vec2 m = radiusSphere * focal * n.xy / (depthSphere - radiusSphere * n.z);
+    vec2 v = m / 1.2 * (resolution.y / resolution);
+    gl_Position = vec4((v - viewOffset) / viewScale, 0.0, 1.0);
+
+    // only the part of the sphere seen from the focal point is drawn
+    gl_ClipDistance[0] = n.z - radiusSphere / depthSphere;
+    v_point = in_point;
+}
@@ -0,0 +1,92 @@
+#version 410 core
+
+// sizes of the uniform arrays (faces of the icosahedron, vertices of the pentagons of the dodecahedron)
+const int MAX_FACES = 20;
+const int MAX_CORNERS = 5;
+
+in vec2 v_text;
+out vec4 f_color;
+
+uniform vec2 sphereData;
+uniform vec2 resolution;
+uniform mat3 isometry;
+// face of the cube map being baked (cf. tilings/spherical/cubemap.glsl), -1 when drawing the sphere
+uniform int bakeFace;
+
+uniform sampler2D tileTexture;
+
+uniform int faceCount;
+// unit normals of the faces of the polyhedron
+uniform vec3 faceNormals[MAX_FACES];
+// rotations moving each face to the fundamental one (the first face)
+uniform mat3 faceRotations[MAX_FACES];
+// vertices of the fundamental face and corresponding corners of the tile in the texture
+uniform int cornerCount;
+uniform vec3 faceVertices[MAX_CORNERS];
+uniform vec2 tileCorners[MAX_CORNERS];
+
+
+#include "polygon_tile.glsl"
+
+vec3 proj_inverse_sphere(vec2 m) {
+    float depthSphere = sphereData.x;
+    float radiusSphere = sphereData.y;
+    float aux0 = depthSphere * depthSphere - radiusSphere * radiusSphere;
+    vec3 f = vec3(0, 0, sqrt(aux0) / radiusSphere);
+    vec3 fc = vec3(0, 0, -depthSphere);
+    vec3 fm = vec3(m, 0) - f;
+    float aux1 = dot(fc, fm);
+    float aux2 = dot(fm, fm);
+    float lambda = (aux1 - sqrt(aux1 * aux1 - aux2 * aux0)) / aux2;
+    return normalize(-fc + lambda * fm);
+}
+
+/*
+ * Direction of the texel of coordinates st (in [-1, 1]) of the given face of a cube map,
+ * with the conventions of the OpenGL specification (faces +X, -X, +Y, -Y, +Z, -Z)
+ */
+vec3 cubeMapDirection(int face, vec2 st) {
+    switch (face) {
+        case 0: return vec3(1, -st.y, -st.x);
+        case 1: return vec3(-1, -st.y, st.x);
+        case 2: return vec3(st.x, 1, st.y);
+        case 3: return vec3(st.x, -1, -st.y);
+        case 4: return vec3(st.x, -st.y, 1);
+        default: return vec3(-st.x, -st.y, -1);
+    }
+}
+
+
+void main() {
+    vec3 p;
+
+    if (bakeFace >= 0) {
+        // the whole sphere is baked once, without any isometry
+        p = normalize(cubeMapDirection(bakeFace, v_text));
+    } else {
+        vec2 m = 1.2 * v_text * (resolution / resolution.y);
+
+        if (length(m) > 1.) {
+            f_color = vec4(1, 1, 1, 1);
+            return;
+        }
+
+        p = normalize(isometry * proj_inverse_sphere(m));
+    }
+
+    // the face of p is the one whose normal is the closest to p
+    int face = 0;
+    float best = dot(p, faceNormals[0]);
+    for (int i = 1; i < faceCount; i++) {
+        float d = dot(p, faceNormals[i]);
+        if (d > best) {
+            best = d;
+            face = i;
+        }
+    }
+    p = faceRotations[face] * p;
+
+    vec2 coords = tileCoords(p);
+    vec3 color = texture(tileTexture, coords).rgb;
+    f_color = vec4(color, 1);
+}
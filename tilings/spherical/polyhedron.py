@@ -0,0 +1,70 @@
+from numpy import array, cos, sin
+
+from tilings.spherical.tiling import Tiling as AbstractTiling
+from tilings.spherical.tiling import TilingDrawing as AbstractTilingDrawing
+from tilings.spherical.tiling import TilingOptions as AbstractTilingOptions
+from tilings.spherical.tiling import SPHERE_DATA
+from utils.path_helper import get_resource_path
+
+
+class TilingDrawing(AbstractTilingDrawing):
+    """
+    Pavage de la sphère par les faces d'un polyèdre régulier.
+    La face d'un point est celle dont la normale est la plus proche (un seul produit scalaire par face),
+    et les rotations ramenant chaque face sur la face fondamentale sont calculées une fois pour toutes,
+    puis transmises au shader sous forme de tableaux d'uniformes.
+    """
+    VERTEX_SHADER = get_resource_path("shaders/vertex.glsl")
+    FRAGMENT_SHADER = get_resource_path("tilings/spherical/polyhedron.glsl")
+    MESH_FRAGMENT_SHADER = get_resource_path("tilings/spherical/polyhedron_mesh.glsl")
+    # Polyèdre régulier (utils.polyhedron.Polyhedron) dont les faces pavent la sphère
+    POLYHEDRON = None
+
+    def __init__(self, parent: 'Tiling', path, img_size, corners):
+        super(TilingDrawing, self).__init__(parent, path, img_size, corners)
+
+    @classmethod
+    def copies(cls, uniforms: dict):
+        return uniforms["faceRotations"].transpose(0, 2, 1)
+
+    @classmethod
+    def uniforms(cls, state):
+        c1 = cos(state.angles[0])
+        s1 = sin(state.angles[0])
+        rot1 = array([
+            [c1, 0, -s1],
+            [0, 1, 0],
+            [s1, 0, c1]
+        ])
+        c2 = cos(state.angles[1])
+        s2 = sin(state.angles[1])
+        rot2 = array([
+            [1, 0, 0],
+            [0, c2, -s2],
+            [0, s2, c2]
+        ])
+        isom = rot1 @ rot2
+
+        face = cls.POLYHEDRON.faces[0]
+        return {
+            "sphereData": SPHERE_DATA,
+            "resolution": state.resolution,
+            "isometry": isom,
+            "faceCount": len(cls.POLYHEDRON.faces),
+            "faceNormals": cls.POLYHEDRON.normals,
+            "faceRotations": cls.POLYHEDRON.rotations,
+            "cornerCount": len(face),
+            "faceVertices": face,
+            "tileCorners": array([[p.x(), p.y()] for p in state.rescaled_corners]),
+            "bakeFace": -1
+        }
+
+
+class TilingOptions(AbstractTilingOptions):
+    def __init__(self, parent: 'Tiling'):
+        super(TilingOptions, self).__init__(parent)
+
+
+class Tiling(AbstractTiling):
+    DRAWING_CLASS = TilingDrawing
+    OPTIONS_CLASS = TilingOptions
@@ -0,0 +1,30 @@
+#version 410 core
+
+const int MAX_FACES = 20;
+const int MAX_CORNERS = 5;
+
+// point of the fundamental face of the polyhedron (cf. tilings/spherical/mesh_vertex.glsl)
+in vec3 v_point;
+out vec4 f_color;
+
+uniform sampler2D tileTexture;
+
+uniform int faceCount;
+// unit normals of the faces of the polyhedron
+uniform vec3 faceNormals[MAX_FACES];
+// rotations moving each face to the fundamental one (the first face)
+uniform mat3 faceRotations[MAX_FACES];
+// vertices of the fundamental face and corresponding corners of the tile in the texture
+uniform int cornerCount;
+uniform vec3 faceVertices[MAX_CORNERS];
+uniform vec2 tileCorners[MAX_CORNERS];
+
+
+#include "polygon_tile.glsl"
+
+
+void main() {
+    vec2 coords = tileCoords(v_point);
+    vec3 color = texture(tileTexture, coords).rgb;
+    f_color = vec4(color, 1);
+}
@@ -12,6 +12,8 @@ uniform vec2 sphereData;
 
 uniform vec2 resolution;
 uniform mat3 isometry;
+// face of the cube map being baked (cf. tilings/spherical/cubemap.glsl), -1 when drawing the sphere
+uniform int bakeFace;
 
 uniform sampler2D tileTexture;
 uniform vec2 tileCorner0;
@@ -26,19 +28,14 @@ uniform mat3 shiftZP;
 uniform mat3 shiftZN;
 
 
-vec3 reduceError(vec3 p) {
-    return normalize(p);
-}
+#include "sphere.glsl"
 
-vec3 applyIsometry(mat3 isom, vec3 p) {
-    vec3 res = isom * p;
-    return reduceError(res);
-}
+#include "triangle_tile.glsl"
 
 vec2 tileCoords(vec3 p) {
     float sum = dot(p, vec3(1.0));
     vec3 aux = p / sum;
-    return aux.x * tileCorner0 + aux.y * tileCorner1 + aux.z * tileCorner2;
+    return tileCoords(aux.yz);
 }
 
 vec3 proj_inverse_sphere(vec2 m) {
@@ -54,19 +51,40 @@ vec3 proj_inverse_sphere(vec2 m) {
     return normalize(-fc + lambda * fm);
 }
 
+/*
+ * Direction of the texel of coordinates st (in [-1, 1]) of the given face of a cube map,
+ * with the conventions of the OpenGL specification (faces +X, -X, +Y, -Y, +Z, -Z)
+ */
+vec3 cubeMapDirection(int face, vec2 st) {
+    switch (face) {
+        case 0: return vec3(1, -st.y, -st.x);
+        case 1: return vec3(-1, -st.y, st.x);
+        case 2: return vec3(st.x, 1, st.y);
+        case 3: return vec3(st.x, -1, -st.y);
+        case 4: return vec3(st.x, -st.y, 1);
+        default: return vec3(-st.x, -st.y, -1);
+    }
+}
+
 
 void main() {
-    vec2 m = 1.2 * v_text * (resolution / resolution.y);
+    int face_id;
+    vec3 p;
 
-    if (length(m) > 1.) {
-        f_color = vec4(1, 1, 1, 1);
-        return;
-    }
+    if (bakeFace >= 0) {
+        // the whole sphere is baked once, without any isometry
+        p = normalize(cubeMapDirection(bakeFace, v_text));
+    } else {
+        vec2 m = 1.2 * v_text * (resolution / resolution.y);
 
-    vec3 q = proj_inverse_sphere(m);
+        if (length(m) > 1.) {
+            f_color = vec4(1, 1, 1, 1);
+            return;
+        }
 
-    int face_id;
-    vec3 p = applyIsometry(isometry, q);
+        vec3 q = proj_inverse_sphere(m);
+        p = applyIsometry(isometry, q);
+    }
 
     if (p.x >= 0 && p.y >= 0 && p.z >= 0) {
         face_id = 0;
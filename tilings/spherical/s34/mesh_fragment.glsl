@@ -0,0 +1,25 @@
+#version 410 core
+
+// point of the fundamental face of the polyhedron (cf. tilings/spherical/mesh_vertex.glsl)
+in vec3 v_point;
+out vec4 f_color;
+
+uniform sampler2D tileTexture;
+uniform vec2 tileCorner0;
+uniform vec2 tileCorner1;
+uniform vec2 tileCorner2;
+
+#include "triangle_tile.glsl"
+
+vec2 tileCoords(vec3 p) {
+    float sum = dot(p, vec3(1.0));
+    vec3 aux = p / sum;
+    return tileCoords(aux.yz);
+}
+
+
+void main() {
+    vec2 coords = tileCoords(v_point);
+    vec3 color = texture(tileTexture, coords).rgb;
+    f_color = vec4(color, 1);
+}
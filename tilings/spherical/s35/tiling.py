@@ -0,0 +1,29 @@
+from tilings.spherical.polyhedron import Tiling as AbstractTiling
+from tilings.spherical.polyhedron import TilingDrawing as AbstractTilingDrawing
+from tilings.spherical.polyhedron import TilingOptions as AbstractTilingOptions
+from utils.polyhedron import Polyhedron
+
+
+class TilingDrawing(AbstractTilingDrawing):
+    # Faces du icosaèdre
+    POLYHEDRON = Polyhedron(3, 5)
+    FACE = POLYHEDRON.faces[0]
+
+    def __init__(self, parent: 'Tiling', path, img_size, corners):
+        super(TilingDrawing, self).__init__(parent, path, img_size, corners)
+
+
+class TilingOptions(AbstractTilingOptions):
+    def __init__(self, parent: 'Tiling'):
+        super(TilingOptions, self).__init__(parent)
+
+
+class Tiling(AbstractTiling):
+    CODE = '{3,5}'
+    SHAPE = "triangle équilatéral"
+    CORNER_NB = 3
+    DRAWING_CLASS = TilingDrawing
+    OPTIONS_CLASS = TilingOptions
+
+    def __init__(self, path, img_size, corners, resolution=None):
+        super(Tiling, self).__init__(path, img_size, corners, resolution)
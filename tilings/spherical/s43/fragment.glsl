@@ -8,6 +8,8 @@ out vec4 f_color;
 uniform vec2 sphereData;
 uniform vec2 resolution;
 uniform mat3 isometry;
+// face of the cube map being baked (cf. tilings/spherical/cubemap.glsl), -1 when drawing the sphere
+uniform int bakeFace;
 
 uniform sampler2D tileTexture;
 uniform vec2 tileCorner0;
@@ -21,30 +23,15 @@ uniform mat3 shiftYP;
 uniform mat3 shiftYN;
 
 
-vec3 reduceError(vec3 p) {
-    return normalize(p);
-}
+#include "sphere.glsl"
 
-vec3 applyIsometry(mat3 isom, vec3 p) {
-    vec3 res = isom * p;
-    return reduceError(res);
-}
+#include "quad_tile.glsl"
 
 vec2 tileCoords(vec3 p) {
     vec2 proj_coords = p.xy / p.z;
     vec2 aux = clamp(0.5 * proj_coords + vec2(0.5), vec2(0, 0), vec2(1, 1));
 
-    float x = aux.x;
-    float y = aux.y;
-
-    vec2 a0 = (1. - x) * (tileCorner3 - tileCorner0) + x * (tileCorner2 - tileCorner1);
-    vec2 a1 = (1. - y) * (tileCorner1 - tileCorner0) + y * (tileCorner2 - tileCorner3);
-    vec2 b = ((1. - y) * tileCorner0 + y * tileCorner3) - ((1. - x) * tileCorner0 + x * tileCorner1);
-    mat2 a = mat2(a0, -a1);
-
-    vec2 sol = inverse(a) * b;
-    float theta = sol.x;
-    return (1. - theta) * ((1. - x) * tileCorner0 + x * tileCorner1) + theta * ((1 - x) * tileCorner3 + x * tileCorner2);
+    return tileCoords(aux.x, aux.y);
 }
 
 vec3 proj_inverse_sphere(vec2 m) {
@@ -60,19 +47,40 @@ vec3 proj_inverse_sphere(vec2 m) {
     return normalize(-fc + lambda * fm);
 }
 
+/*
+ * Direction of the texel of coordinates st (in [-1, 1]) of the given face of a cube map,
+ * with the conventions of the OpenGL specification (faces +X, -X, +Y, -Y, +Z, -Z)
+ */
+vec3 cubeMapDirection(int face, vec2 st) {
+    switch (face) {
+        case 0: return vec3(1, -st.y, -st.x);
+        case 1: return vec3(-1, -st.y, st.x);
+        case 2: return vec3(st.x, 1, st.y);
+        case 3: return vec3(st.x, -1, -st.y);
+        case 4: return vec3(st.x, -st.y, 1);
+        default: return vec3(-st.x, -st.y, -1);
+    }
+}
+
 
 void main() {
-    vec2 m = 1.2 * v_text * (resolution / resolution.y);
+    int face_id;
+    vec3 p;
 
-    if (length(m) > 1.) {
-        f_color = vec4(1, 1, 1, 1);
-        return;
-    }
+    if (bakeFace >= 0) {
+        // the whole sphere is baked once, without any isometry
+        p = normalize(cubeMapDirection(bakeFace, v_text));
+    } else {
+        vec2 m = 1.2 * v_text * (resolution / resolution.y);
 
-    vec3 q = proj_inverse_sphere(m);
+        if (length(m) > 1.) {
+            f_color = vec4(1, 1, 1, 1);
+            return;
+        }
 
-    int face_id;
-    vec3 p = applyIsometry(isometry, q);
+        vec3 q = proj_inverse_sphere(m);
+        p = applyIsometry(isometry, q);
+    }
 
     float ax = abs(p.x);
     float ay = abs(p.y);
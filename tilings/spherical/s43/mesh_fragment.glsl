@@ -0,0 +1,27 @@
+#version 410 core
+
+// point of the fundamental face of the polyhedron (cf. tilings/spherical/mesh_vertex.glsl)
+in vec3 v_point;
+out vec4 f_color;
+
+uniform sampler2D tileTexture;
+uniform vec2 tileCorner0;
+uniform vec2 tileCorner1;
+uniform vec2 tileCorner2;
+uniform vec2 tileCorner3;
+
+#include "quad_tile.glsl"
+
+vec2 tileCoords(vec3 p) {
+    vec2 proj_coords = p.xy / p.z;
+    vec2 aux = clamp(0.5 * proj_coords + vec2(0.5), vec2(0, 0), vec2(1, 1));
+
+    return tileCoords(aux.x, aux.y);
+}
+
+
+void main() {
+    vec2 coords = tileCoords(v_point);
+    vec3 color = texture(tileTexture, coords).rgb;
+    f_color = vec4(color, 1);
+}
@@ -1,13 +1,20 @@
-from abc import abstractmethod
+from ctypes import c_void_p
+from typing import Iterator
 
-from PySide6.QtCore import Qt, Slot, QElapsedTimer, QTimer
-from PySide6.QtWidgets import QSlider, QFormLayout
-from numpy import array, pi
+from OpenGL import GL
+from PySide6.QtCore import Qt, Slot, Signal, QElapsedTimer
+from PySide6.QtGui import QVector2D
+from PySide6.QtWidgets import QSlider, QFormLayout, QCheckBox, QLabel
+from numpy import array, pi, ascontiguousarray, float32
 
 from tilings.abstract.tiling import Tiling as AbstractTiling
 from tilings.abstract.tiling import TilingDrawing as AbstractTilingDrawing
 from tilings.abstract.tiling import TilingOptions as AbstractTilingOptions
+from tilings.abstract.tiling import AnimationExportDialog, ANIMATION_FPS
+from tilings.abstract.tiling import view_uniforms
+from tilings.spherical.mesh import face_copies, face_mesh
 from utils.path_helper import get_resource_path
+from utils.shader_cache import shader_program
 
 SPEED1_MIN = 10
 SPEED1_MAX = 80
@@ -17,22 +24,99 @@ SPEED2_MIN = 10
 SPEED2_MAX = 80
 SPEED2_DEFAULT = 40
 
+# Rotation (par unité de vitesse) pendant FRAME_DURATION millisecondes
 BASE_SPEED = 0.0005
+FRAME_DURATION = 25
+# Au-delà de cet intervalle (en millisecondes) entre deux images, l'animation est considérée comme interrompue
+# (fenêtre cachée ou réduite) et ne rattrape pas le temps écoulé
+MAX_FRAME_INTERVAL = 250
+# Intervalle (en millisecondes) entre deux statistiques de l'animation
+STATS_INTERVAL = 1000
+
+# Côté (en pixels) de chaque face de la cube map contenant le pavage de la sphère
+CUBE_MAP_SIZE = 1024
+
+# Distance et rayon de la sphère vue par les fragment shaders (uniforme sphereData)
+SPHERE_DATA = QVector2D(10, 2)
+
+# Rotations d'un quart de tour autour des axes (uniformes shiftXP, etc. des fragment shaders)
+SHIFT_XP = array([
+    [1, 0, 0],
+    [0, 0, -1],
+    [0, 1, 0]
+])
+SHIFT_XN = array([
+    [1, 0, 0],
+    [0, 0, 1],
+    [0, -1, 0]
+])
+SHIFT_YP = array([
+    [0, 0, -1],
+    [0, 1, 0],
+    [1, 0, 0]
+])
+SHIFT_YN = array([
+    [0, 0, 1],
+    [0, 1, 0],
+    [-1, 0, 0]
+])
+SHIFT_ZP = array([
+    [0, -1, 0],
+    [1, 0, 0],
+    [0, 0, 1]
+])
+SHIFT_ZN = array([
+    [0, 1, 0],
+    [-1, 0, 0],
+    [0, 0, 1]
+])
 
 
 class TilingDrawing(AbstractTilingDrawing):
+    # Images par seconde et images perdues depuis la dernière statistique
+    frame_stats = Signal(float, int)
+
     VERTEX_SHADER = get_resource_path("shaders/vertex.glsl")
     FRAGMENT_SHADER = get_resource_path("tilings/hyperbolic/s46/fragment.glsl")
+    CUBE_MAP_SHADER = get_resource_path("tilings/spherical/cubemap.glsl")
+    MESH_VERTEX_SHADER = get_resource_path("tilings/spherical/mesh_vertex.glsl")
+    MESH_FRAGMENT_SHADER = get_resource_path("")
+    # Sommets de la face fondamentale du polyèdre, et translations ramenant chaque face sur celle-ci
+    FACE = None
+    FACE_FOLDS = None
+    DEFAULTS = {'angles': (0., 0.)}
+    # Le disque est dessiné pour |1.2 * v_text * (resolution / resolution.y)| <= 1
+    DISC_RADIUS = 1 / 1.2
 
     def __init__(self, parent: 'Tiling', path, img_size, corners):
         super(TilingDrawing, self).__init__(parent, path, img_size, corners)
 
-        self.angles = array([0., 0.])
+        self.angles = array(self.DEFAULTS['angles'])
         self._speed1 = SPEED1_DEFAULT
         self._speed2 = SPEED2_DEFAULT
 
-        self.timer = None
+        # L'animation avance selon le temps écoulé : une nouvelle image est demandée à chaque image affichée
+        # (frameSwapped, donc au rythme de la synchronisation verticale), tant que le widget est visible
+        self.playing = False
         self.e_timer = QElapsedTimer()
+        self.stats_timer = QElapsedTimer()
+        self.frame_count = 0
+        self.dropped_frames = 0
+        self.frameSwapped.connect(self.update_angles)
+
+        # Le pavage de la sphère est calculé une seule fois dans une cube map (à chaque changement des sommets),
+        # chaque image de l'animation se limitant ensuite à tourner le rayon de vue
+        self.cube_map_program = None
+        self.cube_map = None
+        self.cube_map_key = None
+
+        # Rendu par maillage : les faces du polyèdre, subdivisées, sont projetées sur la sphère
+        self._mesh = False
+        self.mesh_program = None
+        self.mesh_vao = None
+        self.mesh_buffers = None
+        self.mesh_index_count = 0
+        self.copy_count = 0
 
     @property
     def speed1(self):
@@ -52,26 +136,246 @@ class TilingDrawing(AbstractTilingDrawing):
         self._speed2 = value
         self.update()
 
+    @property
+    def mesh(self):
+        return self._mesh
+
+    @mesh.setter
+    def mesh(self, value):
+        self._mesh = value
+        self.update()
+
+    @classmethod
+    def copies(cls, uniforms: dict):
+        """
+        Rotations moving the fundamental face to each face of the polyhedron, array of shape (faces, 3, 3)
+        :param uniforms: the uniforms converted by utils.cpu.uniforms_to_numpy
+        """
+        return face_copies(uniforms, cls.FACE_FOLDS)
+
     def initializeGL(self):
         super().initializeGL()
+
+        self.cube_map_program = shader_program(self.VERTEX_SHADER, self.CUBE_MAP_SHADER)
+
+        self.cube_map = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_CUBE_MAP, self.cube_map)
+        for face in range(6):
+            GL.glTexImage2D(GL.GL_TEXTURE_CUBE_MAP_POSITIVE_X + face, 0, GL.GL_RGBA8, CUBE_MAP_SIZE, CUBE_MAP_SIZE, 0,
+                            GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, None)
+        GL.glTexParameteri(GL.GL_TEXTURE_CUBE_MAP, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_CUBE_MAP, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        for wrap in (GL.GL_TEXTURE_WRAP_S, GL.GL_TEXTURE_WRAP_T, GL.GL_TEXTURE_WRAP_R):
+            GL.glTexParameteri(GL.GL_TEXTURE_CUBE_MAP, wrap, GL.GL_CLAMP_TO_EDGE)
+        GL.glEnable(GL.GL_TEXTURE_CUBE_MAP_SEAMLESS)
+        GL.glBindTexture(GL.GL_TEXTURE_CUBE_MAP, 0)
+        self.cube_map_key = None
+
+        self.mesh_program = shader_program(self.MESH_VERTEX_SHADER, self.MESH_FRAGMENT_SHADER)
+
+        points, triangles = face_mesh(self.FACE)
+        # les rotations sont transmises colonne par colonne
+        copies = ascontiguousarray(self.copies(self.current_uniforms(numpy=True)).transpose(0, 2, 1),
+                                   dtype=float32)
+        self.mesh_index_count = triangles.size
+        self.copy_count = len(copies)
+
+        self.mesh_vao = GL.glGenVertexArrays(1)
+        GL.glBindVertexArray(self.mesh_vao)
+        self.mesh_buffers = GL.glGenBuffers(3)
+        vertex_buffer, index_buffer, copy_buffer = self.mesh_buffers
+
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, vertex_buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, points.nbytes, points.tobytes(), GL.GL_STATIC_DRAW)
+        GL.glEnableVertexAttribArray(0)
+        GL.glVertexAttribPointer(0, 3, GL.GL_FLOAT, GL.GL_FALSE, 12, c_void_p(0))
+
+        GL.glBindBuffer(GL.GL_ELEMENT_ARRAY_BUFFER, index_buffer)
+        GL.glBufferData(GL.GL_ELEMENT_ARRAY_BUFFER, triangles.nbytes, triangles.tobytes(), GL.GL_STATIC_DRAW)
+
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, copy_buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, copies.nbytes, copies.tobytes(), GL.GL_STATIC_DRAW)
+        for column in range(3):
+            GL.glEnableVertexAttribArray(2 + column)
+            GL.glVertexAttribPointer(2 + column, 3, GL.GL_FLOAT, GL.GL_FALSE, 36, c_void_p(12 * column))
+            GL.glVertexAttribDivisor(2 + column, 1)
+
+        GL.glBindVertexArray(self.vao)
+
         self.play()
 
+    def cleanupGL(self):
+        super().cleanupGL()
+        if self.cube_map:
+            GL.glDeleteTextures(1, [self.cube_map])
+            self.cube_map = None
+        if self.cube_map_program:
+            self.cube_map_program.release()
+            self.cube_map_program = None
+        if self.mesh_buffers is not None:
+            GL.glDeleteBuffers(3, self.mesh_buffers)
+            self.mesh_buffers = None
+        if self.mesh_vao:
+            GL.glDeleteVertexArrays(1, [self.mesh_vao])
+            self.mesh_vao = None
+        if self.mesh_program:
+            self.mesh_program.release()
+            self.mesh_program = None
+
+    def bake_cube_map(self):
+        """
+        Dessine le pavage de toute la sphère dans les six faces de la cube map, avec le fragment shader du pavage
+        """
+        framebuffer = GL.glGetIntegerv(GL.GL_FRAMEBUFFER_BINDING)
+        viewport = GL.glGetIntegerv(GL.GL_VIEWPORT)
+        fbo = GL.glGenFramebuffers(1)
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, fbo)
+        GL.glViewport(0, 0, CUBE_MAP_SIZE, CUBE_MAP_SIZE)
+
+        self.program.bind()
+        position_attr = self.program.attributeLocation("in_vert")
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        self.program.enableAttributeArray(position_attr)
+        self.program.setAttributeBuffer(position_attr, GL.GL_FLOAT, 0, 2, 0)
+        self.uniform_cache.upload(self.program, self.current_uniforms())
+        self.uniform_cache.upload(self.program, view_uniforms(self.resolution))
+        self.bind_tile_texture(self.program)
+
+        for face in range(6):
+            GL.glFramebufferTexture2D(GL.GL_FRAMEBUFFER, GL.GL_COLOR_ATTACHMENT0,
+                                      GL.GL_TEXTURE_CUBE_MAP_POSITIVE_X + face, self.cube_map, 0)
+            self.uniform_cache.upload(self.program, {'bakeFace': face})
+            GL.glDrawArrays(GL.GL_TRIANGLES, 0, 6)
+
+        GL.glDisableVertexAttribArray(position_attr)
+        self.program.release()
+        GL.glBindFramebuffer(GL.GL_FRAMEBUFFER, framebuffer)
+        GL.glDeleteFramebuffers(1, [fbo])
+        GL.glViewport(*viewport)
+
+    def paint_mesh(self):
+        """
+        Dessine les faces du polyèdre projetées sur la sphère : seuls les pixels couverts par la sphère sont calculés
+        """
+        # en dehors de la sphère, le fond est blanc comme dans fragment.glsl
+        GL.glClearColor(1.0, 1.0, 1.0, 1.0)
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        GL.glClearColor(0.2, 0.2, 0.2, 1.0)
+
+        GL.glEnable(GL.GL_CLIP_DISTANCE0)
+        GL.glBindVertexArray(self.mesh_vao)
+        self.mesh_program.bind()
+        self.uniform_cache.upload(self.mesh_program, self.current_uniforms())
+        self.uniform_cache.upload(self.mesh_program, view_uniforms(self.resolution, self.view_rect))
+        self.bind_tile_texture(self.mesh_program)
+        GL.glDrawElementsInstanced(GL.GL_TRIANGLES, self.mesh_index_count, GL.GL_UNSIGNED_INT, c_void_p(0),
+                                   self.copy_count)
+        self.mesh_program.release()
+        GL.glBindVertexArray(self.vao)
+        GL.glDisable(GL.GL_CLIP_DISTANCE0)
+
+    def frame_key(self):
+        # le rendu par maillage ne change pas les uniformes
+        return super().frame_key() + (self._mesh,)
+
+    def paint_tiling(self):
+        if self.export_resolution is not None:
+            # les exports sont calculés exactement, pixel par pixel, quelle que soit leur taille
+            # (ni maillage, ni cube map)
+            super().paint_tiling()
+            return
+        if self._mesh:
+            self.paint_mesh()
+            return
+
+        key = tuple((p.x(), p.y()) for p in self.rescaled_corners)
+        if key != self.cube_map_key:
+            self.bake_cube_map()
+            self.cube_map_key = key
+
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT | GL.GL_DEPTH_BUFFER_BIT)
+        self.cube_map_program.bind()
+        position_attr = self.cube_map_program.attributeLocation("in_vert")
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        self.cube_map_program.enableAttributeArray(position_attr)
+        self.cube_map_program.setAttributeBuffer(position_attr, GL.GL_FLOAT, 0, 2, 0)
+
+        uniforms = self.current_uniforms()
+        self.uniform_cache.upload(self.cube_map_program,
+                                  {name: uniforms[name] for name in ("sphereData", "resolution", "isometry")})
+        self.uniform_cache.upload(self.cube_map_program, view_uniforms(self.resolution, self.view_rect))
+
+        GL.glActiveTexture(GL.GL_TEXTURE1)
+        GL.glBindTexture(GL.GL_TEXTURE_CUBE_MAP, self.cube_map)
+        self.cube_map_program.setUniformValue('tileCubeMap', 1)
+        GL.glDrawArrays(GL.GL_TRIANGLES, 0, 6)
+        GL.glBindTexture(GL.GL_TEXTURE_CUBE_MAP, 0)
+        GL.glActiveTexture(GL.GL_TEXTURE0)
+        GL.glDisableVertexAttribArray(position_attr)
+        self.cube_map_program.release()
+
     @Slot()
     def update_angles(self):
-        self.angles += BASE_SPEED * array([self.speed1, self.speed2])
-        self.angles %= 2 * pi
-        self.update()
+        """
+        Fait tourner la sphère proportionnellement au temps écoulé depuis l'image précédente,
+        puis demande l'image suivante
+        """
+        if not self.playing:
+            return
+        elapsed = self.e_timer.restart()
+        if elapsed < MAX_FRAME_INTERVAL:
+            self.angles += BASE_SPEED * array([self.speed1, self.speed2]) * elapsed / FRAME_DURATION
+            self.angles %= 2 * pi
+            self.count_frame(elapsed)
+        if self.isVisible():
+            self.update()
+
+    def count_frame(self, elapsed: int):
+        """
+        Compte les images perdues, i.e. affichées avec plus d'un rafraîchissement de l'écran de retard
+        """
+        refresh_rate = self.screen().refreshRate() if self.screen() is not None else 0
+        interval = 1000 / refresh_rate if refresh_rate > 0 else FRAME_DURATION
+        self.frame_count += 1
+        self.dropped_frames += max(0, round(elapsed / interval) - 1)
+
+        if self.stats_timer.elapsed() >= STATS_INTERVAL:
+            self.frame_stats.emit(1000 * self.frame_count / self.stats_timer.restart(), self.dropped_frames)
+            self.frame_count = 0
+            self.dropped_frames = 0
+
+    def animation_frames(self, frame_count: int) -> Iterator[None]:
+        """
+        Fait tourner la sphère à partir des angles courants pendant frame_count images (cf. render_animation),
+        les angles avançant d'un pas fixe entre deux images (ANIMATION_FPS images par seconde aux vitesses choisies)
+        """
+        angles = self.angles.copy()
+        step = BASE_SPEED * array([self.speed1, self.speed2]) * (1000 / ANIMATION_FPS) / FRAME_DURATION
+        try:
+            for i in range(frame_count):
+                self.angles = (angles + i * step) % (2 * pi)
+                yield
+        finally:
+            self.angles = angles
 
     def play(self):
-        if self.timer is None:
-            self.timer = QTimer(self)
-            self.timer.timeout.connect(self.update_angles)
-        if not self.timer.isActive():
-            self.timer.start(25)
+        if not self.playing:
+            self.playing = True
+            self.e_timer.start()
+            self.stats_timer.start()
+            self.frame_count = 0
+            self.dropped_frames = 0
+            self.update()
+
+    def stop(self):
+        self.playing = False
 
-    @abstractmethod
-    def setup_uniforms(self):
-        raise Exception("This method must be implemented by subclasses")
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.playing:
+            # le temps passé caché n'est pas rattrapé
+            self.e_timer.restart()
+            self.update()
 
 
 class TilingOptions(AbstractTilingOptions):
@@ -97,18 +401,41 @@ class TilingOptions(AbstractTilingOptions):
         self.speed2_slider.setValue(SPEED2_DEFAULT)
         self.layout.addRow("Vitesse de rotation axe 2", self.speed2_slider)
 
+        self.mesh_checkbox = QCheckBox("Dessiner les faces du polyèdre (maillage)")
+        self.mesh_checkbox.toggled.connect(self.toggle_mesh)
+        self.layout.addRow("Rendu géométrique:", self.mesh_checkbox)
+
+        self.stats_label = QLabel()
+        self.layout.addRow("Animation:", self.stats_label)
+
+    def toggle_mesh(self, checked: bool):
+        self.parent().drawing.mesh = checked
+
+    def show_frame_stats(self, fps: float, dropped: int):
+        self.stats_label.setText(f"{fps:.0f} images par seconde, {dropped} images perdues")
+
 
 class Tiling(AbstractTiling):
     KIND = 'Pavage sphérique'
+    ANIMATION_DIALOG_CLASS = AnimationExportDialog
 
     def __init__(self, path, img_size, corners, resolution=None):
         super(Tiling, self).__init__(path, img_size, corners, resolution)
 
         self.options.speed1_slider.valueChanged.connect(self.update_speed1)
         self.options.speed2_slider.valueChanged.connect(self.update_speed2)
+        self.drawing.frame_stats.connect(self.options.show_frame_stats)
 
     def update_speed1(self, value):
         self.drawing.speed1 = value
 
     def update_speed2(self, value):
         self.drawing.speed2 = value
+
+    def animation_frames(self, dialog: AnimationExportDialog) -> Iterator[None]:
+        return self.drawing.animation_frames(dialog.frame_count())
+
+    def closeEvent(self, event):
+        """ Arrête l'animation avant de libérer les ressources OpenGL. """
+        self.drawing.stop()
+        super().closeEvent(event)
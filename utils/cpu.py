@@ -0,0 +1,210 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+from PySide6.QtCore import QPointF, QSize
+from PySide6.QtGui import QImage, QVector2D, QVector3D, QVector4D, QColor
+from numpy import ndarray, array, empty, floor, frombuffer, isfinite, linspace, meshgrid, stack, ones, \
+    float64, uint8, errstate, clip, rint, concatenate
+
+# Number of rows handled by a single task of the process pool
+BAND_HEIGHT = 64
+
+# Per-process data shared by all the bands (set by the pool initializer, to avoid pickling it for every task)
+_context = None
+
+
+def mat3(*values) -> ndarray:
+    """
+    Build a 3x3 matrix with the same convention as the GLSL constructor mat3(...),
+    i.e. the values are given column by column.
+    This allows to copy the constants of the fragment shaders verbatim.
+    """
+    return array(values, dtype=float64).reshape(3, 3).transpose()
+
+
+def to_numpy(value):
+    """
+    Convert the value of a uniform (as computed by TilingDrawing.uniforms) to a NumPy friendly value
+    """
+    if isinstance(value, (QPointF, QVector2D)):
+        return array([value.x(), value.y()])
+    if isinstance(value, QSize):
+        return array([value.width(), value.height()], dtype=float64)
+    if isinstance(value, QVector3D):
+        return array([value.x(), value.y(), value.z()])
+    if isinstance(value, QVector4D):
+        return array([value.x(), value.y(), value.z(), value.w()])
+    if isinstance(value, QColor):
+        return array([value.redF(), value.greenF(), value.blueF(), value.alphaF()])
+    if isinstance(value, ndarray):
+        return value.astype(float64)
+    return value
+
+
+def uniforms_to_numpy(uniforms: dict) -> dict:
+    return {name: to_numpy(value) for name, value in uniforms.items()}
+
+
+def load_texture(image) -> ndarray:
+    """
+    Load a picture as an array of shape (height, width, 4) with values in [0, 1].
+    The first row is the top of the picture, as for the texture uploaded by QOpenGLTexture.setData.
+    :param image: a path or a QImage
+    """
+    if not isinstance(image, QImage):
+        image = QImage(image)
+    if image.isNull():
+        raise Exception("Unable to load the picture")
+    image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+    w, h = image.width(), image.height()
+    data = frombuffer(image.constBits(), dtype=uint8).reshape(h, image.bytesPerLine())
+    return data[:, :4 * w].reshape(h, w, 4) / 255.
+
+
+def to_qimage(pixels: ndarray) -> QImage:
+    """
+    Convert an array of shape (height, width, 4) with values in [0, 255] to a QImage
+    """
+    h, w, _ = pixels.shape
+    data = pixels.astype(uint8).tobytes()
+    return QImage(data, w, h, 4 * w, QImage.Format.Format_RGBA8888).copy()
+
+
+def sample(texture: ndarray, coords: ndarray) -> ndarray:
+    """
+    Sample the texture at the given coordinates,
+    with the same behavior as the texture of TilingDrawing (linear filtering, repeat wrap mode).
+    :param texture: array of shape (height, width, channels)
+    :param coords: array of shape (n, 2), coordinates in the [0, 1] x [0, 1] range
+    :return: array of shape (n, channels)
+    """
+    h, w, _ = texture.shape
+    coords = coords.copy()
+    coords[~isfinite(coords)] = 0.
+
+    u = coords[:, 0] * w - 0.5
+    v = coords[:, 1] * h - 0.5
+    i0 = floor(u)
+    j0 = floor(v)
+    fu = (u - i0)[:, None]
+    fv = (v - j0)[:, None]
+    i0 = i0.astype(int) % w
+    j0 = j0.astype(int) % h
+    i1 = (i0 + 1) % w
+    j1 = (j0 + 1) % h
+
+    top = (1 - fu) * texture[j0, i0] + fu * texture[j0, i1]
+    bottom = (1 - fu) * texture[j1, i0] + fu * texture[j1, i1]
+    return (1 - fv) * top + fv * bottom
+
+
+def quad_tile_coords(p: ndarray, c0: ndarray, c1: ndarray, c2: ndarray, c3: ndarray) -> ndarray:
+    """
+    NumPy counterpart of the function tileCoords of the fragment shaders for quadrilateral tiles.
+    :param p: array of shape (n, 2), coordinates in the unit square
+    :param c0: first corner of the tile in the texture (similarly for c1, c2, c3)
+    :return: array of shape (n, 2), coordinates in the texture
+    """
+    x = p[:, 0:1]
+    y = p[:, 1:2]
+
+    a0 = (1. - x) * (c3 - c0) + x * (c2 - c1)
+    a1 = (1. - y) * (c1 - c0) + y * (c2 - c3)
+    b = ((1. - y) * c0 + y * c3) - ((1. - x) * c0 + x * c1)
+
+    # first coordinate of inverse(mat2(a0, -a1)) * b
+    with errstate(divide='ignore', invalid='ignore'):
+        det = a1[:, 0] * a0[:, 1] - a0[:, 0] * a1[:, 1]
+        theta = ((a1[:, 0] * b[:, 1] - a1[:, 1] * b[:, 0]) / det)[:, None]
+    return (1. - theta) * ((1. - x) * c0 + x * c1) + theta * ((1. - x) * c3 + x * c2)
+
+
+def triangle_tile_coords(p: ndarray, c0: ndarray, c1: ndarray, c2: ndarray) -> ndarray:
+    """
+    NumPy counterpart of the function tileCoords of the fragment shaders for triangular tiles.
+    """
+    return c0 + p[:, 0:1] * (c1 - c0) + p[:, 1:2] * (c2 - c0)
+
+
+def tile_coords(p: ndarray, uniforms: dict) -> ndarray:
+    """
+    Coordinates in the texture, the kind of tile being given by the number of tileCorner uniforms
+    """
+    if "tileCorner3" in uniforms:
+        return quad_tile_coords(p, *(uniforms[f"tileCorner{i}"] for i in range(4)))
+    return triangle_tile_coords(p, *(uniforms[f"tileCorner{i}"] for i in range(3)))
+
+
+def screen_coords(resolution: ndarray, start: int, stop: int) -> ndarray:
+    """
+    Counterpart of the varying v_text of shaders/vertex.glsl, for the rows start to stop of the picture.
+    The rows are numbered from the top of the picture, as in a QImage.
+    :return: array of shape ((stop - start) * width, 2) with values in [-1, 1]
+    """
+    w, h = int(resolution[0]), int(resolution[1])
+    xs = linspace(-1 + 1 / w, 1 - 1 / w, w)
+    ys = 1 - (2 * array(range(start, stop)) + 1) / h
+    x, y = meshgrid(xs, ys)
+    return stack([x.ravel(), y.ravel()], axis=1)
+
+
+def homogeneous(p: ndarray) -> ndarray:
+    """
+    Return the array of shape (n, 3) obtained by adding a third coordinate equal to 1
+    """
+    return concatenate([p, ones((p.shape[0], 1))], axis=1)
+
+
+def to_pixels(colors: ndarray, width: int) -> ndarray:
+    """
+    Convert the colors of shape (n, 3) or (n, 4) computed for a band of rows to an array of pixels
+    of shape (rows, width, 4) with values in [0, 255]
+    """
+    if colors.shape[1] == 3:
+        colors = concatenate([colors, ones((colors.shape[0], 1))], axis=1)
+    pixels = rint(255 * clip(colors, 0, 1)).astype(uint8)
+    return pixels.reshape(-1, width, 4)
+
+
+def _init_worker(context):
+    global _context
+    _context = context
+
+
+def _render_band(render_band: Callable, start: int, stop: int) -> ndarray:
+    return render_band(_context, start, stop)
+
+
+def render_bands(render_band: Callable, context, size: QSize, processes: Optional[int] = None) -> ndarray:
+    """
+    Render a picture by bands of rows, each band being rendered in a single vectorized pass.
+    The bands are distributed over a pool of processes.
+    :param render_band: module level function (context, start, stop) -> pixels of the rows start to stop,
+        of shape (rows, width, 4), or (frames, rows, width, 4) when several pictures are rendered at once
+    :param context: picklable data shared by all the bands (sent once to each process)
+    :param size: size of the picture
+    :param processes: number of processes (all the cores by default, no pool if 1)
+    :return: array of shape (height, width, 4) (or (frames, height, width, 4)) with values in [0, 255]
+    """
+    height = size.height()
+    bands = [(start, min(start + BAND_HEIGHT, height)) for start in range(0, height, BAND_HEIGHT)]
+    pixels = None
+
+    def store(start: int, stop: int, band: ndarray):
+        nonlocal pixels
+        if pixels is None:
+            pixels = empty(band.shape[:-3] + (height, size.width(), 4), dtype=uint8)
+        pixels[..., start:stop, :, :] = band
+
+    processes = processes if processes is not None else os.cpu_count()
+    if processes == 1 or len(bands) == 1:
+        for start, stop in bands:
+            store(start, stop, render_band(context, start, stop))
+        return pixels
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(context,)) as executor:
+        futures = [(start, stop, executor.submit(_render_band, render_band, start, stop)) for start, stop in bands]
+        for start, stop, future in futures:
+            store(start, stop, future.result())
+    return pixels
@@ -0,0 +1,69 @@
+import os
+from math import ceil, log2, hypot
+from typing import Iterator, Optional
+
+from PySide6.QtCore import QSize, QRect
+
+# Side of the tiles of the pyramid, in pixels
+DEEPZOOM_TILE_SIZE = 256
+
+
+def level_count(size: QSize) -> int:
+    """
+    Number of levels of the pyramid, the level 0 being a single pixel and the last one the full size picture
+    """
+    return ceil(log2(max(size.width(), size.height(), 1))) + 1
+
+
+def level_size(size: QSize, level: int) -> QSize:
+    """
+    Size of the picture at the given level, each level being twice as small as the next one
+    """
+    factor = 2 ** (level_count(size) - 1 - level)
+    return QSize(ceil(size.width() / factor), ceil(size.height() / factor))
+
+
+def tile_rects(size: QSize, tile_size: int = DEEPZOOM_TILE_SIZE) -> Iterator[QRect]:
+    """
+    Tiles of a level of the given size, row by row
+    """
+    for y in range(0, size.height(), tile_size):
+        for x in range(0, size.width(), tile_size):
+            yield QRect(x, y, min(tile_size, size.width() - x), min(tile_size, size.height() - y))
+
+
+def intersects_disc(rect: QRect, size: QSize, radius: Optional[float]) -> bool:
+    """
+    Whether the part rect of a picture of the given size meets the disc drawn by the shader.
+    The radius is given in units of v_text * (resolution / resolution.y), None meaning the whole plane.
+    """
+    if radius is None:
+        return True
+    w, h = size.width(), size.height()
+    # bounds of the rectangle in units of v_text * (resolution / resolution.y)
+    x0, x1 = (2 * rect.x() - w) / h, (2 * (rect.x() + rect.width()) - w) / h
+    y0, y1 = 1 - 2 * (rect.y() + rect.height()) / h, 1 - 2 * rect.y() / h
+    # closest point of the rectangle to the center of the disc
+    x = min(max(0., x0), x1)
+    y = min(max(0., y0), y1)
+    return hypot(x, y) < radius
+
+
+def tile_path(path: str, level: int, rect: QRect, tile_size: int = DEEPZOOM_TILE_SIZE) -> str:
+    """
+    Path of a tile of the pyramid described by the manifest path (name.dzi -> name_files/level/col_row.png)
+    """
+    directory = os.path.splitext(path)[0] + "_files"
+    return os.path.join(directory, str(level), f"{rect.x() // tile_size}_{rect.y() // tile_size}.png")
+
+
+def write_manifest(path: str, size: QSize, tile_size: int = DEEPZOOM_TILE_SIZE):
+    """
+    Write the DeepZoom manifest (.dzi) of a pyramid of PNG tiles, without overlap
+    """
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        file.write(f'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+                   f'TileSize="{tile_size}" Overlap="0" Format="png">\n')
+        file.write(f'    <Size Width="{size.width()}" Height="{size.height()}"/>\n')
+        file.write('</Image>\n')
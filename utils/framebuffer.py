@@ -0,0 +1,82 @@
+import ctypes
+from typing import Optional
+
+from OpenGL import GL
+from PySide6.QtCore import QSize
+from PySide6.QtOpenGL import QOpenGLFramebufferObject
+from numpy import frombuffer, ndarray, uint8
+
+
+def create_framebuffer(size: QSize) -> QOpenGLFramebufferObject:
+    """
+    Create a framebuffer object with a RGBA8 color attachment, in the current OpenGL context
+    """
+    max_size = GL.glGetIntegerv(GL.GL_MAX_TEXTURE_SIZE)
+    if size.width() > max_size or size.height() > max_size:
+        raise Exception(f"The size of the picture cannot exceed {max_size} pixels")
+    return QOpenGLFramebufferObject(size, QOpenGLFramebufferObject.NoAttachment, GL.GL_TEXTURE_2D, GL.GL_RGBA8)
+
+
+def read_pixels(size: QSize) -> ndarray:
+    """
+    Read back the bound framebuffer, flipped so that the first row is the top of the picture
+    :return: array of shape (height, width, 4) with values in [0, 255]
+    """
+    w, h = size.width(), size.height()
+    GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+    data = GL.glReadPixels(0, 0, w, h, GL.GL_RGBA, GL.GL_UNSIGNED_BYTE)
+    return frombuffer(data, dtype=uint8).reshape(h, w, 4)[::-1].copy()
+
+
+class PixelBufferReader:
+    """
+    Asynchronous read back of successive pictures of the same size through two pixel buffer objects:
+    the copy of a picture into a buffer is only started by read, and the buffer is mapped one picture later,
+    so that the GPU never waits for glReadPixels to finish.
+    """
+
+    def __init__(self, size: QSize):
+        self.size = size
+        self.buffers = GL.glGenBuffers(2)
+        self.pending = [False, False]
+        self.current = 0
+        for buffer in self.buffers:
+            GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, buffer)
+            GL.glBufferData(GL.GL_PIXEL_PACK_BUFFER, 4 * size.width() * size.height(), None, GL.GL_STREAM_READ)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+
+    def read(self) -> Optional[ndarray]:
+        """
+        Start the read back of the bound framebuffer, and return the previous picture (None for the first one)
+        :return: array of shape (height, width, 4) with values in [0, 255], the first row being the top
+        """
+        GL.glPixelStorei(GL.GL_PACK_ALIGNMENT, 1)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, self.buffers[self.current])
+        GL.glReadPixels(0, 0, self.size.width(), self.size.height(), GL.GL_RGBA, GL.GL_UNSIGNED_BYTE,
+                        ctypes.c_void_p(0))
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+        self.pending[self.current] = True
+        self.current = 1 - self.current
+        return self.map(self.current)
+
+    def flush(self) -> Optional[ndarray]:
+        """
+        Return the last picture whose read back was started (None if there is none)
+        """
+        self.current = 1 - self.current
+        return self.map(self.current)
+
+    def map(self, index: int) -> Optional[ndarray]:
+        if not self.pending[index]:
+            return None
+        w, h = self.size.width(), self.size.height()
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, self.buffers[index])
+        pointer = GL.glMapBufferRange(GL.GL_PIXEL_PACK_BUFFER, 0, 4 * w * h, GL.GL_MAP_READ_BIT)
+        data = ctypes.string_at(pointer, 4 * w * h)
+        GL.glUnmapBuffer(GL.GL_PIXEL_PACK_BUFFER)
+        GL.glBindBuffer(GL.GL_PIXEL_PACK_BUFFER, 0)
+        self.pending[index] = False
+        return frombuffer(data, dtype=uint8).reshape(h, w, 4)[::-1].copy()
+
+    def close(self):
+        GL.glDeleteBuffers(2, self.buffers)
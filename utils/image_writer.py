@@ -0,0 +1,261 @@
+import os
+import struct
+import zlib
+
+from numpy import ndarray, uint8, zeros, concatenate
+
+# Above this size, a TIFF file is written in the BigTIFF format (64 bits offsets)
+TIFF_MAX_SIZE = 2 ** 32 - 2 ** 20
+
+
+class PngWriter:
+    """
+    Write a RGBA picture in the PNG format, band by band,
+    so that the whole picture never has to be kept in memory: only the band given to write,
+    whose rows are compressed one at a time.
+    """
+
+    def __init__(self, path: str, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.rows = 0
+        self.file = open(path, 'wb')
+        self.compressor = zlib.compressobj(6)
+
+        self.file.write(b'\x89PNG\r\n\x1a\n')
+        # 8 bits per sample, RGBA, no interlacing
+        self.write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+
+    def write_chunk(self, kind: bytes, data: bytes):
+        self.file.write(struct.pack('>I', len(data)))
+        self.file.write(kind)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind))))
+
+    def write(self, pixels: ndarray):
+        """
+        Append rows to the picture
+        :param pixels: array of shape (rows, width, 4) with values in [0, 255]
+        """
+        rows = pixels.shape[0]
+        if pixels.shape[1] != self.width or self.rows + rows > self.height:
+            raise Exception("The rows do not fit in the picture")
+        pixels = pixels.astype(uint8, copy=False)
+        compressed = []
+        for row in pixels:
+            # each row starts with its filter type (0: none)
+            compressed.append(self.compressor.compress(b'\x00' + row.tobytes()))
+        data = b''.join(compressed)
+        if data:
+            self.write_chunk(b'IDAT', data)
+        self.rows += rows
+
+    def close(self):
+        if self.rows != self.height:
+            self.file.close()
+            raise Exception(f"Incomplete picture: {self.rows} rows written out of {self.height}")
+        self.write_chunk(b'IDAT', self.compressor.flush())
+        self.write_chunk(b'IEND', b'')
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+
+
+class TiffWriter:
+    """
+    Write a RGBA picture in the (uncompressed) TIFF format, band by band,
+    each row being a strip. The directory is written after the pixels, once their offsets are known.
+    """
+
+    def __init__(self, path: str, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.offsets = []
+        self.file = open(path, 'wb')
+        self.big = 4 * width * height + 16 * height > TIFF_MAX_SIZE
+
+        if self.big:
+            self.file.write(b'II' + struct.pack('<HHHQ', 43, 8, 0, 0))
+        else:
+            self.file.write(b'II' + struct.pack('<HI', 42, 0))
+
+    def write(self, pixels: ndarray):
+        """
+        Append rows to the picture
+        :param pixels: array of shape (rows, width, 4) with values in [0, 255]
+        """
+        rows = pixels.shape[0]
+        if pixels.shape[1] != self.width or len(self.offsets) + rows > self.height:
+            raise Exception("The rows do not fit in the picture")
+        offset = self.file.tell()
+        self.file.write(pixels.astype(uint8, copy=False).tobytes())
+        self.offsets.extend(offset + 4 * self.width * i for i in range(rows))
+
+    def close(self):
+        if len(self.offsets) != self.height:
+            self.file.close()
+            raise Exception(f"Incomplete picture: {len(self.offsets)} rows written out of {self.height}")
+
+        short, long, offset_type = 3, 4, 16 if self.big else 4
+        offset_format = 'Q' if self.big else 'I'
+        row_size = 4 * self.width
+
+        # values that do not fit in an entry are written before the directory
+        self.align()
+        bits_offset = self.file.tell()
+        self.file.write(struct.pack('<4H', 8, 8, 8, 8))
+        self.align()
+        offsets_offset = self.file.tell()
+        self.file.write(struct.pack(f'<{self.height}{offset_format}', *self.offsets))
+        self.align()
+        counts_offset = self.file.tell()
+        self.file.write(struct.pack(f'<{self.height}I', *([row_size] * self.height)))
+        self.align()
+
+        entries = [
+            (256, long, 1, self.width),  # ImageWidth
+            (257, long, 1, self.height),  # ImageLength
+            (258, short, 4, bits_offset),  # BitsPerSample
+            (259, short, 1, 1),  # Compression: none
+            (262, short, 1, 2),  # PhotometricInterpretation: RGB
+            (273, offset_type, self.height, offsets_offset),  # StripOffsets
+            (277, short, 1, 4),  # SamplesPerPixel
+            (278, long, 1, 1),  # RowsPerStrip
+            (279, long, self.height, counts_offset),  # StripByteCounts
+            (284, short, 1, 1),  # PlanarConfiguration: chunky
+            (338, short, 1, 2),  # ExtraSamples: unassociated alpha
+        ]
+        if self.height == 1:
+            # a single value is stored in the entry itself
+            entries[5] = (273, offset_type, 1, self.offsets[0])
+            entries[8] = (279, long, 1, row_size)
+
+        ifd_offset = self.file.tell()
+        if self.big:
+            self.file.write(struct.pack('<Q', len(entries)))
+            for tag, kind, count, value in entries:
+                if tag == 258:
+                    # the 4 values fit in the entry of a BigTIFF directory
+                    self.file.write(struct.pack('<HHQ4H', tag, kind, count, 8, 8, 8, 8))
+                elif kind == short and count == 1:
+                    self.file.write(struct.pack('<HHQH6x', tag, kind, count, value))
+                elif kind == long and count == 1:
+                    self.file.write(struct.pack('<HHQI4x', tag, kind, count, value))
+                else:
+                    self.file.write(struct.pack('<HHQQ', tag, kind, count, value))
+            self.file.write(struct.pack('<Q', 0))
+            self.file.seek(8)
+            self.file.write(struct.pack('<Q', ifd_offset))
+        else:
+            self.file.write(struct.pack('<H', len(entries)))
+            for tag, kind, count, value in entries:
+                if kind == short and count == 1:
+                    self.file.write(struct.pack('<HHIH2x', tag, kind, count, value))
+                else:
+                    self.file.write(struct.pack('<HHII', tag, kind, count, value))
+            self.file.write(struct.pack('<I', 0))
+            self.file.seek(4)
+            self.file.write(struct.pack('<I', ifd_offset))
+        self.file.close()
+
+    def align(self):
+        """ Offsets must be word aligned """
+        if self.file.tell() % 2:
+            self.file.write(b'\x00')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+
+
+def encode_rows(pixels: ndarray) -> bytes:
+    """
+    Compressed data of a whole RGBA picture, as stored in the IDAT chunks of a PNG file
+    (zlib releases the GIL, so that pictures can be encoded by several threads at once)
+    :param pixels: array of shape (height, width, 4) with values in [0, 255]
+    """
+    rows = pixels.shape[0]
+    data = concatenate([zeros((rows, 1), dtype=uint8), pixels.astype(uint8).reshape(rows, -1)], axis=1)
+    return zlib.compress(data.tobytes(), 6)
+
+
+def write_png(path: str, pixels: ndarray):
+    """
+    Write a RGBA picture in the PNG format
+    """
+    with PngWriter(path, pixels.shape[1], pixels.shape[0]) as writer:
+        writer.write(pixels)
+
+
+class ApngWriter(PngWriter):
+    """
+    Write an animated PNG (APNG), frame by frame, the frames being given already compressed (cf. encode_rows)
+    """
+
+    # Maximal size of the data of a chunk
+    CHUNK_SIZE = 2 ** 20
+
+    def __init__(self, path: str, width: int, height: int, frames: int, fps: float):
+        super(ApngWriter, self).__init__(path, width, height)
+        self.frames = frames
+        self.written = 0
+        self.sequence = 0
+        # delay between two frames, as a fraction of second
+        self.delay = (1000, round(1000 * fps))
+        # number of frames, infinite loop
+        self.write_chunk(b'acTL', struct.pack('>II', frames, 0))
+
+    def write(self, pixels: ndarray):
+        self.write_frame(encode_rows(pixels))
+
+    def write_frame(self, data: bytes):
+        """
+        Append a frame to the animation
+        :param data: the compressed rows of the frame
+        """
+        if self.written == self.frames:
+            raise Exception("All the frames of the animation have already been written")
+        # whole picture at (0, 0), no disposal, no blending
+        self.write_chunk(b'fcTL', struct.pack('>IIIIIHHBB', self.sequence, self.width, self.height, 0, 0,
+                                              *self.delay, 0, 0))
+        self.sequence += 1
+        for start in range(0, len(data), self.CHUNK_SIZE):
+            part = data[start:start + self.CHUNK_SIZE]
+            if self.written == 0:
+                # the first frame is also the default picture
+                self.write_chunk(b'IDAT', part)
+            else:
+                self.write_chunk(b'fdAT', struct.pack('>I', self.sequence) + part)
+                self.sequence += 1
+        self.written += 1
+
+    def close(self):
+        if self.written != self.frames:
+            self.file.close()
+            raise Exception(f"Incomplete animation: {self.written} frames written out of {self.frames}")
+        self.write_chunk(b'IEND', b'')
+        self.file.close()
+
+
+def open_image_writer(path: str, width: int, height: int):
+    """
+    Return a writer streaming the picture to the given path, the format being given by its extension
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.png':
+        return PngWriter(path, width, height)
+    if extension in ('.tif', '.tiff'):
+        return TiffWriter(path, width, height)
+    raise Exception(f"The format {extension} cannot be written by bands")
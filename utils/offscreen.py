@@ -0,0 +1,148 @@
+from typing import Optional
+
+from OpenGL import GL
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QOpenGLContext, QOffscreenSurface, QSurfaceFormat, QImage
+from PySide6.QtOpenGL import QOpenGLShaderProgram, QOpenGLTexture
+from numpy import array, float32, ndarray
+
+from tilings.abstract.tiling import UniformCache, view_uniforms
+from utils.framebuffer import create_framebuffer, read_pixels
+from utils.shader_cache import shader_program, release_programs
+
+
+class OffscreenRenderer:
+    """
+    Render tilings in a framebuffer object, without creating any widget.
+    A single OpenGL context is kept alive for the lifetime of the renderer and each shader program
+    is compiled once, so that rendering many pictures only costs a draw call and a readback.
+    A QGuiApplication must exist (the "offscreen" platform is enough, e.g. with Mesa llvmpipe).
+    """
+
+    def __init__(self, surface_format: Optional[QSurfaceFormat] = None):
+        surface_format = surface_format if surface_format is not None else QSurfaceFormat.defaultFormat()
+
+        self.context = QOpenGLContext()
+        self.context.setFormat(surface_format)
+        if not self.context.create():
+            raise Exception("Unable to create an OpenGL context")
+
+        self.surface = QOffscreenSurface()
+        self.surface.setFormat(self.context.format())
+        self.surface.create()
+        if not self.context.makeCurrent(self.surface):
+            raise Exception("Unable to make the OpenGL context current")
+
+        self.fbo = None
+        self.texture = None
+        self.texture_key = None
+        # the uniforms are only uploaded again when they change from one picture to the next
+        self.uniform_cache = UniformCache()
+
+        vertices = array([
+            -1, -1,
+            1, -1,
+            1, 1,
+            1, 1,
+            -1, 1,
+            -1, -1
+        ], dtype=float32)
+
+        self.vao = GL.glGenVertexArrays(1)
+        GL.glBindVertexArray(self.vao)
+
+        self.vertex_buffer = GL.glGenBuffers(1)
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        GL.glBufferData(GL.GL_ARRAY_BUFFER, vertices.nbytes, vertices.tobytes(), GL.GL_STATIC_DRAW)
+
+    def program(self, drawing_cls, state) -> QOpenGLShaderProgram:
+        """
+        Return the shader program of the given drawing class, in the variant selected by the options of the state,
+        compiling it on first use (cf. utils.shader_cache)
+        """
+        return shader_program(drawing_cls.VERTEX_SHADER, drawing_cls.FRAGMENT_SHADER,
+                              drawing_cls.shader_defines(state))
+
+    def bind_texture(self, image):
+        """
+        Bind the texture of the tile, the last one being kept when the same path is given again
+        :param image: a path or a QImage
+        """
+        key = image if isinstance(image, str) else None
+        if self.texture is None or key is None or key != self.texture_key:
+            if self.texture is not None:
+                self.texture.destroy()
+            img = image if isinstance(image, QImage) else QImage(image)
+            if img.isNull():
+                raise Exception(f"Unable to load the picture {image}")
+
+            self.texture = QOpenGLTexture(QOpenGLTexture.Target2D)
+            self.texture.create()
+            self.texture.setData(img)
+            self.texture.setMinMagFilters(QOpenGLTexture.Linear, QOpenGLTexture.Linear)
+            self.texture.setWrapMode(QOpenGLTexture.DirectionS, QOpenGLTexture.Repeat)
+            self.texture.setWrapMode(QOpenGLTexture.DirectionT, QOpenGLTexture.Repeat)
+            self.texture_key = key
+        self.texture.bind(0)
+
+    def bind_framebuffer(self, size: QSize):
+        """
+        Bind a framebuffer object of the given size, reusing the previous one when possible
+        """
+        if self.fbo is None or self.fbo.size() != size:
+            self.fbo = create_framebuffer(size)
+        self.fbo.bind()
+
+    def render(self, drawing_cls, image, state) -> ndarray:
+        """
+        Render a tiling with the shaders of its drawing class.
+        :param drawing_cls: the class computing the uniforms (e.g. tilings.euclidean.p1.tiling.TilingDrawing)
+        :param image: a path or a QImage of the tile
+        :param state: a TilingState, whose resolution gives the size of the picture
+        :return: array of shape (height, width, 4) with values in [0, 255], the first row being the top
+        """
+        self.context.makeCurrent(self.surface)
+        size = state.resolution
+        self.bind_framebuffer(size)
+        GL.glViewport(0, 0, size.width(), size.height())
+
+        # no blending: the alpha computed by the shader is kept in the picture
+        GL.glDisable(GL.GL_BLEND)
+        GL.glClearColor(0.0, 0.0, 0.0, 0.0)
+        GL.glClear(GL.GL_COLOR_BUFFER_BIT)
+
+        state = drawing_cls.image_state(state, image)
+        program = self.program(drawing_cls, state)
+        program.bind()
+        GL.glBindVertexArray(self.vao)
+        position_attr = program.attributeLocation("in_vert")
+        GL.glBindBuffer(GL.GL_ARRAY_BUFFER, self.vertex_buffer)
+        program.enableAttributeArray(position_attr)
+        program.setAttributeBuffer(position_attr, GL.GL_FLOAT, 0, 2, 0)
+
+        self.uniform_cache.upload(program, drawing_cls.uniforms(state))
+        self.uniform_cache.upload(program, view_uniforms(size))
+
+        program.setUniformValue('tileTexture', 0)
+        self.bind_texture(image)
+        GL.glDrawArrays(GL.GL_TRIANGLES, 0, 6)
+        GL.glDisableVertexAttribArray(position_attr)
+        program.release()
+
+        pixels = read_pixels(size)
+        self.fbo.release()
+        return pixels
+
+    def close(self):
+        """ Free the OpenGL resources """
+        self.context.makeCurrent(self.surface)
+        if self.texture is not None:
+            self.texture.destroy()
+            self.texture = None
+        release_programs(self.context)
+        self.uniform_cache.clear()
+        self.fbo = None
+        GL.glDeleteBuffers(1, [self.vertex_buffer])
+        GL.glDeleteVertexArrays(1, [self.vao])
+        self.context.doneCurrent()
+        self.surface.destroy()
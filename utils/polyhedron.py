@@ -0,0 +1,114 @@
+from itertools import combinations
+
+from numpy import array, sqrt, cross, dot, arctan2, argsort, linalg, isclose
+
+
+def _tetrahedron():
+    return array([[1, 1, 1], [1, -1, -1], [-1, 1, -1], [-1, -1, 1]], dtype=float)
+
+
+def _octahedron():
+    return array([[1, 0, 0], [-1, 0, 0], [0, 1, 0], [0, -1, 0], [0, 0, 1], [0, 0, -1]], dtype=float)
+
+
+def _icosahedron():
+    phi = 0.5 * (1 + sqrt(5))
+    vertices = []
+    for a in (-1, 1):
+        for b in (-phi, phi):
+            vertices += [[0, a, b], [a, b, 0], [b, 0, a]]
+    return array(vertices, dtype=float)
+
+
+class Polyhedron:
+    """
+    Regular polyhedron inscribed in the unit sphere, i.e. the tiling {p,q} of the sphere
+    """
+
+    def __init__(self, p, q):
+        """
+        Constructor
+        :param p: number of sides of the faces
+        :param q: number of faces around each vertex
+        """
+        self.p = p
+        self.q = q
+
+        self._faces = None
+        self._normals = None
+        self._rotations = None
+
+    @property
+    def faces(self):
+        """
+        Vertices of the faces, each face being an array of shape (p, 3)
+        whose vertices are counterclockwise when seen from outside the polyhedron
+        """
+        if self._faces is None:
+            triangulated = {3: _tetrahedron, 4: _octahedron, 5: _icosahedron}
+            if self.p == 3 and self.q in triangulated:
+                self._faces = self.triangles(triangulated[self.q]())
+            elif self.q == 3 and self.p in triangulated:
+                # dual of the polyhedron {3,p}
+                self._faces = self.dual(Polyhedron(3, self.p).faces)
+            else:
+                raise Exception(f"{{{self.p},{self.q}}} is not a tiling of the sphere")
+        return self._faces
+
+    @staticmethod
+    def triangles(vertices):
+        """
+        Triangular faces of the polyhedron with the given vertices: triples of vertices at minimal distance
+        """
+        vertices = vertices / linalg.norm(vertices, axis=1)[:, None]
+        edge = min(linalg.norm(a - b) for a, b in combinations(vertices, 2))
+        faces = []
+        for a, b, c in combinations(vertices, 3):
+            if all(isclose(linalg.norm(u - v), edge) for u, v in ((a, b), (b, c), (c, a))):
+                if dot(cross(b - a, c - a), a + b + c) < 0:
+                    b, c = c, b
+                faces.append(array([a, b, c]))
+        return faces
+
+    @staticmethod
+    def dual(faces):
+        """
+        Faces of the dual polyhedron: the centers of the faces around each vertex
+        """
+        centers = [face.mean(axis=0) / linalg.norm(face.mean(axis=0)) for face in faces]
+        vertices = []
+        for face in faces:
+            for vertex in face:
+                if not any(isclose(vertex, other).all() for other in vertices):
+                    vertices.append(vertex)
+
+        dual_faces = []
+        for vertex in vertices:
+            around = array([center for face, center in zip(faces, centers)
+                            if any(isclose(vertex, other).all() for other in face)])
+            # counterclockwise order around the vertex, seen from outside
+            u = around[0] - dot(around[0], vertex) * vertex
+            w = cross(vertex, u)
+            dual_faces.append(around[argsort(arctan2(around @ w, around @ u))])
+        return dual_faces
+
+    @property
+    def normals(self):
+        """
+        Unit normals of the faces
+        """
+        if self._normals is None:
+            normals = array([face.mean(axis=0) for face in self.faces])
+            self._normals = normals / linalg.norm(normals, axis=1)[:, None]
+        return self._normals
+
+    @property
+    def rotations(self):
+        """
+        Rotations moving each face to the first one, the i-th vertex being sent to the i-th vertex
+        :return: array of shape (number of faces, 3, 3)
+        """
+        if self._rotations is None:
+            first = self.faces[0][0:3].transpose()
+            self._rotations = array([first @ linalg.inv(face[0:3].transpose()) for face in self.faces])
+        return self._rotations
@@ -0,0 +1,103 @@
+import hashlib
+import os
+import re
+from typing import Dict, Optional
+
+from PySide6.QtGui import QOpenGLContext
+from PySide6.QtOpenGL import QOpenGLShaderProgram, QOpenGLShader
+
+from utils.path_helper import get_resource_path
+
+# Directory of the files of the #include directives of the shaders
+LIBRARY_DIR = get_resource_path("shaders/lib")
+INCLUDE = re.compile(r'^\s*#include\s+"([^"]+)"\s*$')
+
+# Linked programs of each group of contexts sharing their resources,
+# indexed by (vertex shader, fragment shader, hash of the preprocessed sources)
+_programs: Dict[object, Dict[tuple, QOpenGLShaderProgram]] = {}
+# Contexts whose destruction releases the programs of their group
+_watched = set()
+
+
+def read_source(path: str) -> str:
+    with open(path, encoding='utf-8') as file:
+        return file.read()
+
+
+def include(path: str, included: set) -> list:
+    """
+    Lines of the file, its #include directives being replaced by the files of LIBRARY_DIR (each file once)
+    """
+    lines = []
+    for line in read_source(path).splitlines():
+        match = INCLUDE.match(line)
+        if match is None:
+            lines.append(line)
+            continue
+        name = match.group(1)
+        if name not in included:
+            included.add(name)
+            library_path = os.path.join(LIBRARY_DIR, name)
+            if not os.path.isfile(library_path):
+                raise Exception(f"Unknown shader library {name} included by {path}")
+            lines += include(library_path, included)
+    return lines
+
+
+def preprocess(path: str, defines: Optional[Dict[str, int]] = None) -> bytes:
+    """
+    Source of a shader file, with its #include "name" directives resolved in LIBRARY_DIR
+    and a #define directive for each macro of defines, inserted after the #version directive
+    (the variants of a shader are selected by #if on these macros, the default values being given by #ifndef)
+    """
+    lines = include(path, set())
+    position = 1 if lines and lines[0].startswith('#version') else 0
+    macros = [f"#define {name} {value}" for name, value in sorted((defines or {}).items())]
+    return '\n'.join(lines[:position] + macros + lines[position:]).encode('utf-8') + b'\n'
+
+
+def shader_program(vertex_shader: str, fragment_shader: str,
+                   defines: Optional[Dict[str, int]] = None) -> QOpenGLShaderProgram:
+    """
+    Return the linked program made of the given shader files, in the group of the current OpenGL context.
+    Each program is compiled once per group of contexts (once for all the windows, their contexts being shared: cf. Qt.AA_ShareOpenGLContexts in main.py)
+    and reused until the sources change. The binaries of the linked programs are also kept on disk by Qt
+    (addCacheableShaderFromSourceCode), keyed by the sources and the driver, so that later launches skip the
+    compilation of the GLSL sources.
+    The sources are preprocessed first (cf. preprocess): each set of defines gives another variant of the program,
+    compiled on first use.
+    The returned program is shared: it must not be modified (shaders, attribute bindings) by its users.
+    """
+    context = QOpenGLContext.currentContext()
+    if context is None:
+        raise Exception("A current OpenGL context is required to compile shaders")
+
+    vertex_source = preprocess(vertex_shader, defines)
+    fragment_source = preprocess(fragment_shader, defines)
+    digest = hashlib.sha1(vertex_source + b'\0' + fragment_source).hexdigest()
+    key = (vertex_shader, fragment_shader, digest)
+
+    group = context.shareGroup()
+    programs = _programs.setdefault(group, {})
+    if key not in programs:
+        program = QOpenGLShaderProgram()
+        program.addCacheableShaderFromSourceCode(QOpenGLShader.Vertex, vertex_source)
+        program.addCacheableShaderFromSourceCode(QOpenGLShader.Fragment, fragment_source)
+        if not program.link():
+            raise Exception(f"Unable to link the shaders {vertex_shader} and {fragment_shader}: {program.log()}")
+        programs[key] = program
+
+    if context not in _watched:
+        _watched.add(context)
+        context.aboutToBeDestroyed.connect(lambda: release_programs(context))
+    return programs[key]
+
+
+def release_programs(context: QOpenGLContext):
+    """
+    Forget the programs of the group of the context when no other context of the group remains
+    """
+    _watched.discard(context)
+    group = context.shareGroup()
+    if all(other is context for other in group.shares()):
+        _programs.pop(group, None)
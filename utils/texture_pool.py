@@ -0,0 +1,92 @@
+import os
+from typing import Dict
+from weakref import WeakValueDictionary
+
+from OpenGL import GL
+from PySide6.QtGui import QImage, QOpenGLContext
+
+# Pictures of the tiles, indexed by (absolute path, modification time):
+# an image is read once for all the windows drawing it (QImage is implicitly shared, so it must not be modified)
+_images = WeakValueDictionary()
+# Textures of each group of contexts sharing their resources, indexed by (absolute path, QImage.cacheKey()),
+# with the number of users of each texture
+_textures: Dict[object, Dict[tuple, list]] = {}
+# Contexts whose destruction releases the textures of their group
+_watched = set()
+
+
+def tile_image(path: str) -> QImage:
+    """
+    Return the picture of the file, read again only when the file has been modified
+    """
+    path = os.path.abspath(path)
+    key = (path, os.path.getmtime(path) if os.path.isfile(path) else None)
+    image = _images.get(key)
+    if image is None:
+        image = QImage(path)
+        if image.isNull():
+            raise Exception(f"Unable to load the picture {path}")
+        _images[key] = image
+    return image
+
+
+def acquire_texture(path: str, image: QImage) -> int:
+    """
+    Return the texture of the picture in the group of the current OpenGL context (linear filtering, repeat wrap mode),
+    uploading it on first use: the windows drawing the same tile share a single texture when their contexts are shared.
+    Each call must be balanced by a call to release_texture.
+    The first row of the texture is the top of the picture, as with QOpenGLTexture.setData.
+    :param path: the file of the picture
+    :param image: the picture itself (cf. tile_image)
+    :return: the name of the texture
+    """
+    context = QOpenGLContext.currentContext()
+    if context is None:
+        raise Exception("A current OpenGL context is required to upload textures")
+
+    textures = _textures.setdefault(context.shareGroup(), {})
+    key = (os.path.abspath(path), image.cacheKey())
+    if key not in textures:
+        pixels = image.convertToFormat(QImage.Format.Format_RGBA8888)
+        texture = GL.glGenTextures(1)
+        GL.glBindTexture(GL.GL_TEXTURE_2D, texture)
+        GL.glPixelStorei(GL.GL_UNPACK_ALIGNMENT, 4)
+        GL.glTexImage2D(GL.GL_TEXTURE_2D, 0, GL.GL_RGBA8, pixels.width(), pixels.height(), 0,
+                        GL.GL_RGBA, GL.GL_UNSIGNED_BYTE, bytes(pixels.constBits()))
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MIN_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_MAG_FILTER, GL.GL_LINEAR)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_S, GL.GL_REPEAT)
+        GL.glTexParameteri(GL.GL_TEXTURE_2D, GL.GL_TEXTURE_WRAP_T, GL.GL_REPEAT)
+        textures[key] = [texture, 0]
+    textures[key][1] += 1
+
+    if context not in _watched:
+        _watched.add(context)
+        context.aboutToBeDestroyed.connect(lambda: release_textures(context))
+    return textures[key][0]
+
+
+def release_texture(texture: int):
+    """
+    Give back a texture returned by acquire_texture, deleting it when it has no other user.
+    A context of the group of the texture must be current.
+    """
+    context = QOpenGLContext.currentContext()
+    textures = _textures.get(context.shareGroup(), {}) if context is not None else {}
+    for key, entry in textures.items():
+        if entry[0] == texture:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                GL.glDeleteTextures(1, [texture])
+                del textures[key]
+            return
+
+
+def release_textures(context: QOpenGLContext):
+    """
+    Forget the textures of the group of the context when no other context of the group remains
+    """
+    _watched.discard(context)
+    group = context.shareGroup()
+    if all(other is context for other in group.shares()):
+        _textures.pop(group, None)